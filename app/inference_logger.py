@@ -0,0 +1,265 @@
+import os, json, queue, threading, time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src import inference_log_typed as typed_log
+from src.feature_sketches import DDL as SKETCH_DDL, hora_utc, sketch_rows, upsert as upsert_sketches
+from src.utils import make_engine_from_env
+
+INSERT_SQL = """INSERT INTO inference_log
+                (model_mode, model_threshold, model_created_at, model_path, score, decision, codigo_profissional, payload)
+                VALUES %s"""
+# mesmo INSERT com o horário da requisição (coluna de tempo do inference_log: ts ou created_at)
+INSERT_TS_SQL = """INSERT INTO inference_log
+                ({tcol}, model_mode, model_threshold, model_created_at, model_path, score, decision,
+                 codigo_profissional, payload)
+                VALUES %s"""
+
+LOG_MODES = ("json", "typed")
+
+_STOP = object()
+
+
+class InferenceLogWriter:
+    """
+    Grava o inference_log fora do caminho da requisição:
+      - as predições entram numa fila em memória limitada (queue_size);
+      - uma thread consome a fila e grava em micro-lotes (batch_size ou a cada flush_interval s)
+        com um único INSERT multi-linha, reutilizando um engine de vida longa;
+      - fila cheia: espera até block_ms (backpressure) e, se continuar cheia, descarta e conta;
+      - cada linha leva o horário do submit (a requisição): é o ts gravado, a partição diária e a hora da
+        sketch, mesmo que o flush aconteça depois da virada da hora ou do dia;
+      - stop() drena o que estiver na fila antes de encerrar;
+      - sketches=True: soma as estatísticas horárias das features do lote em feature_sketch_hourly na mesma
+        transação (savepoint: falha nas sketches não perde as linhas do log);
+      - mode="typed": grava em inference_log_typed (uma coluna por feature registrada em register_columns,
+        partição do dia criada sob demanda) em vez do payload JSON no inference_log.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        block_ms: float = 0.0,
+        engine_factory: Callable[[], Any] = make_engine_from_env,
+        sketches: bool = True,
+        mode: str = "json",
+    ):
+        if mode not in LOG_MODES:
+            raise ValueError(f"mode deve ser um de {LOG_MODES}: {mode!r}")
+        self.queue_size = int(queue_size)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.block_ms = float(block_ms)
+        self.sketches = bool(sketches)
+        self._sketch_table_ok = False
+        self.mode = mode
+        self._typed_cols: List[str] = []        # colunas registradas (features dos modelos servidos)
+        self._typed_schema: Optional[List[str]] = None   # colunas já garantidas no banco por este processo
+        self._typed_days: set = set()           # partições diárias já garantidas
+        self._log_tcol: Optional[str] = None     # coluna de tempo do inference_log ("" = nenhuma conhecida)
+        self._engine_factory = engine_factory
+        self._engine = None
+        self._q: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._counters = {"enqueued": 0, "written": 0, "dropped": 0, "blocked": 0, "failed": 0, "flushes": 0,
+                          "sketch_failed": 0}
+        self._last_error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "InferenceLogWriter":
+        return cls(
+            queue_size=int(os.getenv("INFERENCE_LOG_QUEUE_SIZE", "10000")),
+            batch_size=int(os.getenv("INFERENCE_LOG_BATCH_SIZE", "500")),
+            flush_interval=float(os.getenv("INFERENCE_LOG_FLUSH_INTERVAL", "1.0")),
+            block_ms=float(os.getenv("INFERENCE_LOG_BLOCK_MS", "0")),
+            sketches=os.getenv("FEATURE_SKETCHES", "1").lower() in ("1", "true", "yes"),
+            mode=os.getenv("INFERENCE_LOG_MODE", "json").lower(),
+        )
+
+    def register_columns(self, columns: Sequence[str]):
+        """Features que viram coluna no modo typed (união entre os modelos; as demais chaves vão para `extra`)."""
+        novas = typed_log.valid_columns([*self._typed_cols, *columns])
+        with self._lock:
+            self._typed_cols = novas
+
+    # ---------- ciclo de vida ----------
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="inference-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Sinaliza o fim, drena a fila e espera a thread terminar (até timeout s)."""
+        th = self._thread
+        if th is None or not th.is_alive():
+            return
+        self._q.put(_STOP)
+        th.join(timeout)
+
+    # ---------- produtor (requisição) ----------
+    def submit(self, rows: Sequence[tuple]) -> int:
+        """Enfileira linhas (na ordem das colunas de INSERT_SQL, payload como dict). Retorna quantas entraram."""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        ts = datetime.now(timezone.utc)
+        accepted = 0
+        for row in rows:
+            item = (ts, row)
+            try:
+                self._q.put_nowait(item)
+            except queue.Full:
+                if self.block_ms <= 0:
+                    self._inc("dropped"); continue
+                self._inc("blocked")
+                try:
+                    self._q.put(item, timeout=self.block_ms / 1000.0)
+                except queue.Full:
+                    self._inc("dropped"); continue
+            accepted += 1
+        self._inc("enqueued", accepted)
+        return accepted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+        out.update(
+            queue_depth=self._q.qsize(),
+            queue_capacity=self.queue_size,
+            batch_size=self.batch_size,
+            mode=self.mode,
+            flush_interval=self.flush_interval,
+            running=bool(self._thread is not None and self._thread.is_alive()),
+            last_error=self._last_error,
+        )
+        return out
+
+    # ---------- consumidor (thread) ----------
+    def _inc(self, key: str, n: int = 1):
+        with self._lock:
+            self._counters[key] += n
+
+    def _run(self):
+        batch: List[Tuple[datetime, tuple]] = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+        while True:
+            try:
+                item = self._q.get(timeout=max(0.0, deadline - time.monotonic()))
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if len(batch) >= self.batch_size or (batch and not stopping and now >= deadline):
+                self._flush(batch)
+                batch = []
+            if now >= deadline:
+                deadline = now + self.flush_interval
+            if stopping and self._q.empty():
+                if batch:
+                    self._flush(batch)
+                return
+
+    def _gravar_sketches(self, cur, batch: List[tuple], tss: Optional[Sequence[datetime]] = None):
+        # linhas na ordem de INSERT_SQL: score = r[4], decision = r[5], payload (dict) = r[-1]
+        # um lote pode cruzar a virada da hora: uma sketch por hora das requisições
+        por_hora: Dict[datetime, List[tuple]] = defaultdict(list)
+        for r, t in zip(batch, tss or [None] * len(batch)):
+            por_hora[hora_utc(t)].append(r)
+        try:
+            rows = [linha for hora, rs in sorted(por_hora.items())
+                    for linha in sketch_rows([r[-1] for r in rs], scores=[r[4] for r in rs],
+                                             decisions=[r[5] for r in rs], hora=hora)]
+        except Exception as e:
+            self._inc("sketch_failed", len(batch))
+            self._last_error = f"sketches: {type(e).__name__}: {e}"
+            return
+        cur.execute("SAVEPOINT sketches")
+        try:
+            criou = not self._sketch_table_ok
+            if criou:
+                cur.execute(SKETCH_DDL)
+            upsert_sketches(cur, rows)
+            cur.execute("RELEASE SAVEPOINT sketches")
+            # só depois do RELEASE: o ROLLBACK TO SAVEPOINT também desfaz o CREATE TABLE
+            if criou:
+                self._sketch_table_ok = True
+        except Exception as e:
+            cur.execute("ROLLBACK TO SAVEPOINT sketches")
+            self._inc("sketch_failed", len(batch))
+            self._last_error = f"sketches: {type(e).__name__}: {e}"
+            print(f"⚠️ Falha ao gravar sketches de {len(batch)} inferências: {self._last_error}")
+
+    def _inserir_typed(self, cur, batch: List[tuple], tss: Optional[Sequence[datetime]] = None):
+        tss = list(tss) if tss is not None else [datetime.now(timezone.utc)] * len(batch)
+        cols = self._typed_cols
+        if cols != self._typed_schema:
+            typed_log.ensure_schema(cur, cols)
+            self._typed_schema = cols
+        # partição pelo dia (UTC) da requisição; o lote pode ter linhas de antes e depois da meia-noite
+        dias = {t.astimezone(timezone.utc).date() for t in tss}
+        faltando = dias - self._typed_days
+        if faltando:
+            # outra instância pode criar a mesma partição ao mesmo tempo: erro aqui não derruba o lote
+            cur.execute("SAVEPOINT particao")
+            try:
+                typed_log.ensure_partitions(cur, sorted(faltando | {max(dias) + timedelta(days=1)}))
+                cur.execute("RELEASE SAVEPOINT particao")
+            except Exception:
+                cur.execute("ROLLBACK TO SAVEPOINT particao")
+            ultimo = max(dias)
+            self._typed_days = {d for d in self._typed_days | dias if d >= ultimo - timedelta(days=1)}
+        typed_log.insert(cur, batch, cols, ts=tss)
+
+    def _coluna_tempo(self, cur) -> str:
+        if self._log_tcol is None:
+            cur.execute("SELECT * FROM inference_log LIMIT 0")
+            cols = {d[0] for d in cur.description}
+            self._log_tcol = next((c for c in ("ts", "created_at") if c in cols), "")
+        return self._log_tcol
+
+    def _flush(self, itens: List[Tuple[datetime, tuple]]):
+        tss = [t for t, _ in itens]
+        batch = [r for _, r in itens]
+        try:
+            from psycopg2.extras import execute_values
+            if self._engine is None:
+                self._engine = self._engine_factory()
+            raw = self._engine.raw_connection()
+            try:
+                with raw.cursor() as cur:
+                    if self.mode == "typed":
+                        self._inserir_typed(cur, batch, tss)
+                    else:
+                        rows = [r[:-1] + (json.dumps(r[-1]),) for r in batch]
+                        tcol = self._coluna_tempo(cur)
+                        if tcol:
+                            execute_values(cur, INSERT_TS_SQL.format(tcol=tcol),
+                                           [(t, *r) for t, r in zip(tss, rows)], page_size=len(rows))
+                        else:
+                            execute_values(cur, INSERT_SQL, rows, page_size=len(rows))
+                    if self.sketches:
+                        self._gravar_sketches(cur, batch, tss)
+                raw.commit()
+            finally:
+                raw.close()
+            self._inc("written", len(batch))
+        except Exception as e:
+            self._inc("failed", len(batch))
+            self._last_error = f"{type(e).__name__}: {e}"
+            # a transação desfeita pode ter levado colunas/partições recém-criadas
+            self._typed_schema, self._typed_days, self._log_tcol = None, set(), None
+            self._sketch_table_ok = False
+            print(f"⚠️ Falha ao gravar {len(batch)} inferências no inference_log: {self._last_error}")
+        finally:
+            self._inc("flushes")
@@ -1,115 +1,352 @@
-import os, json, joblib, pandas as pd
-from fastapi import FastAPI, HTTPException
+import os, json, threading, pandas as pd
+from fastapi import Body, FastAPI, Header, HTTPException, Query, Response
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, NamedTuple, Optional
 from datetime import datetime
-from sqlalchemy import text
 import numpy as np 
-from src.utils import make_engine_from_env
+from app import metrics
+from app.inference_logger import InferenceLogWriter
+from app.model_registry import LoadedModel, ModelRegistry
+from app.prediction_cache import PredictionCache, feature_key
+from src.feature_engineering.applicants_features import construir_features_candidato
 
-# Carrega artefato uma única vez no startup
+# Artefatos: .joblib ou diretório (manifest.json + .npy mmap + boosters .txt). Um modelo (MODEL_ARTIFACT) ou
+# vários nomeados (MODEL_ARTIFACTS="prec80=...,prec90=..."), recarregados sem restart pelo ModelRegistry
 ARTIFACT_PATH = os.getenv("MODEL_ARTIFACT", "./artifacts/modelo_prec80.joblib")
+# protege o POST /admin/reload (header X-Admin-Token); vazio = sem token
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 
 app = FastAPI(title="Hiring Model API", version="1.0.0")
+# modelo padrão (publicado pelo registry a cada troca; os quatro globais mudam juntos sob _swap_lock)
 artifact: Dict[str, Any] = {}
 model = None
 feature_columns: List[str] = []
 threshold: float = 0.5
+artifact_path: str = ARTIFACT_PATH
+model_version: int = 0
+_swap_lock = threading.Lock()
+# gravação assíncrona/em lote do inference_log (fora do caminho da requisição)
+log_writer = InferenceLogWriter.from_env()
+# cache de score por vetor de features + versão do modelo (zerado a cada reload)
+prediction_cache = PredictionCache.from_env()
 
 class PredictPayload(BaseModel):
     # features em dicionário: {coluna: valor}
     features: Dict[str, Any] = Field(..., description="Mapa de features conforme feature_columns do artefato")
     codigo_profissional: Optional[int] = Field(None, description="Opcional, se disponível")
 
+class PredictBatchPayload(BaseModel):
+    # lote de candidatos no mesmo formato do /predict
+    items: List[PredictPayload] = Field(..., description="Lista de payloads no formato do /predict")
+
+# limite de itens por chamada do /predict/batch
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "10000"))
+
+class _Modelo(NamedTuple):
+    """Modelo resolvido uma vez por requisição (um reload no meio da requisição não a afeta)."""
+    name: str
+    path: str
+    artifact: Dict[str, Any]
+    model: Any
+    feature_columns: List[str]
+    threshold: float
+    version: int = 0
+
+def _publicar(m: LoadedModel):
+    # troca de qualquer modelo invalida o cache; a do modelo padrão também troca os globais (juntos)
+    global artifact, model, feature_columns, threshold, artifact_path, model_version
+    prediction_cache.invalidate()
+    log_writer.register_columns(m.feature_columns)
+    if m.name != registry.default:
+        return
+    with _swap_lock:
+        artifact, model, feature_columns, threshold, artifact_path, model_version = (
+            m.artifact, m.model, m.feature_columns, m.threshold, m.path, m.version)
+
+registry = ModelRegistry.from_env(on_swap=_publicar)
+
+# /metrics: requisições/latência por rota (middleware) + etapas, decisões e estado da fila/cache/modelos
+app.add_middleware(metrics.MetricsMiddleware, routes=lambda: app.routes)
+for _nome, _chave, _tipo, _ajuda in (
+    ("inference_log_queue_depth", "queue_depth", "gauge", "Itens na fila do inference_log"),
+    ("inference_log_queue_capacity", "queue_capacity", "gauge", "Capacidade da fila do inference_log"),
+    ("inference_log_written_total", "written", "counter", "Linhas gravadas no inference_log"),
+    ("inference_log_dropped_total", "dropped", "counter", "Linhas descartadas com a fila cheia"),
+    ("inference_log_failed_total", "failed", "counter", "Linhas perdidas em falhas de gravação"),
+):
+    metrics.REGISTRY.add(metrics.FuncMetric(_nome, _ajuda, (), lambda k=_chave: [((), log_writer.stats()[k])], _tipo))
+for _nome, _chave, _tipo, _ajuda in (
+    ("prediction_cache_hits_total", "hits", "counter", "Hits do cache de predições"),
+    ("prediction_cache_misses_total", "misses", "counter", "Misses do cache de predições"),
+    ("prediction_cache_evictions_total", "evictions", "counter", "Entradas removidas por LRU"),
+    ("prediction_cache_size", "size", "gauge", "Entradas no cache de predições"),
+):
+    metrics.REGISTRY.add(metrics.FuncMetric(_nome, _ajuda, (), lambda k=_chave: [((), prediction_cache.stats()[k])], _tipo))
+metrics.REGISTRY.add(metrics.FuncMetric(
+    "api_model_info", "Modelos carregados (valor 1; versão e threshold nos labels)",
+    ("model", "version", "operating_mode", "threshold", "default"),
+    lambda: [((n, lm.version, lm.artifact.get("operating_mode"), lm.threshold, int(n == registry.default)), 1)
+             for n, lm in registry.loaded().items()],
+))
+
+def _modelo(nome: Optional[str] = None) -> _Modelo:
+    if nome and nome != registry.default:
+        try:
+            m = registry.get(nome)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Modelo não carregado: {nome}")
+        return _Modelo(m.name, m.path, m.artifact, m.model, m.feature_columns, m.threshold, m.version)
+    with _swap_lock:
+        return _Modelo(registry.default, artifact_path, artifact, model, feature_columns, threshold, model_version)
+
 def _load_artifact():
-    global artifact, model, feature_columns, threshold
-    if not os.path.exists(ARTIFACT_PATH):
-        raise FileNotFoundError(f"Artifact not found: {ARTIFACT_PATH}")
-    artifact = joblib.load(ARTIFACT_PATH)
-    model = artifact["model"]
-    feature_columns = artifact["feature_columns"]
-    threshold = float(artifact["threshold"])
+    """Carrega todos os modelos do registry; erro se o modelo padrão não carregar."""
+    res = registry.reload(force=True)
+    if registry.default in res["errors"]:
+        raise RuntimeError(res["errors"][registry.default])
+    return res
 
 @app.on_event("startup")
 def startup_event():
-    # Carregar modelo e artefatos quando a API iniciar
+    # Carregar modelos quando a API iniciar (falhas já são reportadas pelo registry) e iniciar o watcher
     try:
         _load_artifact()
-        print(f"✅ Artefato carregado com sucesso: {ARTIFACT_PATH}")
-    except Exception as e:
-        print(f"❌ Falha ao carregar artefato: {e}")
+    except Exception:
+        pass
+    registry.start()
+    # aquece o builder de features do /predict/raw (tabelas e regex já compiladas no import)
+    construir_features_candidato({})
+    log_writer.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    registry.stop()
+    # drena a fila de logs antes de encerrar
+    log_writer.stop(timeout=float(os.getenv("INFERENCE_LOG_DRAIN_TIMEOUT", "10")))
 
 @app.get("/health")
 def health():
     return {"status": "ok", "time": datetime.utcnow().isoformat() + "Z"}
 
+@app.get("/stats")
+def stats():
+    # contadores operacionais (fila de logs: profundidade, descartes, backpressure, falhas)
+    return {"inference_log": log_writer.stats(), "models": registry.stats(), "prediction_cache": prediction_cache.stats()}
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/version")
 def version():
-    meta = artifact.get("metadata", {})
+    m = _modelo()
+    meta = m.artifact.get("metadata", {})
     return {
-        "operating_mode": artifact.get("operating_mode"),
-        "threshold": artifact.get("threshold"),
-        "feature_columns": feature_columns,
+        "operating_mode": m.artifact.get("operating_mode"),
+        "threshold": m.artifact.get("threshold"),
+        "feature_columns": m.feature_columns,
         "metadata": meta,
-        "artifact_path": ARTIFACT_PATH
+        "artifact_path": m.path,
+        "default_model": m.name,
+        "models": {nome: lm.info() for nome, lm in registry.loaded().items()},
     }
 
-def _log_inference(payload: Dict[str, Any], score: float, decision: int, codigo_profissional: Optional[int]):
+@app.post("/admin/reload")
+def admin_reload(
+    modelo: Optional[str] = Query(None, alias="model", description="Nome do modelo (padrão: todos)"),
+    force: bool = Query(False, description="Recarrega mesmo sem mudança no arquivo"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    # carga completa nesta thread; as demais requisições seguem com o modelo atual até a troca
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Token inválido.")
+    if modelo and modelo not in registry.names:
+        raise HTTPException(status_code=404, detail=f"Modelo desconhecido: {modelo}")
+    res = registry.reload([modelo] if modelo else None, force=force)
+    res["models"] = {nome: lm.info() for nome, lm in registry.loaded().items()}
+    return res
+
+def _log_inference_batch(registros: List[Dict[str, Any]], m: Optional[_Modelo] = None):
+    """Enfileira as inferências para o writer em background (INSERT multi-linha em micro-lotes)."""
+    if not registros:
+        return
+    m = m or _modelo()
+    mode = m.artifact.get("operating_mode")
+    thr = float(m.artifact.get("threshold"))
+    created = m.artifact.get("metadata", {}).get("created_at")
+    with metrics.etapa("logging"):
+        log_writer.submit([
+            (mode, thr, created, m.path, float(r["score"]), int(r["decision"]),
+             r.get("codigo_profissional"), r["payload"])
+            for r in registros
+        ])
+
+def _log_inference(payload: Dict[str, Any], score: float, decision: int, codigo_profissional: Optional[int],
+                   m: Optional[_Modelo] = None):
+    _log_inference_batch([dict(payload=payload, score=score, decision=decision, codigo_profissional=codigo_profissional)], m)
+
+def _proba_positiva(proba_raw) -> np.ndarray:
+    """Normaliza a saída do predict_proba (list/np.ndarray 0D/1D/2D) para um vetor com a classe positiva."""
+    # para listas/tuplas -> vira np.array
+    proba_arr = np.asarray(proba_raw)
+    if proba_arr.ndim == 0:
+        # escalar
+        return proba_arr.reshape(1).astype(float)
+    if proba_arr.ndim == 1:
+        # vetor (um valor por linha)
+        return proba_arr.astype(float)
+    # matriz; se tiver 2 colunas, usa a da classe positiva
+    return (proba_arr[:, 1] if proba_arr.shape[1] >= 2 else proba_arr[:, 0]).astype(float)
+
+def _fast_scores(features_list: List[Dict[str, Any]], m: _Modelo) -> Optional[np.ndarray]:
+    """Escora via FastScorer do artefato; None se não houver scorer ou se o payload não for numérico."""
+    scorer = m.artifact.get("fast_scorer")
+    if scorer is None or list(scorer.feature_columns) != list(m.feature_columns):
+        return None
     try:
-        eng = make_engine_from_env()
-        with eng.begin() as c:
-            c.execute(
-                text("""INSERT INTO inference_log
-                        (model_mode, model_threshold, model_created_at, model_path, score, decision, codigo_profissional, payload)
-                        VALUES (:mode, :thr, :created, :path, :score, :dec, :cod, :payload)"""),
-                dict(
-                    mode=artifact.get("operating_mode"),
-                    thr=float(artifact.get("threshold")),
-                    created=artifact.get("metadata", {}).get("created_at"),
-                    path=ARTIFACT_PATH,
-                    score=float(score),
-                    dec=int(decision),
-                    cod=codigo_profissional,
-                    payload=json.dumps(payload)
-                )
-            )
-    except Exception:
-        pass
+        with metrics.etapa("dataframe_build"):
+            X = np.vstack([scorer.vector(f) for f in features_list])
+        with metrics.etapa("predict_proba"):
+            return scorer.predict_proba(X)[:, 1]
+    except (TypeError, ValueError):
+        return None
 
-@app.post("/predict")
-def predict(req: PredictPayload):
-    if model is None:
+def _scores(features_list: List[Dict[str, Any]], m: _Modelo) -> np.ndarray:
+    """Uma única matriz e uma única chamada de predição para todas as linhas."""
+    if m.model is None:
+        raise HTTPException(status_code=500, detail="Modelo não carregado.")
+
+    # caminho rápido (sem pandas/sklearn) quando o artefato traz o FastScorer
+    probas = _fast_scores(features_list, m)
+    if probas is None:
+        with metrics.etapa("dataframe_build"):
+            rows = [{col: f.get(col, None) for col in m.feature_columns} for f in features_list]
+            X = pd.DataFrame(rows).reindex(columns=m.feature_columns)
+        # --- normaliza a saída do predict_proba para lidar com list/np.ndarray 1D/2D
+        try:
+            with metrics.etapa("predict_proba"):
+                probas = _proba_positiva(m.model.predict_proba(X))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Erro ao gerar probabilidade: {e}")
+    if len(probas) != len(features_list):
+        raise HTTPException(status_code=400, detail="predict_proba retornou número de linhas inesperado.")
+    return probas
+
+def _scores_cache(features_list: List[Dict[str, Any]], m: _Modelo):
+    """Scores consultando o cache primeiro; só os misses vão ao modelo. Retorna (scores, máscara de hits)."""
+    hits = np.zeros(len(features_list), dtype=bool)
+    if not prediction_cache.enabled:
+        return _scores(features_list, m), hits
+    if m.model is None:
         raise HTTPException(status_code=500, detail="Modelo não carregado.")
+    probas = np.empty(len(features_list))
+    with metrics.etapa("cache"):
+        prediction_cache.check_owner(m.name, m.model)
+        chaves = [feature_key(m.name, m.version, m.feature_columns, f) for f in features_list]
+        for i, k in enumerate(chaves):
+            v = prediction_cache.get(k)
+            if v is not None:
+                probas[i], hits[i] = v, True
+    faltam = np.flatnonzero(~hits)
+    if len(faltam):
+        novos = _scores([features_list[i] for i in faltam], m)
+        probas[faltam] = novos
+        for i, p in zip(faltam, novos):
+            prediction_cache.put(chaves[i], p)
+    return probas, hits
+
+def _logar(hit: bool) -> bool:
+    # hits entram no inference_log só com PREDICTION_CACHE_LOG_HITS=full; senão viram contador
+    return not hit or prediction_cache.should_log_hit()
 
-    row = {col: req.features.get(col, None) for col in feature_columns}
-    X = pd.DataFrame([row]).reindex(columns=feature_columns)
+def _score_one(features: Dict[str, Any], m: _Modelo):
+    probas, hits = _scores_cache([features], m)
+    return float(probas[0]), bool(hits[0])
+
+_MODELO_QUERY = Query(None, alias="model", description="Nome do modelo (padrão: MODEL_DEFAULT)")
+
+@app.post("/predict")
+def predict(req: PredictPayload, modelo: Optional[str] = _MODELO_QUERY):
+    metrics.marcar_validacao()
+    m = _modelo(modelo)
+    proba, hit = _score_one(req.features, m)
+    label = int(proba >= m.threshold)
+    metrics.registrar_decisoes(m.name, m.version, [proba], [label])
+    if _logar(hit):
+        _log_inference(req.features, proba, label, req.codigo_profissional, m)
 
-    # --- normaliza a saída do predict_proba para lidar com list/np.ndarray 1D/2D
+    return {
+        "probabilidade_contratacao": proba,
+        "aprovado_pelo_modelo": bool(label),
+        "threshold": m.threshold,
+        "operating_mode": m.artifact.get("operating_mode"),
+        "model": m.name,
+        "codigo_profissional": req.codigo_profissional
+    }
+
+@app.post("/predict/raw")
+def predict_raw(registro: Dict[str, Any] = Body(..., description="Registro bruto no formato de applicants.json"),
+                modelo: Optional[str] = _MODELO_QUERY):
+    metrics.marcar_validacao()
+    m = _modelo(modelo)
+    # features calculadas no processo (mesma lógica do ETL), depois o mesmo caminho do /predict
     try:
-        proba_raw = model.predict_proba(X)
-
-        # para listas/tuplas -> vira np.array
-        proba_arr = np.asarray(proba_raw)
-
-        if proba_arr.ndim == 0:
-            # escalar
-            proba = float(proba_arr)
-        elif proba_arr.ndim == 1:
-            # vetor (pega o primeiro valor)
-            proba = float(proba_arr.ravel()[0])
-        else:
-            # matriz; se tiver 2 colunas, usa a da classe positiva
-            proba = float(proba_arr[0, 1] if proba_arr.shape[1] >= 2 else proba_arr.ravel()[0])
+        with metrics.etapa("features"):
+            features = construir_features_candidato(registro)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao gerar probabilidade: {e}")
+        raise HTTPException(status_code=400, detail=f"Erro ao construir features: {e}")
+    codigo = features.pop("codigo_profissional", None)
+    codigo = codigo if isinstance(codigo, int) else None
 
-    label = int(proba >= threshold)
-    _log_inference(req.features, proba, label, req.codigo_profissional)
+    proba, hit = _score_one(features, m)
+    label = int(proba >= m.threshold)
+    metrics.registrar_decisoes(m.name, m.version, [proba], [label])
+    if _logar(hit):
+        _log_inference(features, proba, label, codigo, m)
 
     return {
         "probabilidade_contratacao": proba,
         "aprovado_pelo_modelo": bool(label),
-        "threshold": threshold,
-        "operating_mode": artifact.get("operating_mode"),
-        "codigo_profissional": req.codigo_profissional
-    }
\ No newline at end of file
+        "threshold": m.threshold,
+        "operating_mode": m.artifact.get("operating_mode"),
+        "model": m.name,
+        "codigo_profissional": codigo,
+        "features": features,
+    }
+
+@app.post("/predict/batch")
+def predict_batch(req: PredictBatchPayload, modelo: Optional[str] = _MODELO_QUERY):
+    metrics.marcar_validacao()
+    m = _modelo(modelo)
+    if m.model is None:
+        raise HTTPException(status_code=500, detail="Modelo não carregado.")
+    if len(req.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Lote excede o limite de {MAX_BATCH_ITEMS} itens.")
+
+    resultados: List[Dict[str, Any]] = []
+    if req.items:
+        # uma única matriz de features e uma única chamada ao predict_proba (só para os misses do cache)
+        probas, hits = _scores_cache([it.features for it in req.items], m)
+
+        labels = (probas >= m.threshold).astype(int)
+        metrics.registrar_decisoes(m.name, m.version, probas, labels)
+        _log_inference_batch([
+            dict(payload=it.features, score=p, decision=l, codigo_profissional=it.codigo_profissional)
+            for it, p, l, h in zip(req.items, probas, labels, hits) if _logar(h)
+        ], m)
+        resultados = [
+            {
+                "codigo_profissional": it.codigo_profissional,
+                "probabilidade_contratacao": float(p),
+                "aprovado_pelo_modelo": bool(l),
+            }
+            for it, p, l in zip(req.items, probas, labels)
+        ]
+
+    return {
+        "n": len(resultados),
+        "resultados": resultados,
+        "threshold": m.threshold,
+        "operating_mode": m.artifact.get("operating_mode"),
+        "model": m.name,
+    }
@@ -0,0 +1,241 @@
+"""
+Métricas da API no formato texto do Prometheus (GET /metrics), sem dependência nem serviço externo.
+  - contadores e histogramas com um shard por thread (threading.local): observe/inc não usam lock;
+    o /metrics soma os shards na hora da leitura;
+  - métricas "func": lidas de um callback no scrape (fila de logs, cache, modelos carregados);
+  - MetricsMiddleware (ASGI puro): conta requisições e mede a latência total por rota/método/status e
+    guarda o início da requisição num contextvar, usado pelas etapas (etapa / marcar_validacao).
+"""
+import bisect, contextvars, math, threading, time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _esc(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(nomes: Sequence[str], valores: Sequence[Any], extra: str = "") -> str:
+    pares = [f'{n}="{_esc(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _num(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v))
+
+
+class _Sharded:
+    """Base: cada thread escreve no próprio dict {labels: valores}; a leitura soma todos."""
+    tipo = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._reg_lock = threading.Lock()   # só na primeira escrita de cada thread
+
+    def _shard(self) -> dict:
+        d = getattr(self._local, "d", None)
+        if d is None:
+            d = self._local.d = {}
+            with self._reg_lock:
+                self._shards.append(d)
+        return d
+
+    def _somar(self) -> Dict[tuple, List[float]]:
+        with self._reg_lock:
+            shards = list(self._shards)
+        total: Dict[tuple, List[float]] = {}
+        for d in shards:
+            for k, v in list(d.items()):
+                v = list(v)
+                acc = total.get(k)
+                if acc is None:
+                    total[k] = v
+                else:
+                    for i, x in enumerate(v):
+                        acc[i] += x
+        return total
+
+
+class Counter(_Sharded):
+    tipo = "counter"
+
+    def inc(self, *labels, n: float = 1.0):
+        d = self._shard()
+        v = d.get(labels)
+        if v is None:
+            v = d[labels] = [0.0]
+        v[0] += n
+
+    def values(self) -> Dict[tuple, float]:
+        return {k: v[0] for k, v in self._somar().items()}
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in sorted(self.values().items())]
+
+
+class Histogram(_Sharded):
+    tipo = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, valor: float, *labels):
+        d = self._shard()
+        v = d.get(labels)
+        if v is None:
+            v = d[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        # contagens não cumulativas por faixa (a última é > maior bucket) + soma no fim
+        v[bisect.bisect_left(self.buckets, valor)] += 1
+        v[-1] += valor
+
+    def render(self) -> List[str]:
+        out = []
+        for k, v in sorted(self._somar().items()):
+            acc = 0
+            for le, c in zip(self.buckets + (math.inf,), v[:-1]):
+                acc += c
+                le_label = 'le="' + _num(le) + '"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, k, le_label)} {acc}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {_num(v[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {acc}")
+        return out
+
+
+class FuncMetric:
+    """Gauge/contador lido de um callback no scrape: fn() -> [(valores dos labels, valor)]."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], fn: Callable[[], Iterable[Tuple[tuple, float]]],
+                 tipo: str = "gauge"):
+        self.name, self.help, self.labelnames, self.fn, self.tipo = name, help, tuple(labelnames), fn, tipo
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_num(float(v))}" for k, v in self.fn()]
+
+
+class Registry:
+    def __init__(self):
+        self._metricas: List[Any] = []
+
+    def add(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def render(self) -> str:
+        linhas = []
+        for m in self._metricas:
+            try:
+                corpo = m.render()
+            except Exception:
+                # callback com falha não derruba o scrape inteiro
+                continue
+            linhas.append(f"# HELP {m.name} {m.help}")
+            linhas.append(f"# TYPE {m.name} {m.tipo}")
+            linhas.extend(corpo)
+        return "\n".join(linhas) + "\n"
+
+
+REGISTRY = Registry()
+REQUESTS = REGISTRY.add(Counter("api_requests_total", "Requisições HTTP", ("endpoint", "method", "status")))
+LATENCY = REGISTRY.add(Histogram("api_request_duration_seconds", "Latência total da requisição", ("endpoint", "method")))
+STAGES = REGISTRY.add(Histogram(
+    "api_stage_duration_seconds",
+    "Latência por etapa (validation, features, dataframe_build, predict_proba, cache, logging)",
+    ("endpoint", "stage"),
+))
+DECISIONS = REGISTRY.add(Counter("api_decisions_total", "Decisões do modelo", ("model", "version", "decision")))
+SCORES = REGISTRY.add(Histogram("api_score", "Distribuição dos scores servidos", ("model", "version"), buckets=SCORE_BUCKETS))
+
+
+def _taxa_aprovacao():
+    por_modelo: Dict[tuple, List[float]] = {}
+    for (model, version, decision), n in DECISIONS.values().items():
+        acc = por_modelo.setdefault((model, version), [0.0, 0.0])
+        acc[1] += n
+        if decision == "1":
+            acc[0] += n
+    return [(k, a / t) for k, (a, t) in sorted(por_modelo.items()) if t]
+
+
+REGISTRY.add(FuncMetric("api_decision_rate", "Fração de aprovações desde o início do processo", ("model", "version"),
+                        _taxa_aprovacao))
+
+# (início da requisição, endpoint) da requisição corrente; propagado para a threadpool dos endpoints síncronos
+_requisicao: contextvars.ContextVar[Optional[Tuple[float, str]]] = contextvars.ContextVar("metrics_req", default=None)
+
+
+def _endpoint_atual() -> str:
+    ctx = _requisicao.get()
+    return ctx[1] if ctx else "-"
+
+
+@contextmanager
+def etapa(nome: str):
+    """Mede um trecho da requisição corrente no histograma de etapas."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGES.observe(time.perf_counter() - t0, _endpoint_atual(), nome)
+
+
+def marcar_validacao():
+    """Chamada na entrada do endpoint: tempo desde a chegada (leitura do corpo + parse + validação pydantic)."""
+    ctx = _requisicao.get()
+    if ctx is not None:
+        STAGES.observe(time.perf_counter() - ctx[0], ctx[1], "validation")
+
+
+def registrar_decisoes(model: str, version: int, scores, decisoes):
+    v = str(version)
+    for s, d in zip(scores, decisoes):
+        DECISIONS.inc(model, v, "1" if d else "0")
+        SCORES.observe(float(s), model, v)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: requisições e latência por rota (template da rota, não a URL, para não explodir labels)."""
+
+    def __init__(self, app, routes: Callable[[], Iterable[Any]]):
+        self.app = app
+        self._routes = routes
+
+    def _endpoint(self, scope) -> str:
+        from starlette.routing import Match
+        for r in self._routes():
+            match, _ = r.matches(scope)
+            if match == Match.FULL:
+                return getattr(r, "path", "-")
+        return "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        endpoint = self._endpoint(scope)
+        token = _requisicao.set((t0, endpoint))
+        status = [500]
+
+        async def _send(msg):
+            if msg["type"] == "http.response.start":
+                status[0] = msg["status"]
+            await send(msg)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            REQUESTS.inc(endpoint, scope["method"], str(status[0]))
+            LATENCY.observe(time.perf_counter() - t0, endpoint, scope["method"])
+            _requisicao.reset(token)
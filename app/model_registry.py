@@ -0,0 +1,218 @@
+import os, threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+
+from src.training.fast_scorer import MANIFEST, load_artifact_dir
+
+
+def load_artifact(path: str, lazy: bool = False) -> Dict[str, Any]:
+    """Artefato .joblib ou diretório (manifest.json + .npy mmap + boosters .txt)."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Artifact not found: {path}")
+    if os.path.isdir(path):
+        art = load_artifact_dir(path)
+        if not lazy:
+            art["fast_scorer"].warm()
+        return art
+    return joblib.load(path)
+
+
+def assinatura(path: str) -> Optional[Tuple[int, int, int]]:
+    """(inode, mtime_ns, tamanho) do arquivo; no formato diretório, do manifest.json (trocado por rename no export)."""
+    alvo = os.path.join(path, MANIFEST) if os.path.isdir(path) else path
+    try:
+        st = os.stat(alvo)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """Modelo carregado (imutável): a requisição pega a referência uma vez e usa até o fim, mesmo após um reload."""
+    name: str
+    path: str
+    artifact: Dict[str, Any]
+    signature: Optional[Tuple[int, int, int]]
+    loaded_at: str
+    version: int
+
+    @property
+    def model(self):
+        return self.artifact["model"]
+
+    @property
+    def feature_columns(self) -> List[str]:
+        return self.artifact["feature_columns"]
+
+    @property
+    def threshold(self) -> float:
+        return float(self.artifact["threshold"])
+
+    def info(self) -> Dict[str, Any]:
+        meta = self.artifact.get("metadata", {})
+        return {
+            "operating_mode": self.artifact.get("operating_mode"),
+            "threshold": self.threshold,
+            "artifact_path": self.path,
+            "format": self.artifact.get("format", "joblib"),
+            "created_at": meta.get("created_at"),
+            "model_mode": meta.get("model_mode"),
+            "loaded_at": self.loaded_at,
+            "version": self.version,
+        }
+
+
+def parse_artifacts(spec: str) -> Dict[str, str]:
+    """"prec80=./artifacts/modelo_prec80,prec90=./artifacts/modelo_prec90.joblib" -> {nome: caminho}."""
+    modelos: Dict[str, str] = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        nome, sep, path = item.partition("=")
+        if not sep or not nome.strip() or not path.strip():
+            raise ValueError(f"MODEL_ARTIFACTS inválido (esperado nome=caminho): {item!r}")
+        modelos[nome.strip()] = path.strip()
+    return modelos
+
+
+class ModelRegistry:
+    """
+    Modelos nomeados residentes na API (ex.: prec80, prec90), com troca sem downtime:
+      - o artefato novo é carregado por inteiro fora do lock (thread do watcher ou do /admin/reload)
+        e só então a referência é trocada; requisições em andamento seguem com o LoadedModel antigo;
+      - o watcher compara a assinatura do arquivo (inode, mtime, tamanho) a cada poll_interval s;
+      - falha de carga mantém o modelo anterior (contada em stats e tentada de novo no próximo ciclo);
+      - on_swap(LoadedModel) é chamado após cada troca, dentro do lock de carga (a API publica o modelo
+        padrão nos globais); deve ser rápido.
+    """
+
+    def __init__(
+        self,
+        paths: Dict[str, str],
+        default: Optional[str] = None,
+        lazy: bool = False,
+        poll_interval: float = 0.0,
+        on_swap: Optional[Callable[[LoadedModel], None]] = None,
+        loader: Callable[..., Dict[str, Any]] = load_artifact,
+    ):
+        if not paths:
+            raise ValueError("Nenhum artefato configurado.")
+        self.paths = dict(paths)
+        self.default = default or next(iter(self.paths))
+        if self.default not in self.paths:
+            raise ValueError(f"Modelo padrão desconhecido: {self.default}")
+        self.lazy = bool(lazy)
+        self.poll_interval = float(poll_interval)
+        self.on_swap = on_swap
+        self._loader = loader
+        self._models: Dict[str, LoadedModel] = {}
+        self._load_lock = threading.Lock()   # serializa cargas (watcher x admin); leituras não usam lock
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {"loads": 0, "reloads": 0, "failures": 0}
+        self._errors: Dict[str, str] = {}
+
+    @classmethod
+    def from_env(cls, on_swap: Optional[Callable[[LoadedModel], None]] = None) -> "ModelRegistry":
+        paths = parse_artifacts(os.getenv("MODEL_ARTIFACTS", ""))
+        if not paths:
+            paths = {os.getenv("MODEL_NAME", "default"): os.getenv("MODEL_ARTIFACT", "./artifacts/modelo_prec80.joblib")}
+        return cls(
+            paths,
+            default=os.getenv("MODEL_DEFAULT") or None,
+            lazy=os.getenv("MODEL_LAZY_LOAD", "0").lower() in ("1", "true", "yes"),
+            poll_interval=float(os.getenv("MODEL_RELOAD_INTERVAL", "30")),
+            on_swap=on_swap,
+        )
+
+    # ---------- leitura (caminho da requisição) ----------
+    @property
+    def names(self) -> List[str]:
+        return list(self.paths)
+
+    def get(self, name: Optional[str] = None) -> LoadedModel:
+        """Modelo carregado pelo nome (None = padrão). KeyError se desconhecido ou ainda não carregado."""
+        name = name or self.default
+        m = self._models.get(name)
+        if m is None:
+            raise KeyError(name)
+        return m
+
+    def loaded(self) -> Dict[str, LoadedModel]:
+        return dict(self._models)
+
+    # ---------- carga / troca ----------
+    def load(self, name: str, force: bool = True) -> Optional[LoadedModel]:
+        """
+        Carrega `name` e troca a referência. Sem force, só recarrega se a assinatura do arquivo mudou.
+        Retorna o novo LoadedModel, ou None se nada mudou. Exceções da carga sobem (o modelo antigo fica).
+        """
+        path = self.paths[name]
+        with self._load_lock:
+            atual = self._models.get(name)
+            sig = assinatura(path)
+            if not force and atual is not None and sig == atual.signature:
+                return None
+            # carga inicial pode ser preguiçosa; recargas chegam completas antes da troca
+            art = self._loader(path, lazy=self.lazy and atual is None)
+            novo = LoadedModel(
+                name=name, path=path, artifact=art, signature=sig,
+                loaded_at=datetime.utcnow().isoformat() + "Z",
+                version=(atual.version + 1) if atual is not None else 1,
+            )
+            self._models[name] = novo
+            self._counters["reloads" if atual is not None else "loads"] += 1
+            self._errors.pop(name, None)
+            # ainda sob o lock: publicações saem na ordem das trocas (watcher x admin não invertem versões)
+            if self.on_swap is not None:
+                self.on_swap(novo)
+        return novo
+
+    def reload(self, names: Optional[List[str]] = None, force: bool = False) -> Dict[str, Any]:
+        """Recarrega os modelos (todos por padrão); falhas não derrubam os demais nem o modelo em uso."""
+        res: Dict[str, Any] = {"reloaded": [], "unchanged": [], "errors": {}}
+        for name in names or self.names:
+            if name not in self.paths:
+                res["errors"][name] = "modelo desconhecido"
+                continue
+            try:
+                novo = self.load(name, force=force)
+            except Exception as e:
+                self._counters["failures"] += 1
+                self._errors[name] = str(e)
+                res["errors"][name] = str(e)
+                print(f"❌ Falha ao carregar modelo '{name}' ({self.paths[name]}): {e}")
+                continue
+            if novo is None:
+                res["unchanged"].append(name)
+            else:
+                res["reloaded"].append(name)
+                print(f"✅ Modelo '{name}' carregado (v{novo.version}): {novo.path}")
+        return res
+
+    # ---------- watcher ----------
+    def start(self):
+        if self.poll_interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-registry-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.reload(force=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, "models": self.names, "default": self.default,
+                "watching": self._thread is not None and self._thread.is_alive(),
+                "errors": dict(self._errors)}
@@ -0,0 +1,124 @@
+import hashlib, json, math, os, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+LOG_HITS_MODES = ("full", "count")
+
+
+def feature_key(model_name: str, model_version: int, feature_columns: Sequence[str], features: Dict[str, Any]) -> bytes:
+    """
+    Hash canônico do vetor de features na ordem de feature_columns + modelo/versão.
+    Numéricos viram float64 (1, 1.0 e True dão a mesma chave; None/NaN = ausente; -0.0 = 0.0);
+    qualquer outro tipo cai para JSON ordenado.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{model_name}\x00{model_version}\x00".encode())
+    vals = [features.get(c) for c in feature_columns]
+    if all(v is None or isinstance(v, (int, float)) for v in vals):
+        arr = np.array([math.nan if v is None else v for v in vals], dtype=np.float64) + 0.0
+        arr[np.isnan(arr)] = math.nan
+        h.update(arr.tobytes())
+    else:
+        h.update(json.dumps(vals, default=str, separators=(",", ":")).encode())
+    return h.digest()
+
+
+class PredictionCache:
+    """
+    Cache LRU + TTL em memória de score por vetor de features (um por processo/worker da API):
+      - chave: feature_key (vetor ordenado + nome/versão do modelo);
+      - até max_items entradas (a menos usada sai primeiro) com validade de ttl s (0 = sem expiração);
+      - invalidado por inteiro quando um modelo é recarregado (invalidate) ou quando o objeto do modelo
+        de um nome muda (check_owner), de modo que um score antigo nunca é servido por um modelo novo.
+    """
+
+    def __init__(self, max_items: int = 10_000, ttl: float = 300.0, log_hits: str = "full"):
+        if log_hits not in LOG_HITS_MODES:
+            raise ValueError(f"log_hits deve ser um de {LOG_HITS_MODES}: {log_hits!r}")
+        self.max_items = int(max_items)
+        self.ttl = float(ttl)
+        self.log_hits = log_hits
+        self._data: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._owners: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0,
+                          "invalidations": 0, "hits_not_logged": 0}
+
+    @classmethod
+    def from_env(cls) -> "PredictionCache":
+        return cls(
+            max_items=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+            ttl=float(os.getenv("PREDICTION_CACHE_TTL", "300")),
+            log_hits=os.getenv("PREDICTION_CACHE_LOG_HITS", "full").lower(),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0
+
+    def check_owner(self, model_name: str, model_obj: Any):
+        """Invalida o cache se o objeto do modelo `model_name` não é o mesmo das entradas atuais."""
+        if not self.enabled:
+            return
+        # referência (não id): um id pode ser reaproveitado por outro objeto depois do GC
+        if self._owners.get(model_name) is not model_obj:
+            with self._lock:
+                if self._owners.get(model_name) is not model_obj:
+                    if model_name in self._owners:
+                        self._clear()
+                    self._owners[model_name] = model_obj
+
+    def get(self, key: bytes) -> Optional[float]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._counters["misses"] += 1
+                return None
+            score, expira = item
+            if self.ttl > 0 and expira < time.monotonic():
+                del self._data[key]
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._counters["hits"] += 1
+            return score
+
+    def put(self, key: bytes, score: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (float(score), time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def should_log_hit(self) -> bool:
+        """log_hits="full": hits geram linha no inference_log; "count": só incrementam hits_not_logged."""
+        if self.log_hits == "full":
+            return True
+        with self._lock:
+            self._counters["hits_not_logged"] += 1
+        return False
+
+    def _clear(self):
+        self._data.clear()
+        self._owners.clear()
+        self._counters["invalidations"] += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters, "size": len(self._data), "max_items": self.max_items, "ttl": self.ttl,
+                "log_hits": self.log_hits, "hit_rate": (self._counters["hits"] / total) if total else 0.0,
+            }
@@ -0,0 +1,39 @@
+"""
+Benchmark: construção de features de applicants, versão linha a linha x vetorizada (linhas/s).
+
+    python -m benchmarks.bench_applicants_features --rows 50000
+"""
+import argparse, time
+import pandas as pd
+
+from src.feature_engineering.applicants_features import (
+    construir_features_candidatos_from_raw,
+    construir_features_candidatos_from_raw_linha_a_linha,
+)
+from benchmarks.dados import gerar_applicants_raw
+
+def _medir(fn, df: pd.DataFrame, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn(df)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    df = gerar_applicants_raw(args.rows)
+    a = construir_features_candidatos_from_raw_linha_a_linha(df)
+    b = construir_features_candidatos_from_raw(df)
+    assert a.to_csv(index=False) == b.to_csv(index=False), "saídas diferentes!"
+
+    t_loop = _medir(construir_features_candidatos_from_raw_linha_a_linha, df, args.repeat)
+    t_vec = _medir(construir_features_candidatos_from_raw, df, args.repeat)
+    print(f"linhas={args.rows}")
+    print(f"linha a linha : {t_loop:8.3f}s | {args.rows / t_loop:12,.0f} linhas/s")
+    print(f"vetorizada    : {t_vec:8.3f}s | {args.rows / t_vec:12,.0f} linhas/s")
+    print(f"speedup       : {t_loop / t_vec:8.1f}x")
@@ -0,0 +1,101 @@
+"""
+Benchmark: cold start e memória do artefato joblib x formato diretório (manifest + .npy mmap + boosters .txt).
+Para cada formato sobe `--workers` processos ao mesmo tempo (como workers do uvicorn); cada um importa,
+carrega o artefato e faz a primeira predição. Com todos vivos, mede RSS, USS (memória privada) e PSS
+(páginas compartilhadas divididas entre os processos).
+
+    python -m benchmarks.bench_artifact_load --artifact ./artifacts/modelo_prec80.joblib --workers 4
+"""
+import argparse, json, os, subprocess, sys, tempfile, time
+import numpy as np
+
+
+def _filho(formato: str, path: str, lazy: bool):
+    t0 = time.perf_counter()
+    import joblib
+    from src.training.fast_scorer import load_artifact_dir
+    t_import = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    if formato == "dir":
+        art = load_artifact_dir(path)
+        if not lazy:
+            art["fast_scorer"].warm()
+    else:
+        art = joblib.load(path)
+    t_load = time.perf_counter() - t1
+
+    scorer = art["fast_scorer"]
+    x = np.zeros(len(scorer.feature_columns))
+    t2 = time.perf_counter()
+    scorer.score_one(x)
+    t_pred = time.perf_counter() - t2
+    print(json.dumps({"import_s": t_import, "load_s": t_load, "primeira_pred_s": t_pred,
+                      "total_s": time.perf_counter() - t0}), flush=True)
+    sys.stdin.readline()  # fica vivo até o pai medir a memória
+
+
+def _mib(v) -> float:
+    return v / 2**20
+
+
+def medir(formato: str, path: str, workers: int, lazy: bool = False) -> dict:
+    import psutil
+    cmd = [sys.executable, "-m", "benchmarks.bench_artifact_load", "--child", formato, "--artifact", path]
+    if lazy:
+        cmd.append("--lazy")
+    procs = [subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True) for _ in range(workers)]
+    tempos = [json.loads(p.stdout.readline()) for p in procs]
+    mem = [psutil.Process(p.pid).memory_full_info() for p in procs]
+    for p in procs:
+        p.stdin.write("\n")
+        p.stdin.flush()
+        p.wait()
+    res = {k: float(np.mean([t[k] for t in tempos])) for k in tempos[0]}
+    res.update(
+        rss_mib=float(np.mean([_mib(m.rss) for m in mem])),
+        uss_mib=float(np.mean([_mib(m.uss) for m in mem])),
+        pss_mib=float(np.mean([_mib(getattr(m, "pss", m.rss)) for m in mem])),
+    )
+    return res
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--artifact", default=os.getenv("MODEL_ARTIFACT", "./artifacts/modelo_prec80.joblib"))
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--lazy", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        _filho(args.child, args.artifact, args.lazy)
+        sys.exit(0)
+
+    import joblib
+    from src.training.fast_scorer import export_artifact_dir
+    from src.training.train import export_fast_scorer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        art = joblib.load(args.artifact)
+        path_joblib = args.artifact
+        if "fast_scorer" not in art:
+            # artefato anterior ao FastScorer: o filho mede uma cópia convertida (mesmo conteúdo do formato diretório)
+            export_fast_scorer(art)
+            path_joblib = os.path.join(tmp, "modelo.joblib")
+            joblib.dump(art, path_joblib)
+        pasta = export_artifact_dir(art, os.path.join(tmp, "modelo"))
+        tam_joblib = os.path.getsize(path_joblib)
+        tam_dir = sum(os.path.getsize(os.path.join(pasta, f)) for f in os.listdir(pasta))
+        res = {
+            "joblib": medir("joblib", path_joblib, args.workers),
+            "dir": medir("dir", pasta, args.workers),
+            "dir (lazy)": medir("dir", pasta, args.workers, lazy=True),
+        }
+
+    print(f"artefato joblib: {_mib(tam_joblib):.1f} MiB | diretório: {_mib(tam_dir):.1f} MiB "
+          f"| {args.workers} workers simultâneos (médias por worker)")
+    cols = ["import_s", "load_s", "primeira_pred_s", "total_s", "rss_mib", "uss_mib", "pss_mib"]
+    print(f"{'formato':12s}" + "".join(f"{c:>16s}" for c in cols))
+    for nome, r in res.items():
+        print(f"{nome:12s}" + "".join(f"{r[c]:16.3f}" for c in cols))
@@ -0,0 +1,85 @@
+"""
+Benchmark: leitura da gold para treino/avaliação, read_sql("SELECT * ...") x load_gold (COPY TO STDOUT
+só com FEATURES + target, float32/uint8). Mede tempo e pico de memória (RSS), cada método num processo novo.
+Com --rows N gera antes uma gold sintética toda TEXT (como a do build streamed) em `bench_gold`.
+
+    python -m benchmarks.bench_gold_load --rows 500000
+    python -m benchmarks.bench_gold_load --table gold_applicants
+"""
+import argparse, multiprocessing, resource, time
+import numpy as np, pandas as pd
+from sqlalchemy import text
+
+from src.copy_writer import CopyWriter
+from src.training.data import load_gold
+from src.training.train import FEATURES
+from src.utils import make_engine_from_env
+
+
+def gerar_gold(n: int, table: str, chunk_rows: int = 100_000, seed: int = 42) -> int:
+    """Gold sintética (colunas TEXT, flags "0"/"1", salário "1234.0", target e status_label)."""
+    rng = np.random.default_rng(seed)
+    with CopyWriter(table, text_columns=True) as w:
+        for start in range(0, n, chunk_rows):
+            m = min(chunk_rows, n - start)
+            df = pd.DataFrame(rng.integers(0, 2, size=(m, len(FEATURES))).astype(str), columns=FEATURES)
+            df.insert(0, "codigo_profissional", np.arange(start, start + m).astype(str))
+            df["salario_valor"] = np.round(rng.lognormal(8.5, 0.6, m)).astype(str)
+            df["status_label"] = np.where(rng.random(m) < 0.2, "Contratado pela Decision", "Não Aprovado pelo Cliente")
+            df["target"] = (df["status_label"] == "Contratado pela Decision").astype(int).astype(str)
+            w.write(df)
+    return w.rows
+
+
+def _read_sql(table: str) -> pd.DataFrame:
+    with make_engine_from_env().connect() as conn:
+        return pd.read_sql(text(f"SELECT * FROM {table}"), conn)
+
+
+def _load_gold(table: str) -> pd.DataFrame:
+    return load_gold(FEATURES, table=table)
+
+
+def _medir_filho(nome: str, table: str, saida):
+    fn = {"read_sql": _read_sql, "load_gold": _load_gold}[nome]
+    make_engine_from_env()
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    df = fn(table)
+    dt = time.perf_counter() - t0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+    saida.put((dt, pico / 1024, df.memory_usage(deep=True).sum() / 2**20, len(df)))
+
+
+def medir(nome: str, table: str):
+    """(segundos, pico RSS em MiB acima do processo ocioso, MiB do DataFrame, linhas) num processo spawn."""
+    ctx = multiprocessing.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_medir_filho, args=(nome, table, q))
+    p.start()
+    res = q.get()
+    p.join()
+    return res
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--table", default=None, help="Tabela existente (padrão: gera bench_gold)")
+    ap.add_argument("--rows", type=int, default=500_000)
+    args = ap.parse_args()
+
+    table = args.table or "bench_gold"
+    if args.table is None:
+        gerar_gold(args.rows, table)
+
+    res = {nome: medir(nome, table) for nome in ("read_sql", "load_gold")}
+
+    if args.table is None:
+        with make_engine_from_env().begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+    print(f"tabela={table}")
+    for nome, (dt, pico, mem_df, n) in res.items():
+        print(f"{nome:10s}: {dt:8.3f}s | pico RSS {pico:9.1f} MiB | DataFrame {mem_df:8.1f} MiB | {n} linhas")
+    print(f"speedup   : {res['read_sql'][0] / res['load_gold'][0]:8.1f}x | "
+          f"memória (pico): {res['read_sql'][1] / max(res['load_gold'][1], 1e-9):.1f}x menor")
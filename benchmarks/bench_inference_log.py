@@ -0,0 +1,121 @@
+"""
+Benchmark: inference_log com payload JSON x inference_log_typed (coluna por feature, partição diária + BRIN).
+Mede, num schema próprio (bench_inference_log, apagado no fim):
+  - vazão de INSERT em micro-lotes como o writer da API (execute_values, batch de --batch linhas);
+  - tempo da consulta de monitoramento (sketches da janela de 24h: parse dos payloads x GROUP BY tipado);
+  - tamanho em disco das duas tabelas.
+
+    python -m benchmarks.bench_inference_log --rows 200000
+"""
+import argparse, json, time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import text
+
+from app.inference_logger import INSERT_SQL
+from src import inference_log_typed as typed_log
+from src.feature_sketches import sketch_rows_from_log
+from src.training.train import FEATURES
+from src.utils import make_engine_from_env
+
+SCHEMA = "bench_inference_log"
+JSON_DDL = """
+CREATE TABLE inference_log (
+  id BIGSERIAL PRIMARY KEY, ts TIMESTAMPTZ NOT NULL DEFAULT now(), model_mode TEXT, model_threshold DOUBLE PRECISION,
+  model_created_at TEXT, model_path TEXT, score DOUBLE PRECISION, decision INT, codigo_profissional BIGINT,
+  payload JSONB)"""
+
+
+def gerar_registros(n: int, seed: int = 42):
+    """Linhas no formato do writer (mode, threshold, created_at, path, score, decision, codigo, payload)."""
+    rng = np.random.default_rng(seed)
+    flags = rng.integers(0, 2, size=(n, len(FEATURES)))
+    sal = np.round(rng.lognormal(8.5, 0.6, n), 2)
+    scores = rng.random(n)
+    for i in range(n):
+        p = dict(zip(FEATURES, flags[i].tolist()))
+        p["salario_valor"] = float(sal[i])
+        yield ("prec80", 0.42, "2025-01-01", "./artifacts/modelo_prec80", float(scores[i]),
+               int(scores[i] > 0.42), i, p)
+
+
+def _inserir(raw, registros, batch: int, typed: bool) -> float:
+    from psycopg2.extras import execute_values
+    t0 = time.perf_counter()
+    with raw.cursor() as cur:
+        for ini in range(0, len(registros), batch):
+            lote = registros[ini:ini + batch]
+            if typed:
+                typed_log.insert(cur, lote, FEATURES)
+            else:
+                execute_values(cur, INSERT_SQL, [r[:-1] + (json.dumps(r[-1]),) for r in lote], page_size=len(lote))
+            raw.commit()
+    return time.perf_counter() - t0
+
+
+def _consulta_json(c, ini):
+    import pandas as pd
+    raw = pd.read_sql(text("SELECT ts, payload, score, decision FROM inference_log WHERE ts >= :ini"), c,
+                      params={"ini": ini})
+    return sketch_rows_from_log(raw, "ts")
+
+
+def _cronometrar(fn, repeticoes: int = 3) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - t0)
+    return min(tempos)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--batch", type=int, default=500, help="Linhas por INSERT (INFERENCE_LOG_BATCH_SIZE)")
+    args = ap.parse_args()
+
+    registros = list(gerar_registros(args.rows))
+    eng = make_engine_from_env()
+    with eng.begin() as c:
+        c.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}"))
+    try:
+        raw = eng.raw_connection()
+        try:
+            with raw.cursor() as cur:
+                cur.execute(f"SET search_path TO {SCHEMA}")
+                cur.execute(JSON_DDL)
+                typed_log.ensure_schema(cur, FEATURES)
+                hoje = datetime.now(timezone.utc).date()
+                typed_log.ensure_partitions(cur, [hoje, hoje + timedelta(days=1)])
+            raw.commit()
+            t_json = _inserir(raw, registros, args.batch, typed=False)
+            t_typed = _inserir(raw, registros, args.batch, typed=True)
+            with raw.cursor() as cur:
+                cur.execute("ANALYZE")
+                cur.execute("SELECT pg_total_relation_size('inference_log'), "
+                            "(SELECT sum(pg_total_relation_size(inhrelid)) FROM pg_inherits "
+                            " WHERE inhparent = 'inference_log_typed'::regclass)")
+                mb_json, mb_typed = (float(v) / 2**20 for v in cur.fetchone())
+            raw.commit()
+        finally:
+            raw.close()
+
+        ini = datetime.now(timezone.utc) - timedelta(hours=24)
+        with eng.connect() as c:
+            c.execute(text(f"SET search_path TO {SCHEMA}"))
+            q_json = _cronometrar(lambda: _consulta_json(c, ini))
+            q_typed = _cronometrar(lambda: typed_log.sketch_rows_sql(c, ini))
+            c.execute(text("RESET search_path"))
+            c.commit()
+    finally:
+        with eng.begin() as c:
+            c.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+    n = args.rows
+    print(f"linhas={n} | batch={args.batch} | features={len(FEATURES)}")
+    print(f"INSERT json : {t_json:7.2f}s | {n / t_json:9.0f} linhas/s | {mb_json:7.1f} MiB")
+    print(f"INSERT typed: {t_typed:7.2f}s | {n / t_typed:9.0f} linhas/s | {mb_typed:7.1f} MiB")
+    print(f"sketches 24h json : {q_json:7.3f}s (SELECT payload + parse)")
+    print(f"sketches 24h typed: {q_typed:7.3f}s (GROUP BY nas colunas) | speedup {q_json / q_typed:.1f}x")
@@ -0,0 +1,90 @@
+"""
+Benchmark: modelo final "ensemble" (CalibratedClassifierCV cv=3, 3 boosters) x "single" (1 booster +
+isotônica ajustada em hold-out do treino). Treina os dois no mesmo split e compara:
+  - tamanho do artefato joblib e tempo de carga (joblib.load, como no startup da API);
+  - latência por linha (FastScorer, caminho da API, e predict_proba do sklearn com DataFrame de 1 linha);
+  - PR-AUC / ROC AUC no holdout e o threshold escolhido.
+
+    python -m benchmarks.bench_model_modes
+    GOLD_SNAPSHOT=./artifacts/gold.parquet python -m benchmarks.bench_model_modes --n-estimators 500
+"""
+import argparse, json, os, tempfile, time
+import joblib, numpy as np, pandas as pd
+from sklearn.metrics import average_precision_score, roc_auc_score
+
+from src.training.train import FEATURES, train_and_save
+
+
+def _medir_carga(path: str, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        joblib.load(path)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def _latencias_ms(fn, linhas) -> np.ndarray:
+    ts = []
+    for x in linhas:
+        t0 = time.perf_counter()
+        fn(x)
+        ts.append((time.perf_counter() - t0) * 1000)
+    return np.array(ts)
+
+
+def comparar(n_estimators=None, linhas=500, repeticoes=3, saida=None) -> dict:
+    params = {"n_estimators": n_estimators} if n_estimators else None
+    res = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("ensemble", "single"):
+            path = os.path.join(tmp, f"modelo_{mode}.joblib")
+            t0 = time.perf_counter()
+            art = train_and_save(artifact_path=path, lgbm_params=params, mode=mode)
+            t_treino = time.perf_counter() - t0
+
+            hold = art["holdout"]
+            y, p = hold["y_true"], hold["scores"]
+            scorer, model = art["fast_scorer"], art["model"]
+            # vetores sintéticos no domínio das features (flags 0/1 + salário) só para medir latência
+            rng = np.random.default_rng(0)
+            X = rng.integers(0, 2, size=(linhas, len(FEATURES))).astype(float)
+            X[:, FEATURES.index("salario_valor")] = np.round(rng.lognormal(8.5, 0.6, linhas))
+            lat_fast = _latencias_ms(scorer.score_one, X)
+            dfs = [pd.DataFrame([x], columns=FEATURES) for x in X[: max(1, linhas // 5)]]
+            lat_sk = _latencias_ms(model.predict_proba, dfs)
+
+            res[mode] = {
+                "boosters": scorer.n_folds,
+                "arvores": int(sum(b.num_trees() for b in scorer.boosters)),
+                "artefato_mb": os.path.getsize(path) / 2**20,
+                "carga_s": _medir_carga(path, repeticoes),
+                "fast_p50_ms": float(np.percentile(lat_fast, 50)),
+                "fast_p95_ms": float(np.percentile(lat_fast, 95)),
+                "sklearn_p50_ms": float(np.percentile(lat_sk, 50)),
+                "pr_auc": float(average_precision_score(y, p)),
+                "roc_auc": float(roc_auc_score(y, p)),
+                "threshold": float(art["threshold"]),
+                "treino_s": t_treino,
+            }
+
+    print(f"\n{'':16s} {'ensemble':>12s} {'single':>12s} {'single/ens':>11s}")
+    for k in res["ensemble"]:
+        a, b = res["ensemble"][k], res["single"][k]
+        razao = f"{b / a:10.2f}x" if a else f"{'-':>11s}"
+        print(f"{k:16s} {a:12.4f} {b:12.4f} {razao}")
+    if saida:
+        with open(saida, "w", encoding="utf-8") as fh:
+            json.dump(res, fh, indent=2)
+        print(f"✅ Comparação salva em: {saida}")
+    return res
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n-estimators", type=int, default=None, help="Padrão: LGBM_DEFAULTS (3000)")
+    ap.add_argument("--rows", type=int, default=500, help="Linhas para medir a latência por linha")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default=None, help="JSON com os números (opcional)")
+    args = ap.parse_args()
+    comparar(n_estimators=args.n_estimators, linhas=args.rows, repeticoes=args.repeat, saida=args.out)
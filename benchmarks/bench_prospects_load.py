@@ -0,0 +1,92 @@
+"""
+Benchmark: carga de prospects_raw, to_sql(method="multi") x COPY (CopyWriter), em linhas/s.
+Com --copy-workers N também mede o COPY em staging UNLOGGED com N conexões.
+Usa o Postgres do .env e grava em tabelas temporárias de benchmark (removidas no fim).
+
+    python -m benchmarks.bench_prospects_load --rows 200000 --copy-workers 4
+"""
+import argparse, math, time
+import numpy as np, pandas as pd
+from sqlalchemy import text
+
+from src.copy_writer import CopyWriter
+from src.utils import make_engine_from_env
+
+_SITUACOES = [
+    "Contratado pela Decision", "Encaminhado ao Requisitante", "Prospect", "Não Aprovado pelo Cliente",
+    "Desistiu", "Inscrito", "Entrevista Técnica", "Contratado como Hunting",
+]
+_RECRUTADORES = ["Ana Souza", "Carlos Lima", "Juliana Alves", "Marcos Pereira"]
+
+
+def gerar_prospects_raw(n: int, seed: int = 42) -> pd.DataFrame:
+    """DataFrame sintético no formato de prospects_raw (um prospect por linha, todos os campos texto)."""
+    rng = np.random.default_rng(seed)
+    pick = lambda opts: [opts[i] for i in rng.integers(0, len(opts), n)]
+    dias = rng.integers(0, 1500, n)
+    datas = (pd.Timestamp("2021-01-01") + pd.to_timedelta(dias, unit="D")).strftime("%d-%m-%Y")
+    return pd.DataFrame({
+        "nome": [f"Candidato {i}" for i in range(n)],
+        "codigo": rng.integers(1, 60_000, n).astype(str),
+        "situacao_candidado": pick(_SITUACOES),
+        "data_candidatura": datas,
+        "ultima_atualizacao": datas,
+        "comentario": pick(["", "Perfil aderente, seguir com entrevista.", "Sem retorno do candidato.", "Encaminhado, aguardando feedback, \"urgente\"."]),
+        "recrutador": pick(_RECRUTADORES),
+    })
+
+
+def carga_to_sql(df: pd.DataFrame, table: str) -> int:
+    eng = make_engine_from_env()
+    with eng.begin() as conn:
+        df.to_sql(table, conn, if_exists="replace", index=False, method="multi")
+    return len(df)
+
+
+def carga_copy(df: pd.DataFrame, table: str, chunk_rows: int, workers: int = 1, staging: bool = False) -> int:
+    with CopyWriter(table, if_exists="replace", workers=workers, staging=staging) as w:
+        for start in range(0, len(df), chunk_rows):
+            w.write(df.iloc[start:start + chunk_rows])
+    return w.rows
+
+
+def _contar(table: str) -> int:
+    with make_engine_from_env().connect() as conn:
+        return int(conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar())
+
+
+def _medir(fn, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--chunk-rows", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--copy-workers", type=int, default=0, help="0 = não mede o modo staging")
+    args = ap.parse_args()
+
+    df = gerar_prospects_raw(args.rows)
+    t_multi = _medir(lambda: carga_to_sql(df, "bench_prospects_multi"), args.repeat)
+    t_copy = _medir(lambda: carga_copy(df, "bench_prospects_copy", args.chunk_rows), args.repeat)
+    assert _contar("bench_prospects_multi") == _contar("bench_prospects_copy") == args.rows, "contagens diferentes!"
+    t_stg = None
+    if args.copy_workers:
+        t_stg = _medir(lambda: carga_copy(df, "bench_prospects_stg", args.chunk_rows, args.copy_workers, True), args.repeat)
+        assert _contar("bench_prospects_stg") == args.rows, "contagens diferentes!"
+
+    with make_engine_from_env().begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS bench_prospects_multi, bench_prospects_copy, bench_prospects_stg"))
+
+    print(f"linhas={args.rows} (chunks COPY de {args.chunk_rows}, {math.ceil(args.rows / args.chunk_rows)} chunks)")
+    print(f"to_sql multi : {t_multi:8.3f}s | {args.rows / t_multi:12,.0f} linhas/s")
+    print(f"COPY         : {t_copy:8.3f}s | {args.rows / t_copy:12,.0f} linhas/s")
+    print(f"speedup      : {t_multi / t_copy:8.1f}x")
+    if t_stg is not None:
+        print(f"COPY staging : {t_stg:8.3f}s | {args.rows / t_stg:12,.0f} linhas/s ({args.copy_workers} conexões)")
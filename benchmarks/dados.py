@@ -0,0 +1,41 @@
+"""Dados sintéticos no formato de applicants_raw, usados pelos benchmarks e pelos testes."""
+import numpy as np, pandas as pd
+
+_EMAILS = ["fulano@gmail.com", "ciclana@empresa.com.br", "x@hotmail.com", "", None]
+_INGLES = ["Nenhum", "Básico", "Intermediário", "Avançado", "Fluente", "", None]
+_ESCOLARIDADE = ["Ensino Superior Completo", "Ensino Superior Incompleto", "Pós-Graduação", "Ensino Médio", "Tecnólogo", ""]
+_AREAS = ["Administrativa", "Financeira", "TI - Desenvolvimento", "Tecnologia da Informação", "", None]
+_TITULOS = ["Analista Administrativo", "Analista Financeiro", "Analista de BI", "Desenvolvedor", "", None]
+_CERTS = ["MOS 77-418, 77-420", "SAP FI", "", None, "PMP"]
+_SALARIOS = ["R$ 3.500,00", "5000", "4.200", "", "a combinar", None]
+_CV = [
+    "Experiência com excel avançado, KPI e controladoria. Conhecimentos em SAP e Protheus.",
+    "Rotinas administrativas e financeiras, contas a pagar, conciliação contábil.",
+    "Desenvolvimento de software em Python e Java.",
+    "",
+]
+
+def gerar_applicants_raw(n: int, seed: int = 42) -> pd.DataFrame:
+    """DataFrame sintético no formato de applicants_raw (colunas achatadas pelo json_normalize)."""
+    rng = np.random.default_rng(seed)
+    pick = lambda opts: [opts[i] for i in rng.integers(0, len(opts), n)]
+    cv = [c * int(k) for c, k in zip(pick(_CV), rng.integers(1, 40, n))]
+    return pd.DataFrame({
+        "infos_basicas.codigo_profissional": [str(i) for i in range(1, n + 1)],
+        "infos_basicas.email": pick(_EMAILS),
+        "infos_basicas.telefone": pick(["(11) 99999-0000", "", None]),
+        "infos_basicas.local": pick(["São Paulo", "", None]),
+        "infos_basicas.objetivo_profissional": pick(_TITULOS),
+        "informacoes_pessoais.url_linkedin": pick(["https://linkedin.com/in/x", ""]),
+        "informacoes_profissionais.titulo_profissional": pick(_TITULOS),
+        "informacoes_profissionais.area_atuacao": pick(_AREAS),
+        "informacoes_profissionais.remuneracao": pick(_SALARIOS),
+        "informacoes_profissionais.certificacoes": pick(_CERTS),
+        "informacoes_profissionais.outras_certificacoes": pick(_CERTS),
+        "informacoes_profissionais.conhecimentos_tecnicos": pick(_CV),
+        "formacao_e_idiomas.nivel_academico": pick(_ESCOLARIDADE),
+        "formacao_e_idiomas.nivel_ingles": pick(_INGLES),
+        "formacao_e_idiomas.nivel_espanhol": pick(_INGLES),
+        "formacao_e_idiomas.outro_idioma": pick(["-", "Francês", ""]),
+        "cv_pt": cv,
+    })
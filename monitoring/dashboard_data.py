@@ -0,0 +1,136 @@
+"""
+Carga de dados do dashboard (streamlit_app), fora do Streamlit para poder ser testada:
+  - SketchCache: sketches horárias em memória; cada refresh busca só as horas novas (a partir da última hora
+    lida, que ainda recebe upserts) e, se a janela pedida cresceu, só as horas mais antigas que faltam;
+    trocar a janela no slider recorta o que já está em memória;
+  - BaselineCache: consulta só (id, created_at) do baseline mais recente e relê o JSON de stats quando muda;
+  - load_dashboard: as duas consultas em paralelo, cada uma com a sua conexão do pool.
+As instâncias são compartilhadas entre sessões (st.cache_resource): todos os métodos usam lock.
+"""
+import json, threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+
+from src.feature_sketches import (
+    COLUMNS, fill_gaps, hora_utc, load_sketches, snapshot_engine, table_exists, window_sketches,
+)
+
+
+class SketchCache:
+    def __init__(self, max_hours: int = 168, loader: Callable[..., pd.DataFrame] = load_sketches):
+        self.max_hours = int(max_hours)
+        self._loader = loader
+        self._df = _concat()
+        self._desde: Optional[datetime] = None      # hora mais antiga já lida
+        self._ultima: Optional[datetime] = None     # hora mais recente já lida
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def refresh(self, conn, hours: int, agora: Optional[datetime] = None) -> pd.DataFrame:
+        """Linhas das últimas `hours` horas, buscando no banco só as horas que faltam."""
+        hours = min(int(hours), self.max_hours)
+        agora = hora_utc(agora)
+        since = agora - timedelta(hours=hours)
+        with self._lock:
+            if self._desde is None:
+                df = self._buscar(conn, since)
+                self._desde = since
+            else:
+                antigas = self._buscar(conn, since, self._desde) if since < self._desde else None
+                # a última hora lida ainda pode receber inferências (upsert aditivo): descarta e relê
+                mantidas = self._df[self._df["hora"] < self._ultima]
+                df = _concat(antigas, mantidas, self._buscar(conn, self._ultima))
+                self._desde = min(self._desde, since)
+            corte = agora - timedelta(hours=self.max_hours)
+            self._df = df[df["hora"] >= corte].sort_values(["hora", "feature"]).reset_index(drop=True)
+            self._desde = max(self._desde, corte)
+            self._ultima = self._df["hora"].max() if not self._df.empty else self._desde
+            return self._df[self._df["hora"] >= since]
+
+    def _buscar(self, conn, ini: datetime, fim: Optional[datetime] = None) -> pd.DataFrame:
+        self.fetches += 1
+        df = self._loader(conn, ini, fim)
+        return df.assign(hora=pd.to_datetime(df["hora"], utc=True))
+
+    def clear(self):
+        with self._lock:
+            self._df = self._df.iloc[0:0]
+            self._desde = self._ultima = None
+
+
+def _concat(*partes: Optional[pd.DataFrame]) -> pd.DataFrame:
+    partes = [p for p in partes if p is not None and not p.empty]
+    if not partes:
+        tipos = {c: "datetime64[ns, UTC]" if c == "hora" else object for c in COLUMNS}
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in tipos.items()})
+    return pd.concat(partes, ignore_index=True)
+
+
+class BaselineCache:
+    def __init__(self):
+        self._id: Any = None
+        self._valor: Tuple[Optional[Dict[str, Any]], Any] = (None, None)
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def refresh(self, conn) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """(stats, created_at) do baseline mais recente; o JSON só é relido quando o id muda."""
+        row = conn.execute(text(
+            "SELECT id, created_at FROM model_baseline ORDER BY created_at DESC LIMIT 1"
+        )).first()
+        with self._lock:
+            if row is None:
+                self._id, self._valor = None, (None, None)
+            elif row[0] != self._id:
+                self.fetches += 1
+                raw = conn.execute(text("SELECT stats FROM model_baseline WHERE id = :id"),
+                                   {"id": row[0]}).scalar()
+                self._id, self._valor = row[0], (raw if isinstance(raw, dict) else json.loads(raw), row[1])
+            return self._valor
+
+
+class DashboardData(NamedTuple):
+    sketches: pd.DataFrame
+    origem: str            # "sketches", "sketches+<log>" (horas completadas pelo log) ou o log do fallback
+    baseline: Optional[Dict[str, Any]]
+    baseline_dt: Any
+
+
+def _sketches(engine, cache: SketchCache, hours: int) -> Tuple[pd.DataFrame, str]:
+    # hora corrente relida e contagens do log no mesmo snapshot (ver snapshot_engine)
+    with snapshot_engine(engine).connect() as c:
+        if table_exists(c):
+            df = cache.refresh(c, hours)
+            if not df.empty:
+                # horas sem sketch completa (ligadas no meio da janela, lote perdido) saem do log
+                return fill_gaps(c, df, hora_utc() - timedelta(hours=min(int(hours), cache.max_hours)))
+        # sem sketches: fallback do feature_sketches (recalcula do log; só até o writer/backfill popularem)
+        return window_sketches(c, hours)
+
+
+def _baseline(engine, cache: BaselineCache):
+    with engine.connect() as c:
+        if c.execute(text("SELECT to_regclass('model_baseline')")).scalar() is None:
+            return None, None
+        return cache.refresh(c)
+
+
+def load_dashboard(engine, sketches: SketchCache, baseline: BaselineCache, hours: int) -> DashboardData:
+    """Sketches da maior janela pedida e baseline, em paralelo (conexões distintas do pool)."""
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="dashboard") as ex:
+        f_sk = ex.submit(_sketches, engine, sketches, hours)
+        f_base = ex.submit(_baseline, engine, baseline)
+        (df, origem), (stats, dt) = f_sk.result(), f_base.result()
+    return DashboardData(df, origem, stats, dt)
+
+
+def recortar(df: pd.DataFrame, hours: int, agora: Optional[datetime] = None) -> pd.DataFrame:
+    """Linhas das últimas `hours` horas de um DataFrame de sketches já carregado (sem ir ao banco)."""
+    if df.empty:
+        return df
+    since = hora_utc(agora) - timedelta(hours=int(hours))
+    return df[pd.to_datetime(df["hora"], utc=True) >= since]
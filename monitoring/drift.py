@@ -0,0 +1,275 @@
+"""
+Motor de drift compartilhado (monitor_daily, dashboard e record_baseline):
+  - cada feature vira uma distribuição em faixas fixas: binárias em [≠1, =1], numéricas nas faixas log de
+    feature_sketches.HIST_EDGES; a última faixa é sempre "ausente" (None/NaN);
+  - contagens de todas as features numa passada vetorizada sobre a matriz (linhas x features): somas por
+    coluna nas binárias e um bincount do índice da faixa nas numéricas (counts_from_matrix);
+  - a janela também sai das sketches horárias (window_from_sketches), nas mesmas faixas, sem reler payloads;
+  - PSI, KS e qui-quadrado (homogeneidade baseline x janela) de todas as features de uma vez, sobre as matrizes
+    (features x faixas), junto com as regras antigas (Δ da taxa de 1s e z da média) — compute_drift;
+  - janela e limiares configuráveis por ambiente (DriftConfig.from_env).
+"""
+import math, os
+from dataclasses import dataclass
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.feature_sketches import HIST_EDGES, N_BINS, NUMERIC_FEATURES, ROWS
+
+K = N_BINS + 1                 # faixas das numéricas + "ausente"
+MISSING_BIN = K - 1
+# identifica o corte das faixas gravado no baseline (baseline com outro corte cai nas regras antigas)
+BINS_ID = f"v1:bin2|log{len(HIST_EDGES)}:{HIST_EDGES[0]:g}-{HIST_EDGES[-1]:g}"
+_EPS = 1e-4
+
+
+@dataclass(frozen=True)
+class DriftConfig:
+    """
+    Limiares dos alertas. χ² sozinho acusa qualquer diferença com janelas grandes: só alerta com
+    p < chi2_alpha e PSI >= chi2_min_psi. Features com menos de min_count valores na janela não alertam.
+    """
+    window_hours: int = 24
+    psi_max: float = 0.2
+    ks_max: float = 0.1
+    chi2_alpha: float = 0.001
+    chi2_min_psi: float = 0.1
+    bin_delta: float = 0.15
+    z_max: float = 3.0
+    min_count: int = 30
+
+    @classmethod
+    def from_env(cls) -> "DriftConfig":
+        return cls(
+            window_hours=int(os.getenv("DRIFT_WINDOW_HOURS", "24")),
+            psi_max=float(os.getenv("DRIFT_PSI_MAX", "0.2")),
+            ks_max=float(os.getenv("DRIFT_KS_MAX", "0.1")),
+            chi2_alpha=float(os.getenv("DRIFT_CHI2_ALPHA", "0.001")),
+            chi2_min_psi=float(os.getenv("DRIFT_CHI2_MIN_PSI", "0.1")),
+            bin_delta=float(os.getenv("DRIFT_BIN_DELTA", "0.15")),
+            z_max=float(os.getenv("DRIFT_Z_MAX", "3.0")),
+            min_count=int(os.getenv("DRIFT_MIN_COUNT", "30")),
+        )
+
+
+def _numericas(features: Sequence[str], numeric: Sequence[str]) -> np.ndarray:
+    return np.array([f in numeric for f in features], dtype=bool)
+
+
+# ---------- contagens ----------
+class Window(NamedTuple):
+    """Janela de serving: contagens (features x K), features presentes e médias exatas (NaN nas binárias)."""
+    counts: np.ndarray
+    present: np.ndarray
+    means: np.ndarray
+
+
+def counts_from_matrix(X, features: Sequence[str], numeric: Sequence[str] = NUMERIC_FEATURES,
+                       chunk_rows: int = 250_000) -> np.ndarray:
+    """
+    Contagens (features x K) de uma matriz linhas x features (NaN = ausente), em blocos de linhas:
+    binárias por somas de coluna (=1, ausentes, resto), numéricas num bincount do índice da faixa
+    deslocado pela coluna.
+    """
+    X = np.asarray(X)
+    n_feat = len(features)
+    num = _numericas(features, numeric)
+    pos_num = np.flatnonzero(num)
+    desloc = np.arange(len(pos_num), dtype=np.int64) * K
+    C = np.zeros((n_feat, K), dtype=np.int64)
+    hist = np.zeros(len(pos_num) * K, dtype=np.int64)
+    for ini in range(0, X.shape[0], chunk_rows):
+        x = np.asarray(X[ini:ini + chunk_rows], dtype=np.float64)
+        nulos = np.isnan(x).sum(axis=0)
+        uns = (x == 1).sum(axis=0)
+        C[:, 1] += uns
+        C[:, 0] += x.shape[0] - uns - nulos
+        C[:, MISSING_BIN] += nulos
+        if len(pos_num):
+            xn = x[:, pos_num]
+            idx = np.searchsorted(HIST_EDGES, xn, side="right")
+            idx[np.isnan(xn)] = MISSING_BIN
+            hist += np.bincount((idx + desloc).ravel(), minlength=len(pos_num) * K)
+    if len(pos_num):
+        C[pos_num] = hist.reshape(len(pos_num), K)
+    return C
+
+
+def window_from_matrix(X, features: Sequence[str], numeric: Sequence[str] = NUMERIC_FEATURES) -> Window:
+    """Janela a partir da matriz linhas x features (coluna toda NaN = feature ausente do serving)."""
+    X = np.asarray(X, dtype=np.float64)
+    C = counts_from_matrix(X, features, numeric)
+    num = _numericas(features, numeric)
+    means = np.full(len(features), math.nan)
+    if num.any():
+        xn = X[:, num]
+        n = np.isfinite(xn).sum(axis=0)
+        means[num] = np.where(n > 0, np.nansum(xn, axis=0) / np.maximum(n, 1), math.nan)
+    return Window(C, C[:, :MISSING_BIN].sum(axis=1) > 0, means)
+
+
+def window_from_sketches(agg: Dict[str, Dict[str, Any]], features: Sequence[str],
+                         numeric: Sequence[str] = NUMERIC_FEATURES) -> Window:
+    """
+    Janela a partir das sketches somadas (merge_sketches). Chaves ausentes do payload contam na faixa
+    "ausente" (o total é o de inferências da janela); média exata de soma/n.
+    """
+    total = agg.get(ROWS, {}).get("n", 0)
+    C = np.zeros((len(features), K), dtype=np.int64)
+    presente = np.zeros(len(features), dtype=bool)
+    means = np.full(len(features), math.nan)
+    for i, f in enumerate(features):
+        s = agg.get(f)
+        if s is None:
+            continue
+        presente[i] = True
+        if f in numeric:
+            if s.get("hist") is not None:
+                C[i, :N_BINS] = np.asarray(s["hist"], dtype=np.int64)
+            means[i] = s["mean"]
+        else:
+            C[i, 0], C[i, 1] = s["n"] - s["n_ones"], s["n_ones"]
+        C[i, MISSING_BIN] = max(total - C[i, :MISSING_BIN].sum(), 0)
+    return Window(C, presente, means)
+
+
+# ---------- baseline ----------
+def baseline_stats(X, features: Sequence[str],
+                   numeric: Sequence[str] = NUMERIC_FEATURES) -> Dict[str, Dict[str, Any]]:
+    """Estatísticas do baseline (formato do model_baseline.stats): regras antigas + contagens por faixa."""
+    X = np.asarray(X, dtype=np.float64)
+    C = counts_from_matrix(X, features, numeric)
+    num = _numericas(features, numeric)
+    rate1 = (X == 1).mean(axis=0) if X.shape[0] else np.full(len(features), math.nan)
+    stats: Dict[str, Dict[str, Any]] = {}
+    for i, f in enumerate(features):
+        if num[i]:
+            col = X[:, i]
+            std = float(np.nanstd(col)) if np.isfinite(col).any() else 0.0
+            stats[f] = {"type": "numeric", "mean": float(np.nanmean(col)), "std": std or 1.0}
+        else:
+            stats[f] = {"type": "binary", "rate1": float(rate1[i])}
+        stats[f].update(counts=C[i].tolist(), bins=BINS_ID)
+    return stats
+
+
+def baseline_counts(stats: Dict[str, Dict[str, Any]], features: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Contagens do baseline (features x K) + máscara de quem tem contagens no corte atual (BINS_ID)."""
+    B = np.zeros((len(features), K), dtype=np.float64)
+    ok = np.zeros(len(features), dtype=bool)
+    for i, f in enumerate(features):
+        meta = stats.get(f, {})
+        if meta.get("bins") == BINS_ID and len(meta.get("counts", ())) == K:
+            B[i] = meta["counts"]
+            ok[i] = True
+    return B, ok
+
+
+# ---------- estatísticas ----------
+def psi(B: np.ndarray, W: np.ndarray) -> np.ndarray:
+    """PSI por linha (proporções com suavização _EPS para faixas vazias)."""
+    p = B / np.maximum(B.sum(axis=1, keepdims=True), 1)
+    q = W / np.maximum(W.sum(axis=1, keepdims=True), 1)
+    p, q = p + _EPS, q + _EPS
+    return ((q - p) * np.log(q / p)).sum(axis=1)
+
+
+def ks(B: np.ndarray, W: np.ndarray) -> np.ndarray:
+    """KS por linha entre as distribuições dos valores presentes (faixas ordenadas, sem a de ausentes)."""
+    b, w = B[:, :MISSING_BIN], W[:, :MISSING_BIN]
+    cb = np.cumsum(b, axis=1) / np.maximum(b.sum(axis=1, keepdims=True), 1)
+    cw = np.cumsum(w, axis=1) / np.maximum(w.sum(axis=1, keepdims=True), 1)
+    return np.abs(cb - cw).max(axis=1)
+
+
+def chi2(B: np.ndarray, W: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Qui-quadrado de homogeneidade (2 x faixas não vazias) por linha: (estatística, p-valor)."""
+    O = np.stack([B, W])                                   # 2 x features x K
+    col = O.sum(axis=0)
+    lin = O.sum(axis=2, keepdims=True)
+    E = lin * col / np.maximum(col.sum(axis=1), 1)[None, :, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stat = np.where(E > 0, (O - E) ** 2 / E, 0.0).sum(axis=(0, 2))
+    dof = (col > 0).sum(axis=1) - 1
+    stat = np.where((dof > 0) & (lin.min(axis=0)[:, 0] > 0), stat, math.nan)
+    try:
+        from scipy.special import chdtrc
+        p = chdtrc(np.maximum(dof, 1), stat)
+    except ImportError:
+        p = np.full(stat.shape, math.nan)
+    return stat, p
+
+
+def compute_drift(window: Window, features: Sequence[str], stats: Dict[str, Dict[str, Any]],
+                  config: Optional[DriftConfig] = None) -> pd.DataFrame:
+    """
+    Relatório por feature do baseline: n, PSI, KS, χ² (p), taxa/média base x janela e os alertas disparados.
+    `features` é a ordem das linhas de `window`; features fora do baseline são ignoradas.
+    """
+    cfg = config or DriftConfig()
+    feats = [f for f in features if f in stats]
+    pos = [list(features).index(f) for f in feats]
+    W = np.asarray(window.counts, dtype=np.float64)[pos]
+    pres = np.asarray(window.present, dtype=bool)[pos]
+    B, tem_contagem = baseline_counts(stats, feats)
+
+    n_now = W[:, :MISSING_BIN].sum(axis=1)
+    total_now = W.sum(axis=1)
+    v_psi, v_ks = psi(B, W), ks(B, W)
+    v_chi2, v_p = chi2(B, W)
+    v_psi[~tem_contagem] = v_ks[~tem_contagem] = v_chi2[~tem_contagem] = v_p[~tem_contagem] = math.nan
+
+    # regras antigas, também vetorizadas: taxa de 1s sobre todas as inferências; média das numéricas
+    binaria = np.array([stats[f]["type"] == "binary" for f in feats], dtype=bool)
+    base = np.array([stats[f]["rate1"] if binaria[i] else stats[f]["mean"] for i, f in enumerate(feats)], dtype=float)
+    std = np.array([1.0 if binaria[i] else float(stats[f].get("std") or 1.0) for i, f in enumerate(feats)])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taxa = W[:, 1] / total_now
+    now = np.where(binaria, taxa, np.asarray(window.means, dtype=np.float64)[pos])
+    desvio = np.where(binaria, np.abs(now - base), np.abs(now - base) / np.where(std > 0, std, 1.0))
+
+    linhas = []
+    for i, f in enumerate(feats):
+        motivos = []
+        if not pres[i]:
+            motivos.append("missing")
+        elif n_now[i] >= cfg.min_count:
+            if v_psi[i] > cfg.psi_max:
+                motivos.append(f"psi={v_psi[i]:.3f}")
+            if v_ks[i] > cfg.ks_max:
+                motivos.append(f"ks={v_ks[i]:.3f}")
+            if v_p[i] < cfg.chi2_alpha and v_psi[i] >= cfg.chi2_min_psi:
+                motivos.append(f"chi2 p={v_p[i]:.1e}")
+            if binaria[i] and desvio[i] > cfg.bin_delta:
+                motivos.append(f"taxa {base[i]:.2f}→{now[i]:.2f} (Δ={desvio[i]:.2f})")
+            if not binaria[i] and desvio[i] > cfg.z_max:
+                motivos.append(f"média {base[i]:.2f}→{now[i]:.2f} (z={desvio[i]:.2f})")
+        linhas.append({
+            "feature": f, "type": "binary" if binaria[i] else "numeric",
+            "n_base": float(B[i].sum()) if tem_contagem[i] else math.nan, "n_now": int(n_now[i]),
+            "missing_now": float(W[i, MISSING_BIN] / total_now[i]) if total_now[i] else math.nan,
+            "psi": float(v_psi[i]), "ks": float(v_ks[i]), "chi2": float(v_chi2[i]), "p_value": float(v_p[i]),
+            "base": float(base[i]), "now": float(now[i]), "delta": float(desvio[i]),
+            "alert": bool(motivos), "reasons": " | ".join(motivos),
+        })
+    return pd.DataFrame(linhas)
+
+
+def alerts(report: pd.DataFrame) -> List[str]:
+    """Linhas de alerta: "[DRIFT] feature: motivos" ou "[MISSING] feature sumiu do serving"."""
+    out = []
+    for r in report[report["alert"]].itertuples(index=False):
+        if r.reasons == "missing":
+            out.append(f"[MISSING] {r.feature} sumiu do serving")
+        else:
+            out.append(f"[DRIFT] {r.feature}: {r.reasons}")
+    return out
+
+
+def drift_report(agg: Dict[str, Dict[str, Any]], stats: Dict[str, Dict[str, Any]],
+                 config: Optional[DriftConfig] = None) -> pd.DataFrame:
+    """Relatório das features do baseline sobre as sketches somadas da janela (monitor e dashboard)."""
+    feats = list(stats)
+    return compute_drift(window_from_sketches(agg, feats), feats, stats, config)
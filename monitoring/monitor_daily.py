@@ -1,44 +1,36 @@
 import os, json, pandas as pd, numpy as np
-from datetime import datetime, timedelta, timezone
 from sqlalchemy import text
+from monitoring.drift import DriftConfig, alerts as drift_alerts, drift_report
+from src.feature_sketches import hourly_volume, merge_sketches, snapshot_engine, window_sketches
 from src.utils import make_engine_from_env
 
-def _get_time_col(conn):
-    q = text("SELECT * FROM inference_log LIMIT 0")
-    cols = set(conn.execute(q).keys())
-    return "ts" if "ts" in cols else "created_at"
-
 def main():
     eng = make_engine_from_env()
-    with eng.begin() as c:
-        tcol = _get_time_col(c)
-
-        # janela: último dia
+    cfg = DriftConfig.from_env()
+    # um snapshot só: um flush no meio da leitura não marca a hora corrente como incompleta
+    with snapshot_engine(eng).begin() as c:
         c.execute(text("SET TIME ZONE 'UTC'"))
-        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+
+        # janela (DRIFT_WINDOW_HOURS, padrão 24h) a partir das sketches horárias, sem reler payloads
+        sk, origem = window_sketches(c, hours=cfg.window_hours)
+        if origem.startswith("sketches+"):
+            print("⚠️ Horas sem sketches completas na janela; recalculadas a partir do log. "
+                  "Rode: python -m src.feature_sketches --backfill")
+        elif origem != "sketches" and not sk.empty:
+            print("⚠️ Sem sketches na janela; calculadas a partir do inference_log. "
+                  "Rode: python -m src.feature_sketches --backfill")
 
         # volume/score
-        inf = pd.read_sql(text(f"""
-            SELECT date_trunc('hour', {tcol}) as hora, COUNT(*) n, AVG(score) avg_score
-            FROM inference_log
-            WHERE {tcol} >= now() - interval '24 hours'
-            GROUP BY 1 ORDER BY 1
-        """), c)
-        print("== Volume últimas 24h ==")
+        inf = hourly_volume(sk) if not sk.empty else pd.DataFrame()
+        print(f"== Volume últimas {cfg.window_hours}h ==")
         if inf.empty:
             print("Sem predições.")
         else:
             print(inf.to_string(index=False))
 
-        # amostra de payloads de ontem para medir drift de features
-        raw = pd.read_sql(text(f"""
-            SELECT payload
-            FROM inference_log
-            WHERE {tcol} >= now() - interval '24 hours'
-        """), c)
-        if raw.empty:
+        if sk.empty:
             print("\n== Drift ==")
-            print("Sem dados de ontem.")
+            print("Sem dados na janela.")
             return
 
         # carrega baseline mais recente
@@ -51,42 +43,21 @@ def main():
         return
 
     stats = base["stats"].iloc[0] if isinstance(base["stats"].iloc[0], dict) else json.loads(base["stats"].iloc[0])
-
-    # reconstroi dataframe de features a partir dos payloads
-    feats = []
-    for j in raw["payload"]:
-        d = j if isinstance(j, dict) else json.loads(j)
-        feats.append(d)
-    df = pd.DataFrame(feats)
-
-    alerts = []
-    for col, meta in stats.items():
-        if col not in df.columns:
-            alerts.append(f"[MISSING] {col} sumiu do serving"); continue
-        s = pd.to_numeric(df[col], errors="coerce")
-
-        if meta["type"] == "binary":
-            rate = float(np.nanmean(s==1))
-            drift = abs(rate - meta["rate1"])
-            if drift > 0.15:
-                alerts.append(f"[DRIFT BIN] {col}: base={meta['rate1']:.2f} | now={rate:.2f} | Δ={drift:.2f}")
-        else:
-            m_base, std = meta["mean"], (meta["std"] or 1.0)
-            m_now = float(np.nanmean(s))
-            z = abs(m_now - m_base) / std
-            if z > 3:
-                alerts.append(f"[DRIFT NUM] {col}: mean_base={m_base:.2f} | mean_now={m_now:.2f} | z={z:.2f}")
+    report = drift_report(merge_sketches(sk), stats, cfg)
+    alerts = drift_alerts(report)
 
     print("\n== Drift ==")
+    top = report.sort_values("psi", ascending=False).head(5)
+    print(top[["feature", "n_now", "psi", "ks", "p_value", "base", "now"]].to_string(index=False))
     if alerts:
-        eng = make_engine_from_env()
         with eng.begin() as c:
             for a in alerts:
-                feat = a.split()[2].rstrip(':')
+                print(a)
                 c.execute(text("INSERT INTO drift_alerts (feature, alert) VALUES (:f,:a)"),
-                        {"f": feat, "a": a})
+                        {"f": a.split()[1].rstrip(':'), "a": a})
     else:
-        print("Sem alertas de drift com regras simples.")
+        print(f"Sem alertas de drift (PSI > {cfg.psi_max}, KS > {cfg.ks_max}, χ² p < {cfg.chi2_alpha}, "
+              f"Δ taxa > {cfg.bin_delta}, z > {cfg.z_max}).")
 
 if __name__ == "__main__":
     main()
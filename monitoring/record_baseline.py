@@ -1,6 +1,8 @@
 import json, os, pandas as pd, numpy as np
 from sqlalchemy import text
 from src.utils import make_engine_from_env
+from src.training.data import load_gold
+from monitoring.drift import baseline_stats
 
 FEATURES = [
  'tem_email','tem_telefone','tem_linkedin','tem_local','tem_objetivo','email_corporativo',
@@ -15,26 +17,15 @@ FEATURES = [
 
 def main():
     eng = make_engine_from_env()
-    with eng.begin() as c:
-        df = pd.read_sql(text("SELECT * FROM gold_applicants"), c)
-
-    df = df[FEATURES].copy()
+    df = load_gold(FEATURES, target=None, engine=eng)
 
-    # detecta numéricas x binárias
-    numeric = ["salario_valor"]
-    binary  = [f for f in FEATURES if f not in numeric]
-
-    stats = {}
-    for col in binary:
-        s = pd.to_numeric(df[col], errors="coerce")
-        stats[col] = {"type":"binary", "rate1": float(np.nanmean(s==1))}
-    for col in numeric:
-        s = pd.to_numeric(df[col], errors="coerce")
-        stats[col] = {"type":"numeric", "mean": float(np.nanmean(s)), "std": float(np.nanstd(s) or 1.0)}
+    # taxa de 1s (binárias), média/desvio (salario_valor) e contagens por faixa de todas as features
+    # numa passada sobre a matriz (mesmas faixas das sketches do serving)
+    X = df[FEATURES].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    stats = baseline_stats(X, FEATURES)
 
     # guarda em tabela 1 linha por modelo (ou por caminho de artefato)
     payload = json.dumps(stats)
-    eng = make_engine_from_env()
     with eng.begin() as c:
         c.execute(text("""
             CREATE TABLE IF NOT EXISTS model_baseline (
@@ -0,0 +1,309 @@
+import io, os, queue, threading
+from typing import List, Optional
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.types import Text
+from .utils import make_engine_from_env
+
+_FIM = object()
+_SYNC_OFF = "SET LOCAL synchronous_commit = OFF"
+
+
+def _print_percent(done: int, total: int, last_pct: int) -> int:
+    pct = int((done / total) * 100) if total else 100
+    if pct > last_pct:
+        print(f"\rProgresso: {pct:3d}%", end="", flush=True)
+    return pct
+
+
+class CopyWriter:
+    """
+    Escrita em chunks via COPY FROM STDIN (CSV), compartilhada pelas etapas de ETL:
+      - cria a tabela com o schema do primeiro chunk (ou de `template`) conforme if_exists
+        ("replace"/"append"/"fail"), ou usa uma já existente (create=False);
+      - colunas que só aparecem em chunks posteriores entram via ALTER TABLE ... ADD COLUMN (TEXT);
+      - pipeline produtor/consumidor: write() só enfileira; uma thread serializa o CSV do chunk N+1
+        enquanto `workers` threads fazem o COPY do chunk N (cada uma com a sua conexão);
+      - staging=True: COPY numa tabela UNLOGGED `{table}__staging` com commit por chunk e, no close,
+        troca pela tabela final (replace) ou INSERT ... SELECT (append). workers > 1 implica staging;
+      - sem staging: uma única transação (commit no close); com synchronous_commit OFF (SET LOCAL, por
+        transação) em ambos;
+      - empty_as_null=True segue o padrão do COPY CSV (string vazia vira NULL); com False, só NaN/None viram
+        NULL (marcador \\N) e "" é preservado, como no to_sql;
+      - progresso 1..100% sobre `total` (linhas, bytes... o que a etapa informar em write(done=...))
+        e contagem de linhas gravadas.
+
+    workers/staging sem valor explícito vêm do ambiente: COPY_WORKERS (padrão 1) e COPY_STAGING (padrão 0).
+
+    Uso:
+        with CopyWriter("prospects_raw", total=len(df)) as w:
+            for chunk in chunks:
+                w.write(chunk)
+        w.rows  # linhas gravadas
+    """
+
+    def __init__(
+        self,
+        table: str,
+        if_exists: str = "replace",
+        total: Optional[int] = None,
+        create: bool = True,
+        text_columns: bool = False,
+        empty_as_null: bool = True,
+        template: Optional[pd.DataFrame] = None,
+        workers: Optional[int] = None,
+        staging: Optional[bool] = None,
+        queue_chunks: int = 2,
+        engine=None,
+    ):
+        self.table = table
+        self.if_exists = if_exists
+        self.total = total
+        self.create = create
+        self.text_columns = text_columns
+        self.empty_as_null = empty_as_null
+        self.template = template
+        self.workers = max(1, int(workers if workers is not None else os.getenv("COPY_WORKERS", "1")))
+        if staging is None:
+            staging = os.getenv("COPY_STAGING", "0").lower() in ("1", "true", "yes")
+        self.staging = bool(staging) or self.workers > 1
+        self.dest = f"{table}__staging" if self.staging else table
+        self.eng = engine or make_engine_from_env()
+        self.rows = 0
+        self._enq_rows = 0
+        self._done = 0
+        self._last_pct = -1
+        self._cols: List[str] = []
+        self._q_in: "queue.Queue" = queue.Queue(maxsize=max(1, queue_chunks))
+        self._q_out: "queue.Queue" = queue.Queue(maxsize=max(1, queue_chunks))
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._erro: Optional[BaseException] = None
+        self._abortado = False
+
+    # ---------- ciclo de vida ----------
+    def __enter__(self) -> "CopyWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _start(self):
+        if self.total is not None:
+            self._last_pct = _print_percent(0, self.total, self._last_pct)
+        self._threads = [threading.Thread(target=self._encoder, name="copy-encoder", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._copy_worker, name=f"copy-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for th in self._threads:
+            th.start()
+
+    def _stop(self):
+        self._q_in.put(_FIM)
+        for th in self._threads:
+            th.join()
+        self._threads = []
+
+    def close(self) -> int:
+        if self._threads:
+            self._stop()
+            if self._erro is not None:
+                self._drop_staging()
+                raise self._erro
+            if self.staging:
+                self._swap_staging()
+            if self.total is not None:
+                print("\rProgresso: 100%")
+        return self.rows
+
+    def abort(self):
+        self._abortado = True
+        if self._threads:
+            self._stop()
+        self._drop_staging()
+
+    # ---------- produtor ----------
+    def write(self, df: pd.DataFrame, done: Optional[int] = None) -> int:
+        """Enfileira um chunk. `done` = progresso acumulado da etapa (padrão: linhas enfileiradas até aqui)."""
+        if self._erro is not None:
+            raise self._erro
+        if len(df.columns):
+            self._ensure_table(df)
+        if not self._threads:
+            self._start()
+        self._enq_rows += len(df)
+        done = self._enq_rows if done is None else done
+        self._q_in.put(("df" if len(df) else "nop", df, len(df), done))
+        return len(df)
+
+    def _ensure_table(self, df: pd.DataFrame):
+        if not self._cols:
+            self._cols = self._create_table(df if self.template is None else self.template)
+        conhecidas = set(self._cols)
+        for c in df.columns:
+            if c in conhecidas:
+                continue
+            stmt = f'ALTER TABLE {self.dest} ADD COLUMN "{c}" TEXT'
+            if self.staging:
+                # várias conexões: espera os chunks em voo e altera por fora (commit por chunk, sem lock pendente)
+                self._join()
+                with self.eng.begin() as conn:
+                    conn.execute(text(stmt))
+            else:
+                # conexão única: o ALTER segue no pipeline, na mesma transação dos COPY
+                if not self._threads:
+                    self._start()
+                self._q_in.put(("sql", stmt, 0, None))
+            self._cols.append(c)
+
+    def _create_table(self, df: pd.DataFrame) -> List[str]:
+        """Cria a tabela de destino (final ou staging) e devolve as colunas que ela já tem."""
+        dtype = {c: Text() for c in df.columns} if self.text_columns else None
+        if not self.staging:
+            if not self.create:
+                return list(df.columns)
+            with self.eng.begin() as conn:
+                df.head(0).to_sql(self.table, conn, if_exists=self.if_exists, index=False, dtype=dtype)
+                # append numa tabela existente: colunas novas do chunk entram via ALTER
+                return list(self._colunas(conn, self.table)) if self.if_exists == "append" else list(df.columns)
+        with self.eng.begin() as conn:
+            if self.if_exists == "fail" and self._existe(conn, self.table):
+                raise ValueError(f"Table '{self.table}' already exists.")
+            conn.execute(text(f"DROP TABLE IF EXISTS {self.dest}"))
+            if self.create:
+                df.head(0).to_sql(self.dest, conn, index=False, dtype=dtype)
+                conn.execute(text(f"ALTER TABLE {self.dest} SET UNLOGGED"))
+                return list(df.columns)
+            conn.execute(text(f"CREATE UNLOGGED TABLE {self.dest} (LIKE {self.table} INCLUDING DEFAULTS)"))
+            return list(self._colunas(conn, self.dest))
+
+    def _join(self):
+        self._q_in.join()
+        self._q_out.join()
+
+    # ---------- consumidores (threads) ----------
+    def _falha(self, e: BaseException):
+        with self._lock:
+            if self._erro is None:
+                self._erro = e
+
+    def _encoder(self):
+        while True:
+            item = self._q_in.get()
+            try:
+                if item is _FIM:
+                    for _ in range(self.workers):
+                        self._q_out.put(_FIM)
+                    return
+                kind, payload, n, done = item
+                if kind == "df" and self._erro is None and not self._abortado:
+                    payload = self._encode(payload)
+                self._q_out.put((kind, payload, n, done))
+            except BaseException as e:
+                self._falha(e)
+            finally:
+                self._q_in.task_done()
+
+    def _encode(self, df: pd.DataFrame):
+        cols = ", ".join(f'"{c}"' for c in df.columns)
+        null = "" if self.empty_as_null else ", NULL '\\N'"
+        buf = io.StringIO()
+        df.to_csv(buf, index=False, na_rep="" if self.empty_as_null else "\\N")
+        sql = f"COPY {self.dest} ({cols}) FROM STDIN WITH (FORMAT CSV, HEADER TRUE, DELIMITER ','{null})"
+        return sql, buf.getvalue()
+
+    def _copy_worker(self):
+        raw = cur = None
+        try:
+            raw = self.eng.raw_connection()
+            cur = raw.cursor()
+            # SET LOCAL: vale só para a transação; a conexão volta ao pool compartilhado sem a configuração
+            cur.execute(_SYNC_OFF)
+        except BaseException as e:
+            self._falha(e)
+        while True:
+            item = self._q_out.get()
+            try:
+                if item is _FIM:
+                    break
+                if self._erro is not None or self._abortado:
+                    continue  # só drena a fila para o produtor não travar
+                kind, payload, n, done = item
+                if kind == "sql":
+                    cur.execute(payload)
+                elif kind == "df":
+                    sql, csv = payload
+                    cur.copy_expert(sql, io.StringIO(csv))
+                if self.staging:
+                    raw.commit()
+                    cur.execute(_SYNC_OFF)
+                if kind != "sql":
+                    self._progress(n, done)
+            except BaseException as e:
+                self._falha(e)
+            finally:
+                self._q_out.task_done()
+        if raw is None:
+            return
+        try:
+            if self._erro is None and not self._abortado:
+                raw.commit()
+            else:
+                raw.rollback()
+        except BaseException as e:
+            self._falha(e)
+        finally:
+            try:
+                cur.close()
+            finally:
+                raw.close()
+
+    def _progress(self, n: int, done: int):
+        with self._lock:
+            self.rows += n
+            self._done = max(self._done, done)
+            if self.total is not None:
+                self._last_pct = _print_percent(self._done, self.total, self._last_pct)
+
+    # ---------- staging ----------
+    @staticmethod
+    def _existe(conn, table: str) -> bool:
+        return conn.execute(text("SELECT to_regclass(:t)"), {"t": table}).scalar() is not None
+
+    @staticmethod
+    def _colunas(conn, table: str) -> dict:
+        rows = conn.execute(text(
+            "SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = to_regclass(:t) AND attnum > 0 AND NOT attisdropped ORDER BY attnum"
+        ), {"t": table}).fetchall()
+        return {r[0]: r[1] for r in rows}
+
+    def _swap_staging(self):
+        with self.eng.begin() as conn:
+            if self._existe(conn, self.table) and (self.if_exists == "append" or not self.create):
+                destino = self._colunas(conn, self.table)
+                staging = self._colunas(conn, self.dest)
+                for c, tipo in staging.items():
+                    if c not in destino:
+                        conn.execute(text(f'ALTER TABLE {self.table} ADD COLUMN "{c}" {tipo}'))
+                cols = ", ".join(f'"{c}"' for c in staging)
+                conn.execute(text(f"INSERT INTO {self.table} ({cols}) SELECT {cols} FROM {self.dest}"))
+                conn.execute(text(f"DROP TABLE {self.dest}"))
+            else:
+                conn.execute(text(f"DROP TABLE IF EXISTS {self.table}"))
+                conn.execute(text(f"ALTER TABLE {self.dest} RENAME TO {self.table}"))
+                conn.execute(text(f"ALTER TABLE {self.table} SET LOGGED"))
+
+    def _drop_staging(self):
+        if not self.staging or not self._cols:
+            return
+        try:
+            with self.eng.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {self.dest}"))
+        except Exception as e:
+            print(f"⚠️ Não foi possível remover '{self.dest}': {e}")
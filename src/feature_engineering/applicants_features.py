@@ -1,6 +1,9 @@
-import io, math, re, pandas as pd
-from typing import Any, Dict, Optional
+import math, re, multiprocessing, numpy as np, pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
 from sqlalchemy import text
+from ..copy_writer import CopyWriter
 from ..utils import make_engine_from_env
 
 DOMINIOS_EMAIL_GRATIS = {"gmail.com","hotmail.com","yahoo.com","outlook.com","live.com","icloud.com","bol.com.br","uol.com.br","terra.com.br"}
@@ -41,8 +44,11 @@ def _escolaridade_onehot(raw: str) -> Dict[str,int]:
     return onehot
 def _bool_int(cond: bool) -> int: return 1 if cond else 0
 
-def construir_features_candidatos_from_raw(df_raw: pd.DataFrame) -> pd.DataFrame:
-    """Transforma um chunk de applicants_raw (json_normalize) em applicants_feat (features)."""
+def construir_features_candidatos_from_raw_linha_a_linha(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Implementação original (laço por linha). Mantida como referência para o teste diferencial e o benchmark;
+    o pipeline usa construir_features_candidatos_from_raw (vetorizada).
+    """
     g = lambda c: df_raw.get(c, pd.Series([None]*len(df_raw)))
 
     codigo_prof   = pd.to_numeric(g("infos_basicas.codigo_profissional"), errors="coerce")
@@ -134,21 +140,328 @@ def construir_features_candidatos_from_raw(df_raw: pd.DataFrame) -> pd.DataFrame
     df["salario_valor"] = pd.to_numeric(df["salario_valor"], errors="coerce")
     return df
 
-def _print_percent(done: int, total: int, last_pct: int) -> int:
-    pct = int((done/total)*100) if total else 100
-    if pct > last_pct:
-        print(f"\rProgresso: {pct:3d}%", end="", flush=True)
-    return pct
+# --- versão vetorizada: tabelas/regex pré-compiladas uma única vez
+_ACENTOS = (("ç","c"),("á","a"),("ã","a"),("â","a"),("í","i"),("ó","o"),("ô","o"),("é","e"),("ê","e"))
+_RE_DOMINIO = re.compile(r"@([^@\s]+)$")
+_RE_DIGITO = re.compile(r"\d")
+_RE_SAL_LIXO = re.compile(r"[R$\s]", flags=re.I)
+_RE_NUM_SIMPLES = re.compile(r"[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?")
+# únicos caracteres não-ASCII que o re.I casa com [a-z] (İ ı ſ K); sem eles, o literal inicial do padrão é obrigatório
+_RE_CASEFOLD_EXOTICO = re.compile("[İıſK]")
+_NIVEIS_IDIOMA = ("nenhum","basico","intermediario","avancado")
+
+def _literal_prefixo(padrao: str) -> str:
+    """Trecho literal logo após o \\b inicial (ex.: r"\\bsap\\s*fi\\b" -> "sap"); "" se não houver."""
+    m = re.match(r"\\b([0-9a-z-]+)", padrao)
+    if not m: return ""
+    lit, prox = m.group(1), padrao[m.end():m.end()+1]
+    return lit[:-1] if prox and prox in "?*+{" else lit
+
+_RE_CERT = {p: (re.compile(p, flags=re.I), _literal_prefixo(p)) for p in PALAVRAS_CHAVE_CERT}
+_RE_CV = {p: (re.compile(p, flags=re.I), _literal_prefixo(p)) for p in PALAVRAS_CHAVE_CV}
+
+def _sem_acentos(s: str) -> str:
+    for a, b in _ACENTOS:
+        s = s.replace(a, b)
+    return s
+
+def _norm_vec(s: pd.Series) -> pd.Series:
+    """strip + lower + remoção de acentos, uma passada por coluna."""
+    return s.map(lambda x: _sem_acentos(x.strip().lower()))
+
+def _primeiro_match_vec(s: pd.Series, mapping: Dict[str, str], default) -> np.ndarray:
+    """Equivale ao `for k,v in mapping.items(): if k in s: return v` (primeira chave na ordem do dict)."""
+    conds = [s.str.contains(k, regex=False).to_numpy(dtype=bool) for k in mapping]
+    return np.select(conds, list(mapping.values()), default)
+
+def _contem_padroes_vec(s: pd.Series, padroes: Dict[str, tuple]) -> Dict[str, np.ndarray]:
+    """re.search de cada padrão, rodando a regex só nas linhas que contêm o literal inicial (busca de substring)."""
+    exotico = s.str.contains(_RE_CASEFOLD_EXOTICO).to_numpy(dtype=bool)
+    out = {}
+    for p, (rx, lit) in padroes.items():
+        cand = exotico | s.str.contains(lit, regex=False).to_numpy(dtype=bool) if lit else np.ones(len(s), dtype=bool)
+        col = np.zeros(len(s), dtype=bool)
+        if cand.any():
+            col[cand] = s[cand].str.contains(rx).to_numpy(dtype=bool)
+        out[p] = col
+    return out
+
+def _float_ou_nan(txt: str) -> float:
+    try: return float(txt)
+    except: return np.nan
+
+def _parse_salario_vec(s: pd.Series) -> np.ndarray:
+    txt = s.str.replace(_RE_SAL_LIXO, "", regex=True).str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    val = np.full(len(s), np.nan)
+    simples = txt.str.fullmatch(_RE_NUM_SIMPLES).to_numpy(dtype=bool)
+    val[simples] = txt[simples].to_numpy(dtype=object).astype(float)
+    # formatos raros (inf, 1_000, dígitos unicode...) seguem a semântica exata de float()
+    resto = ~simples & (txt != "").to_numpy(dtype=bool)
+    if resto.any():
+        val[resto] = [_float_ou_nan(t) for t in txt[resto]]
+    with np.errstate(invalid="ignore"):
+        val[~(val > 0)] = np.nan
+    if np.isnan(val).all():
+        # a versão original monta a coluna só com None (dtype object); preserva o dtype final
+        return np.full(len(s), None, dtype=object)
+    return val
+
+def construir_features_candidatos_from_raw(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Transforma um chunk de applicants_raw (json_normalize) em applicants_feat (features).
+    Versão coluna a coluna (ops .str, regex pré-compiladas); saída idêntica à versão linha a linha.
+    """
+    n = len(df_raw)
+    g = lambda c: df_raw.get(c, pd.Series([None]*n))
+
+    codigo_prof   = pd.to_numeric(g("infos_basicas.codigo_profissional"), errors="coerce")
+    email         = g("infos_basicas.email").fillna(g("informacoes_pessoais.email")).astype(str)
+    telefone      = g("infos_basicas.telefone").fillna(g("informacoes_pessoais.telefone_celular")).astype(str)
+    linkedin      = g("informacoes_pessoais.url_linkedin").astype(str)
+    local         = g("infos_basicas.local").astype(str)
+    objetivo      = g("infos_basicas.objetivo_profissional").astype(str)
+    titulo_prof   = g("informacoes_profissionais.titulo_profissional").astype(str)
+    area_atuacao  = g("informacoes_profissionais.area_atucao").fillna(g("informacoes_profissionais.area_atuacao")).astype(str)  # tolera nome errado
+    remuneracao   = g("informacoes_profissionais.remuneracao").astype(str)
+    nivel_acad    = g("formacao_e_idiomas.nivel_academico").astype(str)
+    nivel_ing     = g("formacao_e_idiomas.nivel_ingles").astype(str)
+    nivel_esp     = g("formacao_e_idiomas.nivel_espanhol").astype(str)
+    outro_idioma  = g("formacao_e_idiomas.outro_idioma").astype(str)
+    certificacoes = g("informacoes_profissionais.certificacoes").astype(str)
+    outras_cert   = g("informacoes_profissionais.outras_certificacoes").astype(str)
+    conhecimentos = g("informacoes_profissionais.conhecimentos_tecnicos").astype(str)
+    cv_pt         = g("cv_pt").astype(str)
+
+    # daqui em diante tudo é posicional (como o .iloc[i] da versão original)
+    pos = lambda s: pd.Series(s.to_numpy(), dtype=object)
+    email, telefone, linkedin, local, objetivo = map(pos, (email, telefone, linkedin, local, objetivo))
+    titulo_prof, area_atuacao, remuneracao, nivel_acad = map(pos, (titulo_prof, area_atuacao, remuneracao, nivel_acad))
+    nivel_ing, nivel_esp, outro_idioma = map(pos, (nivel_ing, nivel_esp, outro_idioma))
+    certificacoes, outras_cert, conhecimentos, cv_pt = map(pos, (certificacoes, outras_cert, conhecimentos, cv_pt))
+    b = lambda a: np.asarray(a, dtype=bool).astype(int)
+
+    dom = email.str.strip().str.lower().str.extract(_RE_DOMINIO, expand=False)
+    objetivo_s = objetivo.str.strip()
+    cols: Dict[str, Any] = {
+        "codigo_profissional": codigo_prof.to_numpy(),
+        "tem_email": b((email != "") & (email != "nan")),
+        "tem_telefone": b(telefone.str.contains(_RE_DIGITO)),
+        "tem_linkedin": b(linkedin.str.len() > 0),
+        "tem_local": b(local.str.len() > 0),
+        "tem_objetivo": b(objetivo.str.len() > 0),
+        "email_corporativo": b(dom.notna() & ~dom.isin(DOMINIOS_EMAIL_GRATIS)),
+        "salario_valor": _parse_salario_vec(remuneracao),
+    }
+
+    for prefixo, nivel, mapping in (("ingl", nivel_ing, MAP_ING), ("esp", nivel_esp, MAP_ESP)):
+        s = _norm_vec(nivel)
+        vazio = ((s == "") | s.isin(["-","nenhum"])).to_numpy(dtype=bool)
+        mapeado = _primeiro_match_vec(s, mapping, np.where(vazio, "nenhum", "outro"))
+        for v in _NIVEIS_IDIOMA:
+            cols[f"{prefixo}_{v}"] = b(mapeado == v)
+        cols[f"{prefixo}_outro"] = b(~np.isin(mapeado, _NIVEIS_IDIOMA))
+    outro = outro_idioma.str.strip()
+    cols["outro_idioma_presente"] = b((outro != "") & (outro != "-"))
+
+    chave_esc = _primeiro_match_vec(_norm_vec(nivel_acad), MAP_ESCOLARIDADE, "")
+    for v in set(MAP_ESCOLARIDADE.values()):  # mesma ordem de colunas da versão original
+        cols[f"esc_{v}"] = b(chave_esc == v)
+
+    area_s = area_atuacao.str.strip().str.lower()
+    area = {f"area_{v}": np.zeros(n, dtype=bool) for v in {"admin","financeiro","ti"}}
+    for k, v in PALAVRAS_CHAVE_AREA.items():
+        area[f"area_{v}"] |= area_s.str.contains(k.lower(), regex=False).to_numpy(dtype=bool)
+
+    blob_titulo = (titulo_prof.str.strip() + " " + objetivo_s).str.lower()
+    titulo = {f"titulo_{v}": np.zeros(n, dtype=bool) for v in {"admin","financeiro","dados_bi","ti"}}
+    for k, v in PALAVRAS_CHAVE_TITULO_OBJ.items():
+        titulo[f"titulo_{v}"] |= blob_titulo.str.contains(k, regex=False).to_numpy(dtype=bool)
+    cols.update({k: b(v) for k, v in area.items()})
+    cols.update({k: b(v) for k, v in titulo.items()})
+
+    texto_cert = (certificacoes.str.strip() + " " + outras_cert.str.strip()).str.lower()
+    hits_cert = _contem_padroes_vec(texto_cert, _RE_CERT)
+    for p, col in PALAVRAS_CHAVE_CERT.items():
+        cols[col] = b(hits_cert[p])
+    cols["has_cert"] = b(texto_cert.str.len() > 0)
+
+    cv_s = cv_pt.str.strip()
+    blob_cv = (cv_s + " " + conhecimentos.str.strip()).str.lower().map(_sem_acentos)
+    hits_cv = _contem_padroes_vec(blob_cv, _RE_CV)
+    for p, col in PALAVRAS_CHAVE_CV.items():
+        cols[col] = b(hits_cv[p])
+    cols["cv_tamanho_maior_1500"] = b(cv_s.str.len() > 1500)
+
+    df = pd.DataFrame(cols, index=pd.RangeIndex(n))
+    df = df.dropna(subset=["codigo_profissional"]).copy()
+    df["codigo_profissional"] = df["codigo_profissional"].astype("Int64")
+    cols_bin = [c for c in df.columns if c not in {"codigo_profissional","email_corporativo","salario_valor"}]
+    df[cols_bin] = df[cols_bin].fillna(0).astype(int)
+    df["email_corporativo"] = df["email_corporativo"].fillna(0).astype(int)
+    df["salario_valor"] = pd.to_numeric(df["salario_valor"], errors="coerce")
+    return df
+
+# --- versão de um registro (API): mesma semântica da vetorizada, sem pandas no caminho
+_ESC_VALORES = tuple(set(MAP_ESCOLARIDADE.values()))  # mesma ordem de colunas da vetorizada (set no mesmo processo)
+_AREA_VALORES = tuple({"admin","financeiro","ti"})
+_TITULO_VALORES = tuple({"admin","financeiro","dados_bi","ti"})
+_MAP_ING_ITENS = tuple(MAP_ING.items())
+_MAP_ESP_ITENS = tuple(MAP_ESP.items())
+_MAP_ESC_ITENS = tuple(MAP_ESCOLARIDADE.items())
+_AREA_ITENS = tuple((k.lower(), f"area_{v}") for k, v in PALAVRAS_CHAVE_AREA.items())
+_TITULO_ITENS = tuple((k, f"titulo_{v}") for k, v in PALAVRAS_CHAVE_TITULO_OBJ.items())
+_CERT_ITENS = tuple((rx, lit, PALAVRAS_CHAVE_CERT[p]) for p, (rx, lit) in _RE_CERT.items())
+_CV_ITENS = tuple((rx, lit, PALAVRAS_CHAVE_CV[p]) for p, (rx, lit) in _RE_CV.items())
+
+def _achatar(registro: Dict[str, Any], prefixo: str = "", out: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Mesmo achatamento do json_normalize (dicts aninhados viram chaves "a.b")."""
+    out = {} if out is None else out
+    for k, v in registro.items():
+        if isinstance(v, dict):
+            _achatar(v, f"{prefixo}{k}.", out)
+        else:
+            out[f"{prefixo}{k}"] = v
+    return out
+
+def _vazio(v) -> bool:
+    return v is None or (isinstance(v, float) and math.isnan(v))
+
+def _como_str(v) -> str:
+    """Equivale ao .astype(str) de uma coluna object: None -> "None", NaN -> "nan"."""
+    return v if isinstance(v, str) else str(v)
+
+_RE_INTEIRO = re.compile(r"[+-]?[0-9]+")
+
+def _codigo_numerico(v):
+    """pd.to_numeric(errors="coerce") para um escalar (None se não numérico)."""
+    if _vazio(v):
+        return None
+    if isinstance(v, (bool, int, np.integer)):
+        return int(v)
+    if isinstance(v, (float, np.floating)):
+        return int(v) if float(v).is_integer() else float(v)
+    s = str(v).strip()
+    if _RE_INTEIRO.fullmatch(s):
+        return int(s)
+    if _RE_NUM_SIMPLES.fullmatch(s):
+        val = float(s)
+        return int(val) if val.is_integer() else val
+    return None
+
+def _salario(txt: str) -> Optional[float]:
+    txt = _RE_SAL_LIXO.sub("", txt).replace(".", "").replace(",", ".")
+    val = _float_ou_nan(txt) if txt else np.nan
+    return val if val > 0 else None
+
+def _idioma(raw: str, itens, prefixo: str, out: Dict[str, Any]):
+    s = _sem_acentos(raw.strip().lower())
+    mapeado = next((v for k, v in itens if k in s), None)
+    if mapeado is None:
+        mapeado = "nenhum" if s == "" or s in ("-", "nenhum") else "outro"
+    for v in _NIVEIS_IDIOMA:
+        out[f"{prefixo}_{v}"] = int(mapeado == v)
+    out[f"{prefixo}_outro"] = int(mapeado not in _NIVEIS_IDIOMA)
+
+def _contem(texto: str, itens, out: Dict[str, Any]):
+    exotico = _RE_CASEFOLD_EXOTICO.search(texto) is not None
+    for rx, lit, col in itens:
+        out[col] = int((exotico or not lit or lit in texto) and rx.search(texto) is not None)
+
+def construir_features_candidato(registro: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Features de UM candidato a partir do registro bruto (formato de applicants.json, aninhado ou já achatado).
+    Mesma saída da construir_features_candidatos_from_raw para uma linha, sem montar DataFrame
+    (tabelas e regex pré-compiladas no import). Sem código numérico, codigo_profissional vem None
+    (a versão em lote descartaria a linha). Salário ausente/ inválido vem None.
+    """
+    r = _achatar(registro)
+    g = r.get
+    def g2(a: str, b: str):
+        v = g(a)
+        return g(b) if _vazio(v) else v
+
+    email = _como_str(g2("infos_basicas.email", "informacoes_pessoais.email"))
+    telefone = _como_str(g2("infos_basicas.telefone", "informacoes_pessoais.telefone_celular"))
+    objetivo = _como_str(g("infos_basicas.objetivo_profissional"))
+    dom = _RE_DOMINIO.search(email.strip().lower())
+
+    out: Dict[str, Any] = {
+        "codigo_profissional": _codigo_numerico(g("infos_basicas.codigo_profissional")),
+        "tem_email": int(email != "" and email != "nan"),
+        "tem_telefone": int(_RE_DIGITO.search(telefone) is not None),
+        "tem_linkedin": int(len(_como_str(g("informacoes_pessoais.url_linkedin"))) > 0),
+        "tem_local": int(len(_como_str(g("infos_basicas.local"))) > 0),
+        "tem_objetivo": int(len(objetivo) > 0),
+        "email_corporativo": int(dom is not None and dom.group(1) not in DOMINIOS_EMAIL_GRATIS),
+        "salario_valor": _salario(_como_str(g("informacoes_profissionais.remuneracao"))),
+    }
+    _idioma(_como_str(g("formacao_e_idiomas.nivel_ingles")), _MAP_ING_ITENS, "ingl", out)
+    _idioma(_como_str(g("formacao_e_idiomas.nivel_espanhol")), _MAP_ESP_ITENS, "esp", out)
+    outro = _como_str(g("formacao_e_idiomas.outro_idioma")).strip()
+    out["outro_idioma_presente"] = int(outro != "" and outro != "-")
+
+    esc = _sem_acentos(_como_str(g("formacao_e_idiomas.nivel_academico")).strip().lower())
+    chave = next((v for k, v in _MAP_ESC_ITENS if k in esc), "")
+    for v in _ESC_VALORES:
+        out[f"esc_{v}"] = int(chave == v)
+
+    area = _como_str(g2("informacoes_profissionais.area_atucao", "informacoes_profissionais.area_atuacao")).strip().lower()
+    for v in _AREA_VALORES:
+        out[f"area_{v}"] = 0
+    for k, col in _AREA_ITENS:
+        if k in area:
+            out[col] = 1
+    blob_titulo = (_como_str(g("informacoes_profissionais.titulo_profissional")).strip() + " " + objetivo.strip()).lower()
+    for v in _TITULO_VALORES:
+        out[f"titulo_{v}"] = 0
+    for k, col in _TITULO_ITENS:
+        if k in blob_titulo:
+            out[col] = 1
+
+    texto_cert = (_como_str(g("informacoes_profissionais.certificacoes")).strip() + " "
+                  + _como_str(g("informacoes_profissionais.outras_certificacoes")).strip()).lower()
+    _contem(texto_cert, _CERT_ITENS, out)
+    out["has_cert"] = int(len(texto_cert) > 0)
+
+    cv = _como_str(g("cv_pt")).strip()
+    blob_cv = _sem_acentos((cv + " " + _como_str(g("informacoes_profissionais.conhecimentos_tecnicos")).strip()).lower())
+    _contem(blob_cv, _CV_ITENS, out)
+    out["cv_tamanho_maior_1500"] = int(len(cv) > 1500)
+    return out
+
+def _features_em_paralelo(chunks: Iterable[pd.DataFrame], workers: int) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """
+    Distribui os chunks brutos num pool de processos e devolve (linhas brutas, features) NA ORDEM de leitura.
+    Janela de até 2*workers chunks em voo: limita a memória sem deixar o pool ocioso.
+    As colunas são reordenadas pela ordem do processo pai: as colunas vindas de set() (esc_*) podem sair
+    em outra ordem num processo com outro hash seed (start method spawn).
+    """
+    colunas = None
+    pendentes = deque()
+    # spawn: o pai tem threads (CopyWriter, pool de conexões), fork não é seguro aqui
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for df_raw in chunks:
+            if colunas is None:
+                colunas = list(construir_features_candidatos_from_raw(df_raw.iloc[:0]).columns)
+            pendentes.append((len(df_raw), pool.submit(construir_features_candidatos_from_raw, df_raw)))
+            if len(pendentes) >= 2 * workers:
+                n, fut = pendentes.popleft()
+                yield n, fut.result()[colunas]
+        while pendentes:
+            n, fut = pendentes.popleft()
+            yield n, fut.result()[colunas]
 
 def build_and_write_applicants_feat(
     raw_table: str = "applicants_raw",
     feat_table: str = "applicants_feat",
     if_exists: str = "replace",
-    read_chunk_rows: int = 50_000
+    read_chunk_rows: int = 50_000,
+    workers: int = 1
 ) -> int:
     """
     Lê applicants_raw em chunks, transforma e grava applicants_feat via COPY,
     exibindo progresso percentual (1..100%).
+    workers > 1: a transformação roda num pool de processos e os chunks são gravados na ordem de leitura.
     """
     eng = make_engine_from_env()
     total_raw = 0
@@ -159,43 +472,21 @@ def build_and_write_applicants_feat(
 
     read_chunk_rows = min(read_chunk_rows, max(1, math.ceil(total_raw/100)))
 
-    created = False
-    inserted_feat = 0
     processed_raw = 0
-    last_pct = -1
 
     print(f"Lendo {total_raw} linhas de '{raw_table}' em chunks de ~{read_chunk_rows}...")
 
-    raw_conn = eng.raw_connection()
-    try:
-        with raw_conn.cursor() as cur:
-            cur.execute("SET synchronous_commit = OFF;")
-
-            with eng.connect() as conn:
-                for df_raw in pd.read_sql(text(f"SELECT * FROM {raw_table}"), conn, chunksize=read_chunk_rows):
-                    processed_raw += len(df_raw)
-
-                    df_feat = construir_features_candidatos_from_raw(df_raw)
-
-                    if not created:
-                        with eng.begin() as c2:
-                            df_feat.head(0).to_sql(feat_table, c2, if_exists=if_exists, index=False)
-                        cols = ", ".join(f'"{c}"' for c in df_feat.columns)
-                        copy_sql = f"COPY {feat_table} ({cols}) FROM STDIN WITH (FORMAT CSV, HEADER TRUE, DELIMITER ',')"
-                        created = True
-
-                    buf = io.StringIO()
-                    df_feat.to_csv(buf, index=False)
-                    buf.seek(0)
-                    cur.copy_expert(copy_sql, buf)
-                    inserted_feat += len(df_feat)
-
-                    last_pct = _print_percent(processed_raw, total_raw, last_pct)
-
-            raw_conn.commit()
-            print("\rProgresso: 100%")
-    finally:
-        raw_conn.close()
+    with CopyWriter(feat_table, if_exists=if_exists, total=total_raw) as w:
+        with eng.connect() as conn:
+            chunks = pd.read_sql(text(f"SELECT * FROM {raw_table}"), conn, chunksize=read_chunk_rows)
+            if workers > 1:
+                resultados = _features_em_paralelo(chunks, workers)
+            else:
+                resultados = ((len(df_raw), construir_features_candidatos_from_raw(df_raw)) for df_raw in chunks)
+            for n_raw, df_feat in resultados:
+                processed_raw += n_raw
+                w.write(df_feat, done=processed_raw)
+    inserted_feat = w.rows
 
     print(f"\n✅ '{feat_table}' escrito com {inserted_feat} linhas (a partir de {total_raw} brutas).")
     return inserted_feat
@@ -207,6 +498,7 @@ if __name__ == "__main__":
     ap.add_argument("--feat-table", default="applicants_feat")
     ap.add_argument("--if-exists",  default="replace", choices=["replace","append"])
     ap.add_argument("--chunk-rows", type=int, default=50_000)
+    ap.add_argument("--workers", type=int, default=1, help="Processos para a construção das features")
     args = ap.parse_args()
-    n = build_and_write_applicants_feat(args.raw_table, args.feat_table, args.if_exists, args.chunk_rows)
+    n = build_and_write_applicants_feat(args.raw_table, args.feat_table, args.if_exists, args.chunk_rows, args.workers)
     print(f"Total inserido: {n}")
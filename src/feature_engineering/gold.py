@@ -1,17 +1,10 @@
-import io
 import math
 import pandas as pd
 from sqlalchemy import text
+from ..copy_writer import CopyWriter
 from ..utils import make_engine_from_env
 
 
-def _print_percent(done: int, total: int, last_pct: int) -> int:
-    pct = int((done / total) * 100) if total else 100
-    if pct > last_pct:
-        print(f"\rProgresso: {pct:3d}%", end="", flush=True)
-    return pct
-
-
 def write_gold_with_progress(
     df_gold: pd.DataFrame,
     table: str = "gold_applicants",
@@ -20,46 +13,20 @@ def write_gold_with_progress(
 ) -> int:
     """
     Mantida sua função original (recebe um DataFrame completo).
-    Usa COPY em chunks e imprime 1..100%.
+    Usa COPY em chunks (CopyWriter) e imprime 1..100%.
     """
     if df_gold.empty:
         print(f"Nenhuma linha para inserir em {table}.")
         return 0
 
-    eng = make_engine_from_env()
-
     # Para a barra ficar suave (~1% cada), adapta chunk_rows ao tamanho
     chunk_rows = min(chunk_rows, max(1, math.ceil(len(df_gold) / 100)))
-    with eng.begin() as conn:
-        df_gold.head(0).to_sql(table, conn, if_exists=if_exists, index=False)
-
-    raw = eng.raw_connection()
-    try:
-        with raw.cursor() as cur:
-            cur.execute("SET synchronous_commit = OFF;")
-            cols = ", ".join(f'"{c}"' for c in df_gold.columns)
-            copy_sql = f"COPY {table} ({cols}) FROM STDIN WITH (FORMAT CSV, HEADER TRUE, DELIMITER ',')"
-
-            total = len(df_gold)
-            inserted = 0
-            last_pct = -1
-
-            print(f"Carregando {total} linhas em '{table}' (chunks ~{chunk_rows})...")
-            last_pct = _print_percent(0, total, last_pct)
-
-            for start in range(0, total, chunk_rows):
-                chunk = df_gold.iloc[start : start + chunk_rows]
-                buf = io.StringIO()
-                chunk.to_csv(buf, index=False)
-                buf.seek(0)
-                cur.copy_expert(copy_sql, buf)
-                inserted = min(start + chunk_rows, total)
-                last_pct = _print_percent(inserted, total, last_pct)
-
-            raw.commit()
-            print("\rProgresso: 100%")
-    finally:
-        raw.close()
+    total = len(df_gold)
+
+    print(f"Carregando {total} linhas em '{table}' (chunks ~{chunk_rows})...")
+    with CopyWriter(table, if_exists=if_exists, total=total) as w:
+        for start in range(0, total, chunk_rows):
+            w.write(df_gold.iloc[start : start + chunk_rows])
 
     return len(df_gold)
 
@@ -101,37 +68,16 @@ def build_and_write_gold_streamed(
             print(f"Nenhuma linha no JOIN. '{gold_table}' criada vazia.")
             return 0
         df_head = pd.read_sql(text(join_sql + " LIMIT 0"), conn)
-        df_head.to_sql(gold_table, conn, if_exists=if_exists, index=False)
 
     chunk_rows = min(chunk_rows, max(1, math.ceil(total / 100)))
 
-    raw = eng.raw_connection()
-    try:
-        with raw.cursor() as cur:
-            cur.execute("SET synchronous_commit = OFF;")
-            cols = ", ".join(f'"{c}"' for c in df_head.columns)
-            copy_sql = f"COPY {gold_table} ({cols}) FROM STDIN WITH (FORMAT CSV, HEADER TRUE, DELIMITER ',')"
-
-            done = 0
-            last_pct = -1
-            print(f"Construindo '{gold_table}' via JOIN em chunks de ~{chunk_rows} linhas (total={total})...")
-            last_pct = _print_percent(0, total, last_pct)
-
-            with eng.connect() as rconn:
-                for df_chunk in pd.read_sql(text(join_sql), rconn, chunksize=chunk_rows):
-                    buf = io.StringIO()
-                    df_chunk.to_csv(buf, index=False)
-                    buf.seek(0)
-                    cur.copy_expert(copy_sql, buf)
-
-                    done += len(df_chunk)
-                    last_pct = _print_percent(done, total, last_pct)
-
-            raw.commit()
-            print("\rProgresso: 100%")
-    finally:
-        raw.close()
-        
+    print(f"Construindo '{gold_table}' via JOIN em chunks de ~{chunk_rows} linhas (total={total})...")
+    # schema vem do SELECT ... LIMIT 0 (df_head), não do primeiro chunk
+    with CopyWriter(gold_table, if_exists=if_exists, total=total, template=df_head) as w:
+        with eng.connect() as rconn:
+            for df_chunk in pd.read_sql(text(join_sql), rconn, chunksize=chunk_rows):
+                w.write(df_chunk)
+
     with eng.begin() as conn:
         try:
             conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{gold_table}__cod ON {gold_table}(codigo_profissional)"))
@@ -0,0 +1,228 @@
+import io
+import pandas as pd
+from typing import Dict, List
+from sqlalchemy import text
+from ..copy_writer import _print_percent
+from ..utils import make_engine_from_env
+from .applicants_features import construir_features_candidatos_from_raw
+
+COD_RAW = "infos_basicas.codigo_profissional"
+
+
+def _copy_df(cur, table: str, df: pd.DataFrame):
+    cols = ", ".join(f'"{c}"' for c in df.columns)
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({cols}) FROM STDIN WITH (FORMAT CSV, HEADER TRUE, DELIMITER ',')", buf)
+
+
+def _existe(conn, table: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:t)"), {"t": table}).scalar() is not None
+
+
+def _tipo_coluna(conn, table: str, col: str) -> str:
+    return conn.execute(text(
+        "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = to_regclass(:t) AND attname = :c AND NOT attisdropped"
+    ), {"t": table, "c": col}).scalar()
+
+
+def _ids_features(codigos: List[str]) -> List[int]:
+    """Chave de applicants_feat derivada do código bruto (mesma conversão do construir_features)."""
+    ids = pd.to_numeric(pd.Series(codigos, dtype=object), errors="coerce").dropna()
+    return sorted({int(v) for v in ids})
+
+
+def _upsert_feat(conn, cur, feat_table: str, df_feat: pd.DataFrame):
+    """COPY do lote numa tabela temporária e INSERT ... ON CONFLICT (codigo_profissional) no destino."""
+    conn.execute(text("TRUNCATE _feat_delta"))
+    _copy_df(cur, "_feat_delta", df_feat)
+    cols = [f'"{c}"' for c in df_feat.columns]
+    sets = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c != '"codigo_profissional"')
+    conn.execute(text(
+        f"INSERT INTO {feat_table} ({', '.join(cols)}) SELECT {', '.join(cols)} FROM _feat_delta "
+        f"ON CONFLICT (codigo_profissional) DO UPDATE SET {sets}"
+    ))
+
+
+def _reparar_duplicados(conn, feat_table: str, state_table: str) -> List[int]:
+    """
+    applicants_feat vinda do rebuild completo (que não deduplica) pode ter codigo_profissional repetido, o que
+    impede o índice único do upsert. Antes de criá-lo, as linhas desses códigos são apagadas e os códigos saem
+    do estado, para que o delta desta execução os refaça (uma linha por código, mesma regra do upsert).
+    Retorna os ids reparados (vazio se o índice já existe); a gold desses ids também é refeita.
+    """
+    if _existe(conn, f"ux_{feat_table}__cod"):
+        return []
+    dups = {int(r[0]) for r in conn.execute(text(
+        f"SELECT codigo_profissional FROM {feat_table} WHERE codigo_profissional IS NOT NULL "
+        f"GROUP BY 1 HAVING count(*) > 1")).fetchall()}
+    if dups:
+        conn.execute(text(f"DELETE FROM {feat_table} WHERE codigo_profissional = ANY(:ids)"), {"ids": sorted(dups)})
+        estado = [r[0] for r in conn.execute(text(f"SELECT codigo_profissional FROM {state_table}")).fetchall()]
+        refazer = [c for c in estado if set(_ids_features([c])) & dups]
+        if refazer:
+            conn.execute(text(f"DELETE FROM {state_table} WHERE codigo_profissional = ANY(:cods)"), {"cods": refazer})
+    conn.execute(text(f"CREATE UNIQUE INDEX ux_{feat_table}__cod ON {feat_table}(codigo_profissional)"))
+    return sorted(dups)
+
+
+def refresh_applicants_feat_incremental(
+    raw_table: str = "applicants_raw",
+    feat_table: str = "applicants_feat",
+    state_table: str = "applicants_feat_state",
+    prospects_labels_table: str = "prospects_labels",
+    gold_table: str = "gold_applicants",
+    read_chunk_rows: int = 50_000,
+    refresh_gold: bool = True,
+) -> Dict[str, int]:
+    """
+    Atualização incremental (delta) de applicants_feat e gold_applicants:
+      - `state_table` guarda, por codigo_profissional bruto, o md5 do conteúdo da(s) linha(s) em applicants_raw;
+      - só os códigos novos/alterados são recalculados e gravados com INSERT ... ON CONFLICT em applicants_feat
+        (índice único em codigo_profissional); códigos que sumiram do bruto são removidos;
+      - as linhas correspondentes de gold_applicants são refeitas (DELETE + INSERT do JOIN só desses códigos),
+        já que a gold não tem chave única (um candidato pode ter vários prospects);
+      - tudo numa única transação. Primeira execução (estado vazio) = todos os códigos;
+      - uma linha por código: com código repetido no bruto fica a linha de maior md5 (ordem determinística);
+        uma applicants_feat do rebuild completo com códigos repetidos é reparada antes (_reparar_duplicados).
+    Mudanças em prospects_labels não são rastreadas aqui: nesse caso, rodar o rebuild completo da gold.
+    """
+    eng = make_engine_from_env()
+    hashes = (
+        f'SELECT r."{COD_RAW}" AS cod, md5(string_agg(md5(r::text), \'\' ORDER BY md5(r::text))) AS h '
+        f'FROM {raw_table} r WHERE r."{COD_RAW}" IS NOT NULL GROUP BY 1'
+    )
+
+    with eng.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {state_table} (
+                codigo_profissional TEXT PRIMARY KEY,
+                row_hash TEXT NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )"""))
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{raw_table}__cod ON {raw_table} ("{COD_RAW}")'))
+
+        feat_existe = _existe(conn, feat_table)
+        reparados = _reparar_duplicados(conn, feat_table, state_table) if feat_existe else []
+
+        delta = conn.execute(text(f"""
+            WITH cur AS ({hashes})
+            SELECT c.cod, c.h FROM cur c
+            LEFT JOIN {state_table} s ON s.codigo_profissional = c.cod
+            WHERE s.row_hash IS DISTINCT FROM c.h
+            ORDER BY c.cod""")).fetchall()
+        removidos = [r[0] for r in conn.execute(text(f"""
+            SELECT s.codigo_profissional FROM {state_table} s
+            WHERE NOT EXISTS (SELECT 1 FROM {raw_table} r WHERE r."{COD_RAW}" = s.codigo_profissional)""")).fetchall()]
+
+        print(f"Delta '{raw_table}': {len(delta)} novos/alterados, {len(removidos)} removidos"
+              + (f" ({len(reparados)} códigos duplicados em '{feat_table}' refeitos)." if reparados else "."))
+        if not delta and not removidos and not reparados:
+            return {"alterados": 0, "removidos": 0, "feat_upserts": 0, "gold_linhas": 0}
+
+        if feat_existe:
+            conn.execute(text(f"CREATE TEMP TABLE _feat_delta (LIKE {feat_table}) ON COMMIT DROP"))
+
+        cur = conn.connection.cursor()
+        upserts = 0
+        last_pct = _print_percent(0, len(delta), -1) if delta else -1
+        for start in range(0, len(delta), read_chunk_rows):
+            lote = delta[start:start + read_chunk_rows]
+            codigos = [c for c, _ in lote]
+            # ordem fixa (código, md5 da linha): com código repetido no bruto, fica sempre a mesma linha
+            df_raw = pd.read_sql(
+                text(f'SELECT * FROM {raw_table} r WHERE r."{COD_RAW}" = ANY(:cods) '
+                     f'ORDER BY r."{COD_RAW}", md5(r::text)'), conn, params={"cods": codigos}
+            )
+            df_feat = construir_features_candidatos_from_raw(df_raw)
+            df_feat = df_feat.drop_duplicates(subset=["codigo_profissional"], keep="last")
+
+            if not feat_existe:
+                df_feat.head(0).to_sql(feat_table, conn, index=False)
+                conn.execute(text(f"CREATE UNIQUE INDEX ux_{feat_table}__cod ON {feat_table}(codigo_profissional)"))
+                conn.execute(text(f"CREATE TEMP TABLE _feat_delta (LIKE {feat_table}) ON COMMIT DROP"))
+                feat_existe = True
+            if len(df_feat):
+                _upsert_feat(conn, cur, feat_table, df_feat)
+                upserts += len(df_feat)
+
+            # estado só avança junto com o upsert (mesma transação)
+            conn.execute(text(f"""
+                INSERT INTO {state_table} (codigo_profissional, row_hash, updated_at)
+                SELECT *, now() FROM unnest(CAST(:cods AS text[]), CAST(:hs AS text[]))
+                ON CONFLICT (codigo_profissional) DO UPDATE SET row_hash = EXCLUDED.row_hash, updated_at = now()"""),
+                {"cods": codigos, "hs": [h for _, h in lote]})
+            last_pct = _print_percent(min(start + read_chunk_rows, len(delta)), len(delta), last_pct)
+        if delta:
+            print("\rProgresso: 100%")
+
+        ids_removidos = _ids_features(removidos)
+        if removidos:
+            if feat_existe:
+                conn.execute(text(f"DELETE FROM {feat_table} WHERE codigo_profissional = ANY(:ids)"),
+                             {"ids": ids_removidos})
+            conn.execute(text(f"DELETE FROM {state_table} WHERE codigo_profissional = ANY(:cods)"),
+                         {"cods": removidos})
+
+        gold_linhas = 0
+        if refresh_gold and _existe(conn, gold_table):
+            ids = sorted(set(_ids_features([c for c, _ in delta])) | set(ids_removidos) | set(reparados))
+            gold_linhas = _refresh_gold(conn, cur, ids, feat_table, prospects_labels_table, gold_table)
+        cur.close()
+
+    print(f"✅ '{feat_table}': {upserts} upserts, {len(ids_removidos)} removidos; "
+          f"'{gold_table}': {gold_linhas} linhas refeitas.")
+    return {"alterados": len(delta), "removidos": len(removidos), "feat_upserts": upserts, "gold_linhas": gold_linhas}
+
+
+def _refresh_gold(conn, cur, ids: List[int], feat_table: str, labels_table: str, gold_table: str) -> int:
+    """Refaz as linhas da gold dos códigos afetados, com o mesmo JOIN (e a mesma serialização) do rebuild completo."""
+    if not ids:
+        return 0
+    tipo = _tipo_coluna(conn, gold_table, "codigo_profissional") or "bigint"
+    chaves = [str(i) for i in ids] if tipo == "text" else ids
+    conn.execute(text(f"DELETE FROM {gold_table} WHERE codigo_profissional = ANY(CAST(:ids AS {tipo}[]))"),
+                 {"ids": chaves})
+
+    join_sql = f"""
+    SELECT
+        a.*,
+        l.prospect_situacao_candidado AS status_label,
+        l.target
+    FROM {feat_table} AS a
+    INNER JOIN {labels_table} AS l
+        ON l.prospect_codigo = a.codigo_profissional
+    WHERE a.codigo_profissional = ANY(:ids)
+    """
+    df = pd.read_sql(text(join_sql), conn, params={"ids": ids})
+    if df.empty:
+        return 0
+    conn.execute(text(f"CREATE TEMP TABLE _gold_delta (LIKE {gold_table}) ON COMMIT DROP"))
+    _copy_df(cur, "_gold_delta", df)
+    cols = ", ".join(f'"{c}"' for c in df.columns)
+    conn.execute(text(f"INSERT INTO {gold_table} ({cols}) SELECT {cols} FROM _gold_delta"))
+    return len(df)
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--raw-table", default="applicants_raw")
+    ap.add_argument("--feat-table", default="applicants_feat")
+    ap.add_argument("--state-table", default="applicants_feat_state")
+    ap.add_argument("--prospects-labels", default="prospects_labels")
+    ap.add_argument("--gold-table", default="gold_applicants")
+    ap.add_argument("--chunk-rows", type=int, default=50_000)
+    ap.add_argument("--no-gold", action="store_true", help="Não atualiza a gold_applicants")
+    args = ap.parse_args()
+    refresh_applicants_feat_incremental(
+        raw_table=args.raw_table,
+        feat_table=args.feat_table,
+        state_table=args.state_table,
+        prospects_labels_table=args.prospects_labels,
+        gold_table=args.gold_table,
+        read_chunk_rows=args.chunk_rows,
+        refresh_gold=not args.no_gold,
+    )
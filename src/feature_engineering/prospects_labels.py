@@ -1,7 +1,8 @@
-import io, math
+import math
 import pandas as pd
 from typing import Optional
 from sqlalchemy import text
+from ..copy_writer import CopyWriter
 from ..utils import make_engine_from_env
 
 # agrupando o que são aprovados e reprovados
@@ -37,12 +38,6 @@ def rotulos_from_raw(df_raw: pd.DataFrame) -> pd.DataFrame:
     df["target"] = df["target"].astype(float)
     return df[["prospect_codigo","prospect_situacao_candidado","target"]]
 
-def _print_percent(done: int, total: int, last_pct: int) -> int:
-    pct = int((done / total) * 100) if total else 100
-    if pct > last_pct:
-        print(f"\rProgresso: {pct:3d}%", end="", flush=True)
-    return pct
-
 def build_and_write_prospects_labels(
     raw_table: str = "prospects_raw",
     labels_table: str = "prospects_labels",
@@ -51,7 +46,7 @@ def build_and_write_prospects_labels(
 ) -> int:
     """
     Lê prospects_raw em chunks, gera labels e grava em prospects_labels via COPY
-    (psycopg2), exibindo progresso 1..100%.
+    (CopyWriter), exibindo progresso 1..100%.
     """
     eng = make_engine_from_env()
 
@@ -65,49 +60,19 @@ def build_and_write_prospects_labels(
     # granularidade ~1% por chunk
     read_chunk_rows = min(read_chunk_rows, max(1, math.ceil(total_raw / 100)))
 
-    created = False
-    inserted = 0
     processed = 0
-    last_pct = -1
 
     print(f"Lendo {total_raw} linhas de '{raw_table}' em chunks de ~{read_chunk_rows}...")
 
-    raw_conn = eng.raw_connection()
-    try:
-        with raw_conn.cursor() as cur:
-            # um pequeno ganho de desempenho na carga
-            cur.execute("SET synchronous_commit = OFF;")
-
-            # stream de leitura em chunks
-            with eng.connect() as rconn:
-                for df_raw in pd.read_sql(text(f"SELECT * FROM {raw_table}"), rconn, chunksize=read_chunk_rows):
-                    processed += len(df_raw)
-                    df_lbl = rotulos_from_raw(df_raw)
-                    if df_lbl.empty:
-                        last_pct = _print_percent(processed, total_raw, last_pct)
-                        continue
-
-                    if not created:
-                        # criar tabela com schema correto
-                        with eng.begin() as c2:
-                            df_lbl.head(0).to_sql(labels_table, c2, if_exists=if_exists, index=False)
-                        cols = ", ".join(f'"{c}"' for c in df_lbl.columns)
-                        copy_sql = f"COPY {labels_table} ({cols}) FROM STDIN WITH (FORMAT CSV, HEADER TRUE, DELIMITER ',')"
-                        created = True
-
-                    # COPY do chunk
-                    buf = io.StringIO()
-                    df_lbl.to_csv(buf, index=False)
-                    buf.seek(0)
-                    cur.copy_expert(copy_sql, buf)
-
-                    inserted += len(df_lbl)
-                    last_pct = _print_percent(processed, total_raw, last_pct)
-
-            raw_conn.commit()
-            print("\rProgresso: 100%")
-    finally:
-        raw_conn.close()
+    with CopyWriter(labels_table, if_exists=if_exists, total=total_raw) as w:
+        # stream de leitura em chunks
+        with eng.connect() as rconn:
+            for df_raw in pd.read_sql(text(f"SELECT * FROM {raw_table}"), rconn, chunksize=read_chunk_rows):
+                processed += len(df_raw)
+                df_lbl = rotulos_from_raw(df_raw)
+                # chunk sem labels só avança o progresso (a tabela é criada no primeiro chunk com linhas)
+                w.write(df_lbl if not df_lbl.empty else df_lbl.iloc[:0, :0], done=processed)
+    inserted = w.rows
 
     print(f"\n✅ '{labels_table}' escrito com {inserted} linhas (a partir de {total_raw} brutas).")
     return inserted
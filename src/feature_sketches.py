@@ -0,0 +1,381 @@
+"""
+Sketches horárias das features servidas (tabela feature_sketch_hourly), para drift e dashboard sem reler
+o payload JSON de cada inferência:
+  - uma linha por (hora, feature) com estatísticas suficientes e aditivas: n (numéricos presentes),
+    n_null (ausentes/não numéricos), n_ones (valor == 1, para flags), soma, soma_sq, min, max e, para as
+    numéricas (salario_valor), um histograma em faixas log fixas (HIST_EDGES);
+  - linhas especiais: __rows__ (inferências na hora), __score__ (n/soma dos scores) e __decision__ (aprovações);
+  - o InferenceLogWriter grava as sketches de cada micro-lote na mesma transação do INSERT no inference_log,
+    com upsert aditivo (ON CONFLICT soma os contadores e os histogramas); várias instâncias da API somam
+    na mesma linha;
+  - leitura: poucas dezenas de linhas por feature, somadas em memória (merge_sketches).
+
+    python -m src.feature_sketches --backfill --hours 48   # recalcula horas completas a partir do inference_log
+"""
+import argparse, json, math, os, re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+TABLE = "feature_sketch_hourly"
+NUMERIC_FEATURES = ("salario_valor",)
+# 40 faixas log entre 100 e 1.000.000 + uma abaixo e uma acima: mesmo corte em todas as horas (somável)
+HIST_EDGES = np.geomspace(100.0, 1_000_000.0, 41)
+N_BINS = len(HIST_EDGES) + 1
+ROWS, SCORE, DECISION = "__rows__", "__score__", "__decision__"
+_RE_FEATURE = re.compile(r"^[A-Za-z0-9_]{1,63}$")
+
+DDL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+  hora     TIMESTAMPTZ NOT NULL,
+  feature  TEXT NOT NULL,
+  n        BIGINT NOT NULL DEFAULT 0,
+  n_null   BIGINT NOT NULL DEFAULT 0,
+  n_ones   BIGINT NOT NULL DEFAULT 0,
+  soma     DOUBLE PRECISION NOT NULL DEFAULT 0,
+  soma_sq  DOUBLE PRECISION NOT NULL DEFAULT 0,
+  vmin     DOUBLE PRECISION,
+  vmax     DOUBLE PRECISION,
+  hist     BIGINT[],
+  PRIMARY KEY (hora, feature)
+)"""
+
+COLUMNS = ("hora", "feature", "n", "n_null", "n_ones", "soma", "soma_sq", "vmin", "vmax", "hist")
+
+UPSERT_SQL = f"""INSERT INTO {TABLE} AS t ({", ".join(COLUMNS)}) VALUES %s
+ON CONFLICT (hora, feature) DO UPDATE SET
+  n = t.n + EXCLUDED.n,
+  n_null = t.n_null + EXCLUDED.n_null,
+  n_ones = t.n_ones + EXCLUDED.n_ones,
+  soma = t.soma + EXCLUDED.soma,
+  soma_sq = t.soma_sq + EXCLUDED.soma_sq,
+  vmin = LEAST(t.vmin, EXCLUDED.vmin),
+  vmax = GREATEST(t.vmax, EXCLUDED.vmax),
+  hist = CASE
+    WHEN t.hist IS NULL THEN EXCLUDED.hist
+    WHEN EXCLUDED.hist IS NULL THEN t.hist
+    ELSE ARRAY(SELECT a + b FROM unnest(t.hist, EXCLUDED.hist) WITH ORDINALITY AS u(a, b, i) ORDER BY i)
+  END"""
+
+
+def hora_utc(ts: Optional[datetime] = None) -> datetime:
+    ts = ts or datetime.now(timezone.utc)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _numero(v: Any) -> float:
+    if isinstance(v, (bool, int, float)):
+        return float(v)
+    if isinstance(v, str):
+        try:
+            return float(v)
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+def _agregar(hora: datetime, feature: str, valores: Sequence[Any], total: int, hist: bool) -> tuple:
+    x = np.fromiter((_numero(v) for v in valores), dtype=np.float64, count=len(valores))
+    x = x[np.isfinite(x)]
+    n = int(x.size)
+    h = None
+    if hist:
+        h = np.bincount(np.searchsorted(HIST_EDGES, x, side="right"), minlength=N_BINS).astype(int).tolist()
+    return (
+        hora, feature, n, int(total - n), int((x == 1).sum()), float(x.sum()), float((x * x).sum()),
+        float(x.min()) if n else None, float(x.max()) if n else None, h,
+    )
+
+
+def sketch_rows(
+    payloads: Sequence[Dict[str, Any]],
+    scores: Optional[Sequence[float]] = None,
+    decisions: Optional[Sequence[int]] = None,
+    hora: Optional[datetime] = None,
+    numeric: Sequence[str] = NUMERIC_FEATURES,
+) -> List[tuple]:
+    """Linhas de sketch (ordem de COLUMNS) de um lote de inferências da mesma hora, ordenadas por feature."""
+    hora = hora_utc(hora)
+    total = len(payloads)
+    if not total:
+        return []
+    valores: Dict[str, List[Any]] = defaultdict(list)
+    for p in payloads:
+        for k, v in p.items():
+            valores[k].append(v)
+    rows = [(hora, ROWS, total, 0, 0, 0.0, 0.0, None, None, None)]
+    for k, vals in valores.items():
+        if _RE_FEATURE.match(k):
+            rows.append(_agregar(hora, k, vals, total, k in numeric))
+    if scores is not None:
+        rows.append(_agregar(hora, SCORE, list(scores), total, False))
+    if decisions is not None:
+        rows.append(_agregar(hora, DECISION, list(decisions), total, False))
+    # ordem fixa das chaves: upserts concorrentes travam as linhas na mesma ordem (sem deadlock)
+    return sorted(rows, key=lambda r: r[1])
+
+
+def sketch_rows_from_log(df: pd.DataFrame, tcol: str = "ts") -> List[tuple]:
+    """Sketches de linhas do inference_log (colunas tcol, payload, score, decision), agrupadas por hora."""
+    rows: List[tuple] = []
+    if df.empty:
+        return rows
+    horas = pd.to_datetime(df[tcol], utc=True).dt.floor("h")
+    for hora, idx in df.groupby(horas).groups.items():
+        parte = df.loc[idx]
+        payloads = [p if isinstance(p, dict) else json.loads(p) for p in parte["payload"]]
+        rows.extend(sketch_rows(
+            payloads,
+            scores=parte["score"].tolist() if "score" in parte else None,
+            decisions=parte["decision"].tolist() if "decision" in parte else None,
+            hora=hora.to_pydatetime(),
+        ))
+    return rows
+
+
+def ensure_table(conn):
+    conn.execute(text(DDL))
+
+
+def upsert(cur, rows: List[tuple]):
+    """Upsert aditivo num cursor psycopg2 (usado pelo writer dentro da transação do inference_log)."""
+    if rows:
+        from psycopg2.extras import execute_values
+        execute_values(cur, UPSERT_SQL, rows, page_size=max(1, len(rows)))
+
+
+# ---------- leitura ----------
+def load_sketches(conn, since: datetime, until: Optional[datetime] = None) -> pd.DataFrame:
+    """Linhas horárias da janela [hora(since), until)."""
+    sql = f"SELECT {', '.join(COLUMNS)} FROM {TABLE} WHERE hora >= :ini" + (" AND hora < :fim" if until else "")
+    params = {"ini": hora_utc(since)}
+    if until:
+        params["fim"] = until
+    return pd.read_sql(text(sql + " ORDER BY hora, feature"), conn, params=params)
+
+
+def merge_sketches(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Soma as linhas horárias por feature: {feature: {n, n_null, n_ones, soma, soma_sq, vmin, vmax, hist, mean, std}}."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for feat, g in df.groupby("feature"):
+        n = int(g["n"].sum())
+        soma, soma_sq = float(g["soma"].sum()), float(g["soma_sq"].sum())
+        hists = [np.asarray(h, dtype=np.int64) for h in g["hist"] if h is not None and len(h) == N_BINS]
+        mean = soma / n if n else math.nan
+        var = max(soma_sq / n - mean * mean, 0.0) if n else math.nan
+        out[feat] = {
+            "n": n, "n_null": int(g["n_null"].sum()), "n_ones": int(g["n_ones"].sum()),
+            "soma": soma, "soma_sq": soma_sq,
+            "vmin": float(g["vmin"].min()) if g["vmin"].notna().any() else None,
+            "vmax": float(g["vmax"].max()) if g["vmax"].notna().any() else None,
+            "hist": np.sum(hists, axis=0) if hists else None,
+            "mean": mean, "std": math.sqrt(var) if n else math.nan,
+        }
+    return out
+
+
+def hist_quantile(hist: np.ndarray, q: float, vmin: Optional[float] = None, vmax: Optional[float] = None) -> float:
+    """Quantil aproximado do histograma (interpolação geométrica dentro da faixa)."""
+    hist = np.asarray(hist, dtype=np.float64)
+    total = hist.sum()
+    if total <= 0:
+        return math.nan
+    alvo = q * total
+    acc = np.cumsum(hist)
+    b = int(np.searchsorted(acc, alvo, side="left"))
+    lo = HIST_EDGES[b - 1] if b > 0 else (vmin if vmin is not None else HIST_EDGES[0])
+    hi = HIST_EDGES[b] if b < len(HIST_EDGES) else (vmax if vmax is not None else HIST_EDGES[-1])
+    antes = acc[b - 1] if b > 0 else 0.0
+    frac = (alvo - antes) / hist[b] if hist[b] else 0.0
+    if lo > 0 and hi > 0:
+        return float(lo * (hi / lo) ** frac)
+    return float(lo + (hi - lo) * frac)
+
+
+def hourly_volume(df: pd.DataFrame) -> pd.DataFrame:
+    """Volume e score médio por hora a partir das linhas __rows__/__score__ (mesmo formato da consulta ao log)."""
+    rows = df[df["feature"] == ROWS].set_index("hora")["n"].rename("n_preds")
+    sc = df[df["feature"] == SCORE].set_index("hora")
+    avg = (sc["soma"] / sc["n"].where(sc["n"] > 0)).rename("avg_score")
+    out = pd.concat([rows, avg], axis=1).reset_index().rename(columns={"index": "hora"})
+    return out.sort_values("hora").reset_index(drop=True)
+
+
+# ---------- backfill ----------
+def log_time_column(conn) -> str:
+    cols = set(conn.execute(text("SELECT * FROM inference_log LIMIT 0")).keys())
+    return "ts" if "ts" in cols else "created_at"
+
+
+def table_exists(conn) -> bool:
+    return conn.execute(text("SELECT to_regclass(:t)"), {"t": TABLE}).scalar() is not None
+
+
+def _log_tipado(conn) -> bool:
+    """INFERENCE_LOG_MODE=typed e inference_log_typed existe: sketches saem de GROUP BY nas colunas tipadas."""
+    if os.getenv("INFERENCE_LOG_MODE", "json").lower() != "typed":
+        return False
+    from src import inference_log_typed
+    return inference_log_typed.table_exists(conn)
+
+
+def log_hourly_counts(conn, since: datetime) -> Dict[datetime, int]:
+    """Inferências por hora no log desde hora(since) (inference_log_typed no modo typed): só count(*), sem payload."""
+    if _log_tipado(conn):
+        tab, tcol = "inference_log_typed", "ts"
+    elif conn.execute(text("SELECT to_regclass('inference_log')")).scalar() is not None:
+        tab, tcol = "inference_log", log_time_column(conn)
+    else:
+        return {}
+    rows = conn.execute(text(
+        f"SELECT date_trunc('hour', {tcol} AT TIME ZONE 'UTC'), count(*) FROM {tab} WHERE {tcol} >= :ini GROUP BY 1"
+    ), {"ini": hora_utc(since)}).fetchall()
+    return {hora_utc(h): int(n) for h, n in rows}
+
+
+def incomplete_hours(sketches: pd.DataFrame, log_counts: Dict[datetime, int]) -> List[datetime]:
+    """Horas com menos inferências nas sketches (__rows__) que no log: sem sketch (ligadas no meio da janela)
+    ou com lote perdido (savepoint de sketches desfeito no writer)."""
+    rows = sketches[sketches["feature"] == ROWS]
+    n_sk = {hora_utc(pd.Timestamp(h).to_pydatetime()): int(n) for h, n in zip(rows["hora"], rows["n"])}
+    return sorted(h for h, n in log_counts.items() if n > n_sk.get(h, 0))
+
+
+def _faixas(horas: Sequence[datetime]) -> List[tuple]:
+    """Horas consecutivas agrupadas em intervalos [ini, fim) (uma consulta ao log por intervalo)."""
+    faixas: List[list] = []
+    for h in horas:
+        if faixas and faixas[-1][1] == h:
+            faixas[-1][1] = h + timedelta(hours=1)
+        else:
+            faixas.append([h, h + timedelta(hours=1)])
+    return [tuple(f) for f in faixas]
+
+
+def _sketches_do_log(conn, ini: datetime, fim: Optional[datetime] = None):
+    """Linhas de sketch calculadas do log no intervalo [ini, fim): (DataFrame, origem)."""
+    if _log_tipado(conn):
+        from src import inference_log_typed
+        return inference_log_typed.sketch_frame(conn, ini, fim), "inference_log_typed"
+    tcol = log_time_column(conn)
+    sql = f"SELECT {tcol}, payload, score, decision FROM inference_log WHERE {tcol} >= :ini"
+    params = {"ini": ini}
+    if fim is not None:
+        sql += f" AND {tcol} < :fim"
+        params["fim"] = fim
+    raw = pd.read_sql(text(sql), conn, params=params)
+    return pd.DataFrame(sketch_rows_from_log(raw, tcol), columns=list(COLUMNS)), "inference_log"
+
+
+def snapshot_engine(engine):
+    """
+    Engine cujas transações leem um snapshot único (REPEATABLE READ): sketches e contagens do log lidas na mesma
+    transação batem, já que o writer grava as linhas do log e as sketches no mesmo commit. Em READ COMMITTED um
+    flush entre as duas consultas deixa a hora corrente com mais linhas no log que em __rows__.
+    """
+    return engine.execution_options(isolation_level="REPEATABLE READ")
+
+
+def fill_gaps(conn, sketches: pd.DataFrame, since: datetime):
+    """
+    Completa as sketches da janela com o log: horas incompletas (ver incomplete_hours) são descartadas e
+    recalculadas do log. Retorna (DataFrame, origem): "sketches" se nada faltava, "sketches+<log>" se não.
+    `sketches` deve ter sido lida na mesma transação de `conn`, aberta com snapshot_engine.
+    """
+    faltando = incomplete_hours(sketches, log_hourly_counts(conn, since))
+    if not faltando:
+        return sketches, "sketches"
+    horas = pd.to_datetime(sketches["hora"], utc=True)
+    partes, origem = [sketches[~horas.isin(pd.DatetimeIndex(faltando))]], "inference_log"
+    for ini, fim in _faixas(faltando):
+        df, origem = _sketches_do_log(conn, ini, fim)
+        partes.append(df)
+    partes = [p for p in partes if not p.empty]
+    df = pd.concat(partes, ignore_index=True) if partes else sketches.iloc[0:0]
+    df = df.assign(hora=pd.to_datetime(df["hora"], utc=True)).sort_values(["hora", "feature"]).reset_index(drop=True)
+    return df, f"sketches+{origem}"
+
+
+def window_sketches(conn, hours: int = 24):
+    """
+    Linhas de sketch das últimas `hours` horas: da tabela, com as horas que faltam (ou com menos inferências
+    que o log) recalculadas do log; sem sketches na janela, tudo do log (inference_log_typed em SQL ou payloads
+    do inference_log, só até o writer/backfill popularem a tabela).
+    Retorna (DataFrame, origem): "sketches", "sketches+<log>" ou o log. Use uma conexão de snapshot_engine.
+    """
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    if table_exists(conn):
+        df = load_sketches(conn, since)
+        if not df.empty:
+            return fill_gaps(conn, df, since)
+    return _sketches_do_log(conn, since)
+
+
+def backfill(engine, hours: int = 48, chunk: int = 50_000) -> int:
+    """
+    Recalcula as sketches das horas completas das últimas `hours` horas a partir do inference_log
+    (ou do inference_log_typed no modo typed; apaga e regrava cada hora: idempotente). A hora corrente
+    fica com o writer.
+    """
+    fim = hora_utc()
+    ini = fim - timedelta(hours=hours)
+    total = 0
+    with engine.begin() as c:
+        ensure_table(c)
+        c.execute(text(f"DELETE FROM {TABLE} WHERE hora >= :ini AND hora < :fim"), {"ini": ini, "fim": fim})
+        raw = c.connection.driver_connection
+        if _log_tipado(c):
+            from src import inference_log_typed
+            rows = inference_log_typed.sketch_rows_sql(c, ini, fim)
+            with raw.cursor() as cur:
+                upsert(cur, rows)
+            return sum(r[2] for r in rows if r[1] == ROWS)
+        tcol = log_time_column(c)
+        acumulado: Dict[tuple, list] = {}
+        for parte in pd.read_sql(
+            text(f"SELECT {tcol}, payload, score, decision FROM inference_log WHERE {tcol} >= :ini AND {tcol} < :fim"),
+            c, params={"ini": ini, "fim": fim}, chunksize=chunk,
+        ):
+            total += len(parte)
+            for r in sketch_rows_from_log(parte, tcol):
+                _somar_linha(acumulado, r)
+        with raw.cursor() as cur:
+            upsert(cur, sorted(acumulado.values(), key=lambda r: (r[0], r[1])))
+    return total
+
+
+def _somar_linha(acc: Dict[tuple, list], r: tuple):
+    # mesma semântica do upsert: chunks diferentes podem trazer a mesma (hora, feature)
+    k = (r[0], r[1])
+    atual = acc.get(k)
+    if atual is None:
+        acc[k] = r
+        return
+    mins = [v for v in (atual[7], r[7]) if v is not None]
+    maxs = [v for v in (atual[8], r[8]) if v is not None]
+    hist = atual[9] if r[9] is None else r[9] if atual[9] is None else [a + b for a, b in zip(atual[9], r[9])]
+    acc[k] = (r[0], r[1], atual[2] + r[2], atual[3] + r[3], atual[4] + r[4], atual[5] + r[5], atual[6] + r[6],
+              min(mins) if mins else None, max(maxs) if maxs else None, hist)
+
+
+if __name__ == "__main__":
+    from .utils import load_env, make_engine_from_env
+    load_env()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backfill", action="store_true", help="Recalcula as sketches a partir do inference_log")
+    ap.add_argument("--hours", type=int, default=48)
+    args = ap.parse_args()
+    eng = make_engine_from_env()
+    if args.backfill:
+        n = backfill(eng, hours=args.hours)
+        print(f"✅ Sketches recalculadas: {n} inferências das últimas {args.hours}h")
+    else:
+        with eng.begin() as c:
+            ensure_table(c)
+        print(f"✅ Tabela {TABLE} pronta")
@@ -0,0 +1,303 @@
+"""
+inference_log tipado (tabela inference_log_typed), alternativa ao payload JSON por linha:
+  - uma coluna por feature dos modelos servidos: flags em SMALLINT, numéricas (salario_valor) em REAL;
+    valores que não cabem no tipo e chaves fora das colunas vão para `extra` (jsonb, normalmente NULL);
+  - particionada por dia (RANGE em ts, partições inference_log_typed_pAAAAMMDD) com índice BRIN em ts:
+    consultas por janela leem só as partições/blocos do período; retenção = DROP da partição inteira;
+  - o InferenceLogWriter grava aqui com INFERENCE_LOG_MODE=typed (cria colunas e partições sob demanda);
+  - sketches de drift/volume saem de um GROUP BY em SQL (sketch_rows_sql), sem parse de JSON.
+
+    python -m src.inference_log_typed --migrate                 # copia o inference_log (JSON) para a tabela tipada
+    python -m src.inference_log_typed --retention-days 30       # remove partições mais antigas que 30 dias
+"""
+import argparse, io, json, math, re
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+from sqlalchemy import text
+
+from src.feature_sketches import (
+    COLUMNS as SKETCH_COLUMNS, DECISION, HIST_EDGES, N_BINS, NUMERIC_FEATURES, ROWS, SCORE, hora_utc,
+)
+
+TABLE = "inference_log_typed"
+# colunas fixas, na ordem das linhas do writer (ts + INSERT_SQL do inference_log sem o payload)
+BASE_COLUMNS = ("ts", "model_mode", "model_threshold", "model_created_at", "model_path", "score", "decision",
+                "codigo_profissional", "extra")
+SMALLINT_MIN, SMALLINT_MAX = -32768, 32767
+_RE_COLUNA = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+_RE_PARTICAO = re.compile(rf"^{TABLE}_p(\d{{8}})$")
+
+DDL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+  ts                  TIMESTAMPTZ NOT NULL,
+  model_mode          TEXT,
+  model_threshold     REAL,
+  model_created_at    TEXT,
+  model_path          TEXT,
+  score               REAL,
+  decision            SMALLINT,
+  codigo_profissional BIGINT,
+  extra               JSONB
+) PARTITION BY RANGE (ts);
+CREATE INDEX IF NOT EXISTS {TABLE}_ts_brin ON {TABLE} USING brin (ts)"""
+
+
+def column_type(feature: str) -> str:
+    return "REAL" if feature in NUMERIC_FEATURES else "SMALLINT"
+
+
+def valid_columns(features: Iterable[str]) -> List[str]:
+    """Features que viram coluna (nome SQL simples, fora das colunas fixas), ordenadas."""
+    return sorted({f for f in features if _RE_COLUNA.match(f) and f not in BASE_COLUMNS})
+
+
+def partition_name(dia: date) -> str:
+    return f"{TABLE}_p{dia:%Y%m%d}"
+
+
+# ---------- DDL (cursor psycopg2: o writer chama dentro da transação do INSERT) ----------
+def ensure_schema(cur, features: Sequence[str] = ()):
+    """Tabela particionada + BRIN + uma coluna por feature (ADD COLUMN IF NOT EXISTS propaga às partições)."""
+    cur.execute(DDL)
+    for f in valid_columns(features):
+        cur.execute(f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS {f} {column_type(f)}")
+
+
+def ensure_partitions(cur, dias: Iterable[date]):
+    for d in sorted(set(dias)):
+        fim = d + timedelta(days=1)
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {partition_name(d)} PARTITION OF {TABLE} "
+                    f"FOR VALUES FROM ('{d.isoformat()} 00:00:00+00') TO ('{fim.isoformat()} 00:00:00+00')")
+
+
+def list_partitions(conn) -> Dict[date, str]:
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:t)"
+    ), {"t": TABLE}).fetchall()
+    out = {}
+    for (nome,) in rows:
+        m = _RE_PARTICAO.match(nome)
+        if m:
+            out[datetime.strptime(m.group(1), "%Y%m%d").date()] = nome
+    return out
+
+
+def drop_old_partitions(conn, retention_days: int, hoje: Optional[date] = None) -> List[str]:
+    """Remove as partições de dias anteriores a hoje - retention_days (DROP: sem VACUUM nem DELETE linha a linha)."""
+    corte = (hoje or datetime.now(timezone.utc).date()) - timedelta(days=int(retention_days))
+    removidas = []
+    for dia, nome in sorted(list_partitions(conn).items()):
+        if dia < corte:
+            conn.execute(text(f"DROP TABLE IF EXISTS {nome}"))
+            removidas.append(nome)
+    return removidas
+
+
+def table_exists(conn) -> bool:
+    return conn.execute(text("SELECT to_regclass(:t)"), {"t": TABLE}).scalar() is not None
+
+
+# ---------- linhas ----------
+def _tipar(v: Any, tipo: str):
+    """Valor para a coluna (None se não couber no tipo)."""
+    if v is None or isinstance(v, str) and not v.strip():
+        return None
+    if isinstance(v, str):
+        try:
+            v = float(v)
+        except ValueError:
+            return None
+    if not isinstance(v, (bool, int, float)) or not math.isfinite(v):
+        return None
+    if tipo == "REAL":
+        return float(v)
+    if float(v).is_integer() and SMALLINT_MIN <= v <= SMALLINT_MAX:
+        return int(v)
+    return None
+
+
+def typed_row(ts: datetime, registro: Sequence[Any], columns: Sequence[str], tipos: Sequence[str]) -> tuple:
+    """
+    registro na ordem do INSERT_SQL do inference_log (mode, threshold, created_at, path, score, decision,
+    codigo, payload dict) -> tupla na ordem BASE_COLUMNS + columns.
+    """
+    payload = registro[-1] or {}
+    vals = []
+    extra = {}
+    for c, t in zip(columns, tipos):
+        v = payload.get(c)
+        tv = _tipar(v, t)
+        if tv is None and v is not None:
+            extra[c] = v
+        vals.append(tv)
+    conhecidas = set(columns)
+    for k, v in payload.items():
+        if k not in conhecidas:
+            extra[k] = v
+    return (ts, *registro[:-1], json.dumps(extra, default=str) if extra else None, *vals)
+
+
+_ESCAPE = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _campo(v: Any) -> str:
+    if v is None:
+        return "\\N"
+    if isinstance(v, str):
+        return v.translate(_ESCAPE)
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return str(v)
+
+
+def copy_text(rows: Iterable[Sequence[Any]]) -> str:
+    """Linhas no formato texto do COPY (tab, \\N = NULL). Mais barato que execute_values com ~50 colunas por linha."""
+    return "".join("\t".join(map(_campo, r)) + "\n" for r in rows)
+
+
+def copy_sql(columns: Sequence[str]) -> str:
+    return f"COPY {TABLE} ({', '.join((*BASE_COLUMNS, *columns))}) FROM STDIN"
+
+
+def insert(cur, registros: Sequence[Sequence[Any]], columns: Sequence[str],
+           ts: Union[None, datetime, Sequence[datetime]] = None):
+    """
+    Grava um lote (mesmas linhas do writer) com um COPY FROM STDIN; columns já devem existir.
+    ts: um horário para o lote todo ou um por registro (horário de cada requisição).
+    """
+    if ts is None or isinstance(ts, datetime):
+        ts = [ts or datetime.now(timezone.utc)] * len(registros)
+    tipos = [column_type(c) for c in columns]
+    if registros:
+        cur.copy_expert(copy_sql(columns), io.StringIO(copy_text(
+            typed_row(t, r, columns, tipos) for t, r in zip(ts, registros))))
+
+
+# ---------- sketches em SQL ----------
+def existing_columns(conn) -> List[str]:
+    rows = conn.execute(text(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = :t ORDER BY column_name"
+    ), {"t": TABLE}).fetchall()
+    return [r[0] for r in rows if r[0] not in BASE_COLUMNS]
+
+
+def sketch_rows_sql(conn, ini: datetime, fim: Optional[datetime] = None) -> List[tuple]:
+    """
+    Linhas de sketch (ordem de feature_sketches.COLUMNS) por hora direto das colunas tipadas: um GROUP BY
+    por hora com count/sum/min/max por coluna e um segundo para o histograma (width_bucket = mesmas faixas).
+    """
+    cols = existing_columns(conn)
+    where = "ts >= :ini" + (" AND ts < :fim" if fim else "")
+    params: Dict[str, Any] = {"ini": ini, **({"fim": fim} if fim else {})}
+    alvos = [(SCORE, "score"), (DECISION, "decision")] + [(c, c) for c in cols]
+    sel = ["count(*)"]
+    for _, expr in alvos:
+        sel += [f"count({expr})", f"count(*) FILTER (WHERE {expr} = 1)", f"coalesce(sum({expr}::float8), 0)",
+                f"coalesce(sum({expr}::float8 * {expr}::float8), 0)", f"min({expr})", f"max({expr})"]
+    hora_sql = "date_trunc('hour', ts AT TIME ZONE 'UTC')"
+    res = conn.execute(text(
+        f"SELECT {hora_sql}, {', '.join(sel)} FROM {TABLE} WHERE {where} GROUP BY 1"
+    ), params).fetchall()
+
+    numericas = [c for c in cols if c in NUMERIC_FEATURES]
+    hists: Dict[tuple, List[int]] = {}
+    if numericas:
+        edges = "ARRAY[" + ",".join(repr(float(e)) for e in HIST_EDGES) + "]::float8[]"
+        for c in numericas:
+            for hora, b, n in conn.execute(text(
+                f"SELECT {hora_sql}, width_bucket({c}::float8, {edges}), count(*) FROM {TABLE} "
+                f"WHERE {where} AND {c} IS NOT NULL GROUP BY 1, 2"
+            ), params):
+                hists.setdefault((hora_utc(hora), c), [0] * N_BINS)[b] += int(n)
+
+    rows: List[tuple] = []
+    for r in res:
+        hora, total = hora_utc(r[0]), int(r[1])
+        rows.append((hora, ROWS, total, 0, 0, 0.0, 0.0, None, None, None))
+        for i, (nome, _) in enumerate(alvos):
+            n, ones, soma, soma_sq, vmin, vmax = r[2 + 6 * i: 8 + 6 * i]
+            if nome not in (SCORE, DECISION) and not n:
+                continue   # coluna de outro modelo, ausente nesta hora (payload sem a chave)
+            rows.append((hora, nome, int(n), total - int(n), int(ones), float(soma), float(soma_sq),
+                         None if vmin is None else float(vmin), None if vmax is None else float(vmax),
+                         hists.get((hora, nome), [0] * N_BINS) if nome in NUMERIC_FEATURES else None))
+    return sorted(rows, key=lambda x: (x[0], x[1]))
+
+
+def sketch_frame(conn, ini: datetime, fim: Optional[datetime] = None) -> pd.DataFrame:
+    return pd.DataFrame(sketch_rows_sql(conn, ini, fim), columns=list(SKETCH_COLUMNS))
+
+
+# ---------- migração do inference_log (JSON) ----------
+def migrate(engine, since: Optional[datetime] = None, chunk: int = 50_000) -> int:
+    """
+    Copia o inference_log para a tabela tipada (colunas = chaves dos payloads), lendo por cursor de servidor.
+    Idempotente: apaga antes as linhas tipadas do intervalo [since, último ts do log] e regrava.
+    """
+    from src.feature_sketches import log_time_column
+    total = 0
+    with engine.begin() as c:
+        tcol = log_time_column(c)
+        ini, fim = c.execute(text(f"SELECT min({tcol}), max({tcol}) FROM inference_log")).one()
+        if fim is None:
+            return 0
+        ini = max(ini, since) if since else ini
+        chaves = [r[0] for r in c.execute(text(
+            f"SELECT DISTINCT jsonb_object_keys(payload::jsonb) FROM inference_log WHERE {tcol} >= :ini"
+        ), {"ini": ini})]
+        cols = valid_columns(chaves)
+        tipos = [column_type(col) for col in cols]
+        raw = c.connection.driver_connection
+        with raw.cursor() as cur:
+            ensure_schema(cur, cols)
+            ensure_partitions(cur, _dias(ini, fim))
+            cur.execute(f"DELETE FROM {TABLE} WHERE ts >= %s AND ts <= %s", (ini, fim))
+        with raw.cursor(name="inference_log_migrate") as src, raw.cursor() as dst:
+            src.itersize = chunk
+            src.execute(
+                f"SELECT {tcol}, model_mode, model_threshold, model_created_at, model_path, score, decision, "
+                f"codigo_profissional, payload FROM inference_log WHERE {tcol} >= %s AND {tcol} <= %s", (ini, fim))
+            while True:
+                parte = src.fetchmany(chunk)
+                if not parte:
+                    break
+                rows = [typed_row(r[0], (*r[1:-1], r[-1] if isinstance(r[-1], dict) else json.loads(r[-1])),
+                                  cols, tipos) for r in parte]
+                dst.copy_expert(copy_sql(cols), io.StringIO(copy_text(rows)))
+                total += len(rows)
+    return total
+
+
+def _dias(ini: datetime, fim: datetime) -> List[date]:
+    ini, fim = ini.astimezone(timezone.utc).date(), fim.astimezone(timezone.utc).date()
+    return [ini + timedelta(days=i) for i in range((fim - ini).days + 1)]
+
+
+if __name__ == "__main__":
+    import os
+    from .utils import load_env, make_engine_from_env
+    load_env()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--migrate", action="store_true", help="Copia o inference_log (JSON) para a tabela tipada")
+    ap.add_argument("--retention-days", type=int, default=None,
+                    help="Remove partições mais antigas (padrão: INFERENCE_LOG_RETENTION_DAYS, 0 = não remove)")
+    args = ap.parse_args()
+    eng = make_engine_from_env()
+    if args.migrate:
+        n = migrate(eng)
+        print(f"✅ {n} linhas do inference_log copiadas para {TABLE}")
+    dias = args.retention_days
+    if dias is None:
+        dias = int(os.getenv("INFERENCE_LOG_RETENTION_DAYS", "0"))
+    with eng.begin() as c:
+        hoje = datetime.now(timezone.utc).date()
+        with c.connection.driver_connection.cursor() as cur:
+            ensure_schema(cur)
+            ensure_partitions(cur, [hoje, hoje + timedelta(days=1)])
+        if dias > 0:
+            removidas = drop_old_partitions(c, dias)
+            print(f"✅ Retenção de {dias} dias: {len(removidas)} partições removidas")
+    print(f"✅ Tabela {TABLE} pronta")
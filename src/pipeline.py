@@ -0,0 +1,314 @@
+"""
+Orquestrador do pipeline batch (ingestões -> features/labels -> gold -> treino -> baseline):
+  - cada etapa declara dependências e entradas; a impressão digital da etapa junta o sha256 dos arquivos
+    (JSONs, artefato), o table_fingerprint das tabelas lidas (filenode, contagem, hash de xmin/ctid) e as
+    variáveis de ambiente que mudam o resultado;
+  - etapa com a mesma impressão digital da última execução ok (e saídas presentes) é pulada; como as
+    entradas de uma etapa são as saídas da anterior, uma etapa que roda de novo invalida as seguintes;
+  - ramos independentes (applicants e prospects) rodam em paralelo; cada etapa é o `python -m` de sempre
+    num subprocesso (sem GIL compartilhado nem memória acumulada entre etapas);
+  - cada etapa grava uma linha em pipeline_runs (run_id, status, impressão digital, duração); falha de
+    uma etapa bloqueia só as que dependem dela.
+
+    python -m src.pipeline                      # roda o que mudou
+    python -m src.pipeline --dry-run            # mostra o plano
+    python -m src.pipeline --force gold         # refaz gold (e, por consequência, treino e baseline)
+    python -m src.pipeline --only train baseline
+"""
+import argparse, hashlib, os, subprocess, sys, time, uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import inspect, text
+
+from .utils import table_fingerprint
+
+TABLE = "pipeline_runs"
+AUSENTE = "ausente"
+
+DDL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,            -- ok | skipped | failed | blocked
+    fingerprint TEXT,
+    started_at TIMESTAMPTZ NOT NULL,
+    fingerprint_s DOUBLE PRECISION,  -- tempo gasto calculando a impressão digital
+    duration_s DOUBLE PRECISION,
+    error TEXT,
+    PRIMARY KEY (run_id, stage)
+)"""
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    run: Callable[[], object]
+    deps: Tuple[str, ...] = ()
+    files: Tuple[str, ...] = ()        # entradas em arquivo/diretório (sha256 do conteúdo)
+    tables: Tuple[str, ...] = ()       # entradas em tabela (table_fingerprint)
+    env: Tuple[str, ...] = ()          # variáveis de ambiente que mudam o resultado
+    out_tables: Tuple[str, ...] = ()   # saídas: se sumirem, a etapa roda mesmo sem mudança nas entradas
+    out_files: Tuple[str, ...] = ()
+
+
+class StageResult(NamedTuple):
+    stage: str
+    status: str
+    fingerprint: Optional[str]
+    fingerprint_s: float
+    duration_s: float
+    error: Optional[str] = None
+
+
+def file_sha256(path: str, block: int = 1 << 20) -> str:
+    """sha256 do conteúdo; diretório (artefato em formato diretório) = caminhos relativos + conteúdo."""
+    if not os.path.exists(path):
+        return AUSENTE
+    h = hashlib.sha256()
+    if os.path.isdir(path):
+        arquivos = sorted(os.path.join(r, f) for r, _, fs in os.walk(path) for f in fs)
+    else:
+        arquivos = [path]
+    for arq in arquivos:
+        h.update(os.path.relpath(arq, path).encode())
+        with open(arq, "rb") as fh:
+            while parte := fh.read(block):
+                h.update(parte)
+    return h.hexdigest()
+
+
+def stage_fingerprint(conn, stage: Stage) -> str:
+    partes = [f"file:{p}={file_sha256(p)}" for p in stage.files]
+    insp = inspect(conn)
+    for t in stage.tables:
+        partes.append(f"table:{t}={table_fingerprint(conn, t) if insp.has_table(t) else AUSENTE}")
+    partes += [f"env:{k}={os.getenv(k, '')}" for k in stage.env]
+    return hashlib.sha1("\n".join(partes).encode()).hexdigest()[:16]
+
+
+def outputs_exist(conn, stage: Stage) -> bool:
+    insp = inspect(conn)
+    return all(insp.has_table(t) for t in stage.out_tables) and all(os.path.exists(p) for p in stage.out_files)
+
+
+def ensure_history(conn):
+    conn.execute(text(DDL))
+
+
+def last_fingerprint(conn, stage: str) -> Optional[str]:
+    return conn.execute(text(
+        f"SELECT fingerprint FROM {TABLE} WHERE stage = :s AND status = 'ok' ORDER BY started_at DESC LIMIT 1"
+    ), {"s": stage}).scalar()
+
+
+def record(conn, run_id: str, started_at: datetime, r: StageResult):
+    conn.execute(text(
+        f"INSERT INTO {TABLE} (run_id, stage, status, fingerprint, started_at, fingerprint_s, duration_s, error) "
+        f"VALUES (:run_id, :stage, :status, :fp, :started_at, :fp_s, :dur, :error)"
+    ), {"run_id": run_id, "stage": r.stage, "status": r.status, "fp": r.fingerprint, "started_at": started_at,
+        "fp_s": r.fingerprint_s, "dur": r.duration_s, "error": r.error})
+
+
+def topological_order(stages: Sequence[Stage]) -> List[str]:
+    """Nomes em ordem de dependência; erro para dependência desconhecida ou ciclo."""
+    por_nome = {s.name: s for s in stages}
+    for s in stages:
+        faltando = [d for d in s.deps if d not in por_nome]
+        if faltando:
+            raise ValueError(f"Etapa '{s.name}' depende de etapa desconhecida: {faltando}")
+    ordem, visitando, feitas = [], set(), set()
+
+    def visitar(n: str):
+        if n in feitas:
+            return
+        if n in visitando:
+            raise ValueError(f"Ciclo de dependências envolvendo '{n}'")
+        visitando.add(n)
+        for d in por_nome[n].deps:
+            visitar(d)
+        visitando.discard(n)
+        feitas.add(n)
+        ordem.append(n)
+
+    for s in stages:
+        visitar(s.name)
+    return ordem
+
+
+def _executar(engine, stage: Stage, forcar: bool, run_id: str) -> StageResult:
+    started_at = datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+    with engine.connect() as c:
+        fp = stage_fingerprint(c, stage)
+        atualizada = not forcar and fp == last_fingerprint(c, stage.name) and outputs_exist(c, stage)
+    fp_s = time.perf_counter() - t0
+    if atualizada:
+        r = StageResult(stage.name, "skipped", fp, fp_s, fp_s)
+        print(f"⏭️  {stage.name}: entradas inalteradas ({fp})")
+    else:
+        print(f"▶️  {stage.name}")
+        try:
+            stage.run()
+            r = StageResult(stage.name, "ok", fp, fp_s, time.perf_counter() - t0)
+            print(f"✅ {stage.name} em {r.duration_s:.1f}s")
+        except Exception as e:
+            r = StageResult(stage.name, "failed", fp, fp_s, time.perf_counter() - t0, repr(e))
+            print(f"❌ {stage.name} falhou: {e!r}")
+    with engine.begin() as c:
+        record(c, run_id, started_at, r)
+    return r
+
+
+def _selecionar(stages: Sequence[Stage], only: Optional[Iterable[str]]) -> Dict[str, Stage]:
+    por_nome = {s.name: s for s in stages}
+    alvo = set(only) if only else set(por_nome)
+    desconhecidas = alvo - set(por_nome)
+    if desconhecidas:
+        raise ValueError(f"Etapas desconhecidas: {sorted(desconhecidas)}")
+    return {n: por_nome[n] for n in topological_order(stages) if n in alvo}
+
+
+def _forcadas(force, nomes: Iterable[str]) -> set:
+    # force: True = todas; lista de nomes = só essas (as seguintes rodam porque as entradas mudam)
+    return set(nomes) if force is True else set(force or ())
+
+
+def run_pipeline(engine, stages: Sequence[Stage], only: Optional[Iterable[str]] = None, force=(),
+                 workers: int = 2, run_id: Optional[str] = None) -> List[StageResult]:
+    """
+    Roda as etapas selecionadas respeitando as dependências, `workers` de cada vez.
+    Dependências fora de `only` são consideradas satisfeitas (não rodam nem são checadas).
+    """
+    sel = _selecionar(stages, only)
+    forcadas = _forcadas(force, sel)
+    run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S-") + uuid.uuid4().hex[:6]
+    with engine.begin() as c:
+        ensure_history(c)
+
+    pendentes = {n: {d for d in s.deps if d in sel} for n, s in sel.items()}
+    resultados: Dict[str, StageResult] = {}
+    falhas = set()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="pipeline") as ex:
+        rodando = {}
+        while pendentes or rodando:
+            # ordem topológica: o bloqueio de uma etapa já vale para as seguintes nesta mesma passada
+            for n in list(pendentes):
+                if not pendentes[n] & falhas:
+                    continue
+                r = StageResult(n, "blocked", None, 0.0, 0.0, f"dependência falhou: {sorted(pendentes[n] & falhas)}")
+                print(f"⛔ {n}: não executada ({r.error})")
+                with engine.begin() as c:
+                    record(c, run_id, datetime.now(timezone.utc), r)
+                resultados[n] = r
+                falhas.add(n)
+                del pendentes[n]
+            for n in [n for n, deps in pendentes.items() if deps <= resultados.keys() and not deps & falhas]:
+                rodando[ex.submit(_executar, engine, sel[n], n in forcadas, run_id)] = n
+                del pendentes[n]
+            if not rodando:
+                continue
+            feitos, _ = wait(rodando, return_when=FIRST_COMPLETED)
+            for f in feitos:
+                r = f.result()
+                resultados[rodando.pop(f)] = r
+                if r.status == "failed":
+                    falhas.add(r.stage)
+    return [resultados[n] for n in sel]
+
+
+def plan(engine, stages: Sequence[Stage], only: Optional[Iterable[str]] = None, force=()) -> List[Tuple[str, str]]:
+    """(etapa, motivo) sem executar nada: 'atualizada', 'forçada', 'entradas mudaram', 'saídas ausentes' ou
+    'dependência vai rodar' (as entradas dela vão mudar)."""
+    sel = _selecionar(stages, only)
+    forcadas = _forcadas(force, sel)
+    vao_rodar, linhas = set(), []
+    with engine.begin() as c:
+        ensure_history(c)
+        for n, s in sel.items():
+            if n in forcadas:
+                motivo = "forçada"
+            elif any(d in vao_rodar for d in s.deps):
+                motivo = "dependência vai rodar"
+            elif stage_fingerprint(c, s) != last_fingerprint(c, n):
+                motivo = "entradas mudaram"
+            elif not outputs_exist(c, s):
+                motivo = "saídas ausentes"
+            else:
+                motivo = "atualizada"
+            if motivo != "atualizada":
+                vao_rodar.add(n)
+            linhas.append((n, motivo))
+    return linhas
+
+
+def _modulo(mod: str, *args: str) -> Callable[[], None]:
+    def run():
+        subprocess.run([sys.executable, "-m", mod, *args], check=True)
+    return run
+
+
+def default_stages() -> List[Stage]:
+    """Etapas do projeto, configuradas por env (mesmos padrões dos comandos do README)."""
+    applicants_json = os.getenv("PIPELINE_APPLICANTS_JSON", "./data/applicants.json")
+    prospects_json = os.getenv("PIPELINE_PROSPECTS_JSON", "./data/prospects.json")
+    artifact = os.getenv("MODEL_ARTIFACT", "artifacts/modelo_prec80.joblib")
+    stream = ("--stream",) if os.getenv("PIPELINE_STREAM", "0") == "1" else ()
+    feat_workers = os.getenv("PIPELINE_FEAT_WORKERS", "1")
+    return [
+        Stage("applicants_ingest",
+              _modulo("src.preprocessing.applicants_ingest", "--json", applicants_json,
+                      "--table", "applicants_raw", *stream),
+              files=(applicants_json,), out_tables=("applicants_raw",)),
+        Stage("prospects_ingest",
+              _modulo("src.preprocessing.prospects_ingest", "--json", prospects_json,
+                      "--table", "prospects_raw", *stream),
+              files=(prospects_json,), out_tables=("prospects_raw",)),
+        Stage("applicants_features",
+              _modulo("src.feature_engineering.applicants_features", "--raw-table", "applicants_raw",
+                      "--feat-table", "applicants_feat", "--workers", feat_workers),
+              deps=("applicants_ingest",), tables=("applicants_raw",), out_tables=("applicants_feat",)),
+        Stage("prospects_labels",
+              _modulo("src.feature_engineering.prospects_labels", "--raw-table", "prospects_raw",
+                      "--labels-table", "prospects_labels"),
+              deps=("prospects_ingest",), tables=("prospects_raw",), out_tables=("prospects_labels",)),
+        Stage("gold",
+              _modulo("src.feature_engineering.gold", "--applicants-feat", "applicants_feat",
+                      "--prospects-labels", "prospects_labels", "--gold-table", "gold_applicants"),
+              deps=("applicants_features", "prospects_labels"), tables=("applicants_feat", "prospects_labels"),
+              out_tables=("gold_applicants",)),
+        Stage("train", _modulo("src.training.train"),
+              deps=("gold",), tables=("gold_applicants",), env=("MIN_PRECISAO", "MODEL_MODE", "MODEL_ARTIFACT"),
+              out_files=(artifact,)),
+        # baseline muda com a gold e com o artefato (model_path fica registrado na linha)
+        Stage("baseline", _modulo("monitoring.record_baseline"),
+              deps=("train",), tables=("gold_applicants",), files=(artifact,), out_tables=("model_baseline",)),
+    ]
+
+
+if __name__ == "__main__":
+    from .utils import load_env, make_engine_from_env
+    load_env()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--only", nargs="+", help="Roda só estas etapas (dependências fora da lista não são checadas)")
+    ap.add_argument("--force", nargs="*", help="Ignora as impressões digitais (sem nomes = todas as etapas)")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("PIPELINE_WORKERS", "2")),
+                    help="Etapas em paralelo (ramos independentes)")
+    ap.add_argument("--dry-run", action="store_true", help="Só mostra o que rodaria")
+    args = ap.parse_args()
+    force = True if args.force == [] else (args.force or ())
+    eng = make_engine_from_env()
+    stages = default_stages()
+    if args.dry_run:
+        for n, motivo in plan(eng, stages, args.only, force):
+            print(f"{'⏭️ ' if motivo == 'atualizada' else '▶️ '} {n:<20} {motivo}")
+        sys.exit(0)
+    t0 = time.perf_counter()
+    res = run_pipeline(eng, stages, args.only, force, args.workers)
+    print(f"\n{'etapa':<20} {'status':<8} {'duração':>9}")
+    for r in res:
+        print(f"{r.stage:<20} {r.status:<8} {r.duration_s:>8.1f}s")
+    print(f"total: {time.perf_counter() - t0:.1f}s")
+    sys.exit(1 if any(r.status in ("failed", "blocked") for r in res) else 0)
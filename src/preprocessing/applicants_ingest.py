@@ -1,6 +1,7 @@
-import argparse, json, io, math, sys, pandas as pd
-from typing import Dict, Any
-from ..utils import make_engine_from_env
+import argparse, json, math, pandas as pd
+from typing import Dict, Any, Iterator
+from ..copy_writer import CopyWriter
+from .json_stream import JsonObjectStream
 
 def read_applicants_json(json_path: str) -> pd.DataFrame:
     with open(json_path, "r", encoding="utf-8") as f:
@@ -8,18 +9,27 @@ def read_applicants_json(json_path: str) -> pd.DataFrame:
     rows = [bloco for _, bloco in raw.items()]
     return pd.json_normalize(rows)
 
-def _print_percent(inserted: int, total: int, last_pct: int) -> int:
-    pct = int((inserted / total) * 100) if total else 100
-    if pct > last_pct:
-        print(f"\rProgresso: {pct:3d}%", end="", flush=True)
-    return pct
+def iter_applicants_chunks(stream: JsonObjectStream, chunk_rows: int = 50_000) -> Iterator[pd.DataFrame]:
+    """Modo incremental: percorre o objeto de topo chave a chave e devolve chunks (json_normalize) de até chunk_rows."""
+    rows = []
+    for _, bloco in stream:
+        rows.append(bloco)
+        if len(rows) >= chunk_rows:
+            yield pd.json_normalize(rows)
+            rows = []
+    if rows:
+        yield pd.json_normalize(rows)
 
 def write_applicants_raw_fast(
     json_path: str,
     table: str = "applicants_raw",
     if_exists: str = "replace",       
-    chunk_rows: int = 50_000           
+    chunk_rows: int = 50_000,
+    stream: bool = False
 ) -> int:
+    if stream:
+        return _write_applicants_raw_stream(json_path, table, if_exists, chunk_rows)
+
     df = read_applicants_json(json_path)
     total = len(df)
     if total == 0:
@@ -30,45 +40,26 @@ def write_applicants_raw_fast(
     # (isso dá mais “passos” na barra)
     chunk_rows = min(chunk_rows, max(1, math.ceil(total / 100)))
 
-    eng = make_engine_from_env()
-
-    with eng.begin() as conn:
-        df.head(0).to_sql(table, conn, if_exists=if_exists, index=False)
-
-    raw_conn = eng.raw_connection()
-    try:
-        with raw_conn.cursor() as cur:
-            cur.execute("SET synchronous_commit = OFF;")
-            cols = list(df.columns)
-            cols_quoted = ", ".join(f'"{c}"' for c in cols)
-            copy_sql = f"COPY {table} ({cols_quoted}) FROM STDIN WITH (FORMAT CSV, HEADER TRUE, DELIMITER ',')"
-
-            inserted = 0
-            last_pct = -1
-            num_chunks = math.ceil(total / chunk_rows)
-
-            print(f"Carregando {total} linhas em '{table}' (chunks de ~{chunk_rows}):")
-            _print_percent(0, total, last_pct); last_pct = 0
-
-            for i in range(num_chunks):
-                start = i * chunk_rows
-                end = min(start + chunk_rows, total)
-                chunk = df.iloc[start:end]
-
-                buf = io.StringIO()
-                chunk.to_csv(buf, index=False)
-                buf.seek(0)
-                cur.copy_expert(copy_sql, buf)
-
-                inserted = end
-                last_pct = _print_percent(inserted, total, last_pct)
-
-            raw_conn.commit()
-            print("\rProgresso: 100%")  # garante 100% no fim
-    finally:
-        raw_conn.close()
-
-    return total
+    print(f"Carregando {total} linhas em '{table}' (chunks de ~{chunk_rows}):")
+    with CopyWriter(table, if_exists=if_exists, total=total) as w:
+        for start in range(0, total, chunk_rows):
+            w.write(df.iloc[start:start + chunk_rows])
+    return w.rows
+
+def _write_applicants_raw_stream(json_path: str, table: str, if_exists: str, chunk_rows: int) -> int:
+    """
+    Versão de memória constante: lê o JSON de forma incremental e manda cada chunk direto para o COPY.
+    Todas as colunas são criadas como TEXT; colunas que só aparecem em chunks posteriores entram via ALTER TABLE.
+    Progresso pelo volume de bytes lido do arquivo.
+    """
+    stream = JsonObjectStream(json_path)
+    print(f"Carregando '{json_path}' em '{table}' (modo incremental, chunks de {chunk_rows}):")
+    with CopyWriter(table, if_exists=if_exists, total=stream.total_bytes, text_columns=True) as w:
+        for chunk in iter_applicants_chunks(stream, chunk_rows):
+            w.write(chunk, done=stream.bytes_read)
+    if w.rows == 0:
+        print(f"Nenhuma linha para inserir em {table}.")
+    return w.rows
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
@@ -76,12 +67,14 @@ if __name__ == "__main__":
     ap.add_argument("--table", default="applicants_raw")
     ap.add_argument("--if-exists", default="replace", choices=["replace","append"])
     ap.add_argument("--chunk-rows", type=int, default=50_000)
+    ap.add_argument("--stream", action="store_true", help="Leitura incremental do JSON (memória constante)")
     args = ap.parse_args()
 
     n = write_applicants_raw_fast(
         json_path=args.json,
         table=args.table,
         if_exists=args.if_exists,
-        chunk_rows=args.chunk_rows
+        chunk_rows=args.chunk_rows,
+        stream=args.stream
     )
     print(f"✅ applicants_raw: {n} linhas")
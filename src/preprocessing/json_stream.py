@@ -0,0 +1,85 @@
+import codecs, json, os, re
+from typing import Any, Iterator, Tuple
+
+_WS = re.compile(r"[ \t\n\r]*")
+_DELIM = frozenset(" \t\n\r,:]}")
+
+
+class JsonObjectStream:
+    """
+    Leitura incremental de um arquivo cujo topo é um objeto JSON ({"chave": valor, ...}).
+    Itera (chave, valor) um par por vez, mantendo em memória só o buffer de leitura e o valor corrente,
+    independente do tamanho do arquivo. `bytes_read`/`total_bytes` permitem mostrar progresso.
+    """
+
+    def __init__(self, path: str, buf_size: int = 1 << 20):
+        self.path = path
+        self.buf_size = buf_size
+        self.total_bytes = os.path.getsize(path)
+        self.bytes_read = 0
+        self._json = json.JSONDecoder()
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        with open(self.path, "rb") as f:
+            self._f = f
+            self._utf8 = codecs.getincrementaldecoder("utf-8")()
+            self._buf, self._pos, self._eof = "", 0, False
+            self.bytes_read = 0
+
+            if self._peek() != "{":
+                raise ValueError(f"{self.path}: esperado objeto JSON no topo")
+            self._pos += 1
+            if self._peek() == "}":
+                return
+            while True:
+                key = self._value()
+                if not isinstance(key, str) or self._peek() != ":":
+                    raise ValueError(f"{self.path}: chave/':' inválidos perto do byte {self.bytes_read}")
+                self._pos += 1
+                self._peek()
+                yield key, self._value()
+
+                sep = self._peek()
+                self._pos += 1
+                if sep == "}":
+                    return
+                if sep != ",":
+                    raise ValueError(f"{self.path}: esperado ',' ou '}}' perto do byte {self.bytes_read}")
+                self._peek()
+
+    # ---------- buffer ----------
+    def _more(self) -> bool:
+        """Lê mais um bloco do arquivo; False se já estava no fim."""
+        if self._eof:
+            return False
+        data = self._f.read(self.buf_size)
+        self.bytes_read += len(data)
+        if data:
+            text = self._utf8.decode(data)
+        else:
+            text = self._utf8.decode(b"", final=True)
+            self._eof = True
+        # descarta o que já foi consumido
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Pula espaços e devolve o próximo caractere ("" no fim do arquivo)."""
+        while True:
+            self._pos = _WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or not self._more():
+                return self._buf[self._pos:self._pos + 1]
+
+    def _value(self) -> Any:
+        while True:
+            try:
+                val, end = self._json.raw_decode(self._buf, self._pos)
+                # número no fim do buffer pode estar truncado ("1e" -> 1): só aceita se vier um delimitador depois
+                if self._eof or (end < len(self._buf) and self._buf[end] in _DELIM):
+                    self._pos = end
+                    return val
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._more()
@@ -1,6 +1,7 @@
-import argparse, json, pandas as pd
-from typing import Dict, Any, List
-from ..utils import make_engine_from_env
+import argparse, json, math, pandas as pd
+from typing import Dict, Any, Iterator, List
+from ..copy_writer import CopyWriter
+from .json_stream import JsonObjectStream
 
 def read_prospects_json(json_path: str) -> pd.DataFrame:
     with open(json_path, "r", encoding="utf-8") as f:
@@ -11,18 +12,53 @@ def read_prospects_json(json_path: str) -> pd.DataFrame:
             linhas.append(p)
     return pd.DataFrame(linhas)
 
-def write_prospects_raw(json_path: str, table="prospects_raw", if_exists="replace") -> int:
+def iter_prospects_chunks(stream: JsonObjectStream, chunk_rows: int = 50_000) -> Iterator[pd.DataFrame]:
+    """Modo incremental: percorre as vagas uma a uma e devolve os prospects em chunks de até chunk_rows."""
+    linhas: List[Dict[str, Any]] = []
+    for _, vaga in stream:
+        linhas.extend(vaga.get("prospects") or [])
+        if len(linhas) >= chunk_rows:
+            yield pd.DataFrame(linhas)
+            linhas = []
+    if linhas:
+        yield pd.DataFrame(linhas)
+
+def write_prospects_raw(json_path: str, table="prospects_raw", if_exists="replace", stream=False, chunk_rows=50_000) -> int:
+    if stream:
+        return _write_prospects_raw_stream(json_path, table, if_exists, chunk_rows)
     df = read_prospects_json(json_path)
-    eng = make_engine_from_env()
-    with eng.begin() as conn:
-        df.to_sql(table, conn, if_exists=if_exists, index=False, method="multi")
-    return len(df)
+    total = len(df)
+    if total == 0:
+        print(f"Nenhuma linha para inserir em {table}.")
+        return 0
+
+    # ~1% por chunk para a barra de progresso
+    chunk_rows = min(chunk_rows, max(1, math.ceil(total / 100)))
+    print(f"Carregando {total} linhas em '{table}' (chunks de ~{chunk_rows}):")
+    with CopyWriter(table, if_exists=if_exists, total=total, empty_as_null=False) as w:
+        for start in range(0, total, chunk_rows):
+            w.write(df.iloc[start:start + chunk_rows])
+    return w.rows
+
+def _write_prospects_raw_stream(json_path: str, table: str, if_exists: str, chunk_rows: int) -> int:
+    """Versão de memória constante: cada chunk do JSON incremental vai direto para o COPY (colunas TEXT)."""
+    stream = JsonObjectStream(json_path)
+    print(f"Carregando '{json_path}' em '{table}' (modo incremental, chunks de {chunk_rows}):")
+    with CopyWriter(table, if_exists=if_exists, total=stream.total_bytes, text_columns=True,
+                    empty_as_null=False) as w:
+        for chunk in iter_prospects_chunks(stream, chunk_rows):
+            w.write(chunk, done=stream.bytes_read)
+    if w.rows == 0:
+        print(f"Nenhuma linha para inserir em {table}.")
+    return w.rows
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--json", required=True)
     ap.add_argument("--table", default="prospects_raw")
     ap.add_argument("--if-exists", default="replace", choices=["replace","append","fail"])
+    ap.add_argument("--stream", action="store_true", help="Leitura incremental do JSON (memória constante)")
+    ap.add_argument("--chunk-rows", type=int, default=50_000)
     args = ap.parse_args()
-    n = write_prospects_raw(args.json, args.table, args.if_exists)
+    n = write_prospects_raw(args.json, args.table, args.if_exists, args.stream, args.chunk_rows)
     print(f"✅ prospects_raw: {n} linhas")
@@ -0,0 +1,190 @@
+import glob, hashlib, os, tempfile
+from typing import Iterable, List, Optional, Sequence
+import numpy as np, pandas as pd
+from sklearn.model_selection import train_test_split
+from sqlalchemy import text
+from ..utils import make_engine_from_env, table_fingerprint
+
+
+def _quote(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+
+def _copy_para_arquivo(engine, sql: str, fh):
+    """COPY (SELECT ...) TO STDOUT direto para um arquivo (sem materializar as linhas em objetos Python)."""
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        try:
+            cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT CSV, HEADER TRUE)", fh)
+        finally:
+            cur.close()
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def _ler_csv(fh, cols: List[str], ids: Sequence[str] = ()) -> pd.DataFrame:
+    dtype = {c: np.float32 for c in cols}
+    dtype.update({c: str for c in ids})
+    try:
+        df = pd.read_csv(fh, dtype=dtype, usecols=list(ids) + cols)
+    except ValueError:
+        # colunas TEXT com valores não numéricos: mesma coerção do to_numeric(errors="coerce")
+        fh.seek(0)
+        df = pd.read_csv(fh, dtype=str, usecols=list(ids) + cols, keep_default_na=False, na_values=[""])
+        df[cols] = df[cols].apply(lambda s: pd.to_numeric(s, errors="coerce")).astype(np.float32)
+    for c in ids:
+        # identificadores (ex.: codigo_profissional) ficam inteiros, sem passar por float32
+        df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
+    return df
+
+
+def compactar_dtypes(df: pd.DataFrame, float_columns: Iterable[str] = ("salario_valor",)) -> pd.DataFrame:
+    """Flags 0/1 sem nulos viram uint8; o resto fica em float32."""
+    floats = set(float_columns)
+    binarias = []
+    for c in df.columns:
+        if c in floats:
+            continue
+        a = df[c].to_numpy()
+        if ((a == 0) | (a == 1)).all():  # NaN falha nas duas comparações
+            binarias.append(c)
+    if binarias:
+        df[binarias] = df[binarias].astype(np.uint8)
+    return df
+
+
+def _ler_do_banco(engine, table: str, cols: List[str], target: Optional[str], float_columns,
+                  ids: Sequence[str] = ()) -> pd.DataFrame:
+    sql = f"SELECT {', '.join(_quote(c) for c in list(ids) + cols)} FROM {table}"
+    with tempfile.TemporaryFile(mode="w+") as fh:
+        _copy_para_arquivo(engine, sql, fh)
+        fh.seek(0)
+        df = _ler_csv(fh, cols, ids)
+
+    if target:
+        df = df[df[target].notna()]
+        df = df.reset_index(drop=True)
+        df[target] = df[target].round().clip(0, 1).astype(np.uint8)
+    return compactar_dtypes(df, float_columns=list(float_columns) + list(ids) + ([target] if target else []))
+
+
+# ---------- cache local (Parquet) ----------
+def _cache_dir(cache_dir: Optional[str]) -> str:
+    """Diretório do cache; "" (ou GOLD_CACHE_DIR vazio) desliga."""
+    return os.getenv("GOLD_CACHE_DIR", "./.cache/gold") if cache_dir is None else cache_dir
+
+
+def _identidade_banco(engine, conn) -> str:
+    """DSN (sem senha) + banco e schema corrente: cópias restauradas ou dev/prod com o mesmo filenode e a
+    mesma contagem não dividem o mesmo arquivo de cache."""
+    url = engine.url.render_as_string(hide_password=True)
+    db, schema = conn.execute(text("SELECT current_database(), current_schema()")).one()
+    return f"{url}|{db}|{schema}"
+
+
+def _prefixo_cache(cache_dir: str, table: str, cols: List[str], banco: str = "") -> str:
+    chave = hashlib.sha1("\x1f".join([banco, *cols]).encode()).hexdigest()[:10]
+    return os.path.join(cache_dir, f"{table}-{chave}")
+
+
+def _gravar_parquet(df: pd.DataFrame, path: str):
+    """Grava de forma atômica (arquivo temporário + rename): leitor concorrente nunca vê arquivo pela metade."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _via_cache(engine, table: str, cols: List[str], target, float_columns, cache_dir: str,
+               ids: Sequence[str] = ()) -> pd.DataFrame:
+    with engine.connect() as conn:
+        fp = table_fingerprint(conn, table)
+        banco = _identidade_banco(engine, conn)
+    prefixo = _prefixo_cache(cache_dir, table, list(ids) + cols, banco)
+    path = f"{prefixo}-{fp}.parquet"
+    if os.path.exists(path):
+        print(f"✅ gold '{table}' do cache: {path}")
+        return pd.read_parquet(path)
+
+    df = _ler_do_banco(engine, table, cols, target, float_columns, ids)
+    # fingerprint mudou: snapshots antigos da mesma tabela/colunas são descartados
+    for antigo in glob.glob(f"{glob.escape(prefixo)}-*.parquet"):
+        try:
+            os.remove(antigo)
+        except OSError:
+            pass
+    _gravar_parquet(df, path)
+    print(f"✅ cache da gold '{table}' atualizado: {path}")
+    return df
+
+
+def load_gold(
+    features: Sequence[str],
+    table: str = "gold_applicants",
+    target: Optional[str] = "target",
+    float_columns: Iterable[str] = ("salario_valor",),
+    engine=None,
+    cache_dir: Optional[str] = None,
+    snapshot: Optional[str] = None,
+    id_columns: Sequence[str] = (),
+) -> pd.DataFrame:
+    """
+    Lê da gold só as colunas do modelo (`features` + `target`) via COPY ... TO STDOUT para um arquivo
+    temporário e faz o parse direto em float32 (flags binárias em uint8), em vez do
+    read_sql("SELECT * ...") linha a linha em dtype object.
+    Funciona com a gold tipada (to_sql) ou toda TEXT (build streamed). Linhas sem `target` são descartadas
+    e o target vira uint8 (0/1).
+
+    Cache: o resultado fica em Parquet em `cache_dir` (GOLD_CACHE_DIR, padrão ./.cache/gold), com a
+    identidade do banco (DSN, database, schema) e a impressão digital da tabela (table_fingerprint) no nome;
+    enquanto ela não muda, a leitura vem do arquivo.
+    `snapshot` (ou GOLD_SNAPSHOT) aponta para um Parquet e dispensa o banco por completo.
+    `id_columns` (ex.: codigo_profissional) vêm antes das features, como inteiros (Int64).
+    """
+    cols = list(features) + ([target] if target else [])
+    ids = list(id_columns)
+    snapshot = snapshot if snapshot is not None else os.getenv("GOLD_SNAPSHOT", "")
+    if snapshot:
+        print(f"✅ gold do snapshot (sem banco): {snapshot}")
+        return pd.read_parquet(snapshot, columns=ids + cols)
+
+    engine = engine or make_engine_from_env()
+    cache_dir = _cache_dir(cache_dir)
+    if cache_dir:
+        return _via_cache(engine, table, cols, target, float_columns, cache_dir, ids)
+    return _ler_do_banco(engine, table, cols, target, float_columns, ids)
+
+
+def split_treino_holdout(df: pd.DataFrame, features: Sequence[str], target: str = "target",
+                         test_size: float = 0.20, random_state: int = 42):
+    """
+    Split único de treino x holdout (o mesmo para treino e avaliação): descarta linhas com qualquer nulo,
+    estratifica pelo target. Devolve X_tr, X_te, y_tr, y_te (índices do `df` preservados).
+    """
+    df = df.dropna()
+    y = df[target].astype(int)
+    X = df.reindex(columns=list(features))
+    return train_test_split(X, y, test_size=test_size, random_state=random_state, stratify=y)
+
+
+def export_snapshot(path: str, features: Sequence[str], table: str = "gold_applicants",
+                    target: Optional[str] = "target", engine=None,
+                    id_columns: Sequence[str] = ("codigo_profissional",)) -> int:
+    """Exporta a gold (ids + features + target, tipos compactos) para um Parquet usável com GOLD_SNAPSHOT."""
+    df = load_gold(features, table=table, target=target, engine=engine, cache_dir="", snapshot="",
+                   id_columns=id_columns)
+    _gravar_parquet(df, path)
+    print(f"✅ snapshot de '{table}' salvo em: {path} ({len(df)} linhas)")
+    return len(df)
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.training.train import FEATURES
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--table", default="gold_applicants")
+    ap.add_argument("--export", required=True, help="Caminho do Parquet de snapshot (ex.: ./artifacts/gold.parquet)")
+    args = ap.parse_args()
+    export_snapshot(args.export, FEATURES, table=args.table)
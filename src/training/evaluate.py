@@ -1,14 +1,12 @@
 import os, joblib, numpy as np, pandas as pd
-from dotenv import load_dotenv
-from sqlalchemy import text
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
     roc_auc_score, average_precision_score, confusion_matrix,
     precision_recall_curve
 )
 
-from src.utils import make_engine_from_env
+from src.utils import make_engine_from_env, load_env
+from src.training.data import load_gold, split_treino_holdout
 
 # Mesmas FEATURES usadas no treino
 FEATURES = [
@@ -35,31 +33,29 @@ def _metrics(y_true, y_prob, thr):
         "cm": confusion_matrix(y_true, y_pred).tolist(),
     }
 
+def holdout_scores(art: dict):
+    """
+    (y_true, scores) do holdout. Artefatos novos trazem o holdout do treino (mesmo split, scores já calculados):
+    nada de reler a gold nem reescorar. Artefatos antigos: relê e refaz o split do treino.
+    """
+    hold = art.get("holdout")
+    if hold is not None:
+        print(f"Holdout do artefato: {len(hold['y_true'])} linhas (ids em '{hold.get('id_column')}').")
+        return np.asarray(hold["y_true"]).astype(int), np.asarray(hold["scores"], dtype=float)
+
+    print("⚠️ Artefato sem holdout salvo: relendo a gold e reescorando o split do treino.")
+    df = load_gold(FEATURES, engine=make_engine_from_env())
+    X_tr, X_te, y_tr, y_te = split_treino_holdout(df, FEATURES)
+    return y_te.to_numpy(), art["model"].predict_proba(X_te)[:, 1]
+
 def main():
-    load_dotenv()
+    load_env()
     artifact_path = os.getenv("MODEL_ARTIFACT", "artifacts/modelo_prec80.joblib")
     art = joblib.load(artifact_path)
-    model = art["model"]
     thr_art = float(art["threshold"])
     op_mode = art.get("operating_mode", "custom")
 
-    engine = make_engine_from_env()
-    with engine.begin() as conn:
-        df = pd.read_sql(text("SELECT * FROM gold_applicants"), conn)
-
-    df = df.dropna(subset=["target"]).copy()
-    df["target"] = pd.to_numeric(df["target"], errors="coerce")
-    df = df.dropna(subset=["target"]).copy()
-    df["target"] = df["target"].round().clip(0, 1).astype(int)
-
-    y = df["target"]
-    X = df.reindex(columns=FEATURES)
-
-    X_tr, X_te, y_tr, y_te = train_test_split(
-        X, y, test_size=0.20, random_state=42, stratify=y
-    )
-
-    p_te = model.predict_proba(X_te)[:, 1]
+    y_te, p_te = holdout_scores(art)
 
     m05 = _metrics(y_te, p_te, 0.5)
     mart = _metrics(y_te, p_te, thr_art)
@@ -0,0 +1,284 @@
+import json, math, os, shutil, threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence
+
+ARTIFACT_DIR_FORMAT = 1
+MANIFEST = "manifest.json"
+# carga preguiçosa dos boosters (lock de módulo: o FastScorer continua serializável pelo joblib)
+_booster_lock = threading.Lock()
+
+
+class FastScorer:
+    """
+    Versão "compilada" do modelo calibrado (CalibratedClassifierCV(Pipeline(pre, LGBM))) para servir
+    sem pandas/sklearn no caminho quente. Guarda, por fold calibrado:
+      - constantes de imputação (mediana do salário, moda das demais) na ordem de feature_columns;
+      - parâmetros de log1p + StandardScaler do salario_valor;
+      - ordem das colunas após o ColumnTransformer;
+      - o booster LightGBM e a tabela isotônica (X_thresholds_/y_thresholds_) em arrays NumPy.
+    Entrada: vetor denso float (NaN = ausente) na ordem de feature_columns.
+    """
+
+    def __init__(
+        self,
+        feature_columns: Sequence[str],
+        fill_values: np.ndarray,
+        col_order: List[np.ndarray],
+        sal_index: int,
+        sal_mean: np.ndarray,
+        sal_scale: np.ndarray,
+        boosters: Optional[List[Any]],
+        iso_x: List[np.ndarray],
+        iso_y: List[np.ndarray],
+    ):
+        self.feature_columns = list(feature_columns)
+        self.fill_values = np.asarray(fill_values, dtype=np.float64)  # (n_folds, n_features)
+        self.col_order = [np.asarray(c, dtype=np.intp) for c in col_order]
+        self.sal_index = int(sal_index)
+        self.sal_mean = np.asarray(sal_mean, dtype=np.float64)
+        self.sal_scale = np.asarray(sal_scale, dtype=np.float64)
+        self._boosters = list(boosters) if boosters is not None else None
+        self._booster_files: Optional[List[Any]] = None   # formato diretório: .txt abertos em load_dir
+        self.iso_x = [np.asarray(a, dtype=np.float64) for a in iso_x]
+        self.iso_y = [np.asarray(a, dtype=np.float64) for a in iso_y]
+
+    @property
+    def n_folds(self) -> int:
+        return len(self._booster_files) if self._boosters is None else len(self._boosters)
+
+    @property
+    def boosters(self) -> List[Any]:
+        """
+        Boosters LightGBM; no formato diretório são lidos dos .txt só no primeiro uso, pela lib nativa
+        (lgbm_native, sem importar o pacote lightgbm/sklearn). Os arquivos já foram abertos em load_dir:
+        um export_artifact_dir no meio do caminho não mistura boosters novos com as tabelas isotônicas antigas.
+        """
+        if self._boosters is None:
+            with _booster_lock:
+                if self._boosters is None:
+                    from .lgbm_native import carregar_booster
+                    boosters = []
+                    for fh in self._booster_files:
+                        with fh:
+                            boosters.append(carregar_booster(model_str=fh.read().decode("utf-8")))
+                    self._boosters = boosters
+        return self._boosters
+
+    def warm(self) -> "FastScorer":
+        """Força a carga dos boosters (ex.: no startup da API, fora do caminho da primeira requisição)."""
+        self.boosters
+        return self
+
+    def __getstate__(self):
+        # joblib/pickle: materializa os boosters e copia os arrays mmap para memória
+        state = dict(self.__dict__)
+        state["_boosters"] = [b.to_lightgbm() if hasattr(b, "to_lightgbm") else b for b in self.boosters]
+        state["_booster_files"] = None
+        for k in ("fill_values", "sal_mean", "sal_scale"):
+            state[k] = np.array(state[k])
+        for k in ("col_order", "iso_x", "iso_y"):
+            state[k] = [np.array(a) for a in state[k]]
+        return state
+
+    def __setstate__(self, state):
+        # artefatos joblib anteriores guardavam a lista em "boosters"
+        if "boosters" in state:
+            state["_boosters"] = state.pop("boosters")
+        state.setdefault("_booster_files", None)
+        self.__dict__.update(state)
+
+    # ---------- formato diretório (manifest JSON + .npy mmap + boosters em texto do LightGBM) ----------
+    def save_dir(self, path: str) -> List[str]:
+        """Grava arrays em .npy (mmap) e boosters no formato texto nativo; devolve os arquivos gravados."""
+        os.makedirs(path, exist_ok=True)
+        arquivos = []
+        arrays = {"fill_values": self.fill_values, "sal_mean": self.sal_mean, "sal_scale": self.sal_scale}
+        for f in range(self.n_folds):
+            arrays[f"col_order_{f}"] = self.col_order[f]
+            arrays[f"iso_x_{f}"] = self.iso_x[f]
+            arrays[f"iso_y_{f}"] = self.iso_y[f]
+        for nome, arr in arrays.items():
+            np.save(os.path.join(path, f"{nome}.npy"), np.ascontiguousarray(arr))
+            arquivos.append(f"{nome}.npy")
+        for f, b in enumerate(self.boosters):
+            b.save_model(os.path.join(path, f"booster_{f}.txt"))
+            arquivos.append(f"booster_{f}.txt")
+        return arquivos
+
+    @classmethod
+    def load_dir(cls, path: str, feature_columns: Sequence[str], sal_index: int, n_folds: int,
+                 mmap: bool = True) -> "FastScorer":
+        """
+        Arrays via np.load(mmap_mode="r") (páginas compartilhadas entre workers); boosters preguiçosos, mas com
+        os arquivos abertos aqui (o descritor segue válido depois que o diretório é trocado e apagado).
+        """
+        modo = "r" if mmap else None
+        ld = lambda nome: np.load(os.path.join(path, f"{nome}.npy"), mmap_mode=modo)
+        obj = cls.__new__(cls)
+        obj.feature_columns = list(feature_columns)
+        obj.fill_values = ld("fill_values")
+        obj.col_order = [ld(f"col_order_{f}") for f in range(n_folds)]
+        obj.sal_index = int(sal_index)
+        obj.sal_mean = ld("sal_mean")
+        obj.sal_scale = ld("sal_scale")
+        obj.iso_x = [ld(f"iso_x_{f}") for f in range(n_folds)]
+        obj.iso_y = [ld(f"iso_y_{f}") for f in range(n_folds)]
+        obj._boosters = None
+        obj._booster_files = [open(os.path.join(path, f"booster_{f}.txt"), "rb") for f in range(n_folds)]
+        return obj
+
+    @classmethod
+    def from_calibrated(cls, cal, feature_columns: Sequence[str], num_col: str = "salario_valor") -> "FastScorer":
+        """Extrai os parâmetros de um CalibratedClassifierCV isotônico treinado com build_preprocessor()."""
+        feature_columns = list(feature_columns)
+        pos = {c: i for i, c in enumerate(feature_columns)}
+        fills, orders, means, scales, boosters, iso_x, iso_y = [], [], [], [], [], [], []
+
+        for cc in cal.calibrated_classifiers_:
+            pipe = cc.estimator
+            # FrozenEstimator (calibração com modelo pré-treinado) guarda o pipeline em .estimator
+            if not hasattr(pipe, "named_steps") and hasattr(pipe, "estimator"):
+                pipe = pipe.estimator
+            pre, clf = pipe.named_steps["pre"], pipe.named_steps["clf"]
+            trs = {name: (tr, cols) for name, tr, cols in pre.transformers_ if name != "remainder"}
+            if set(trs) != {"sal", "resto"} or list(trs["sal"][1]) != [num_col]:
+                raise ValueError("Estrutura de pré-processamento não suportada pelo FastScorer.")
+
+            sal_pipe = trs["sal"][0]
+            imp_sal, scaler = sal_pipe.named_steps["imp"], sal_pipe.named_steps["scaler"]
+            imp_resto, resto_cols = trs["resto"]
+
+            fill = np.full(len(feature_columns), np.nan)
+            fill[pos[num_col]] = float(imp_sal.statistics_[0])
+            stats = np.asarray(imp_resto.statistics_, dtype=np.float64)
+            for c, v in zip(resto_cols, stats):
+                fill[pos[c]] = v
+
+            # SimpleImputer descarta colunas 100% vazias no fit; a ordem de saída reflete isso
+            kept = [c for c, v in zip(resto_cols, stats) if not math.isnan(v)]
+            orders.append(np.array([pos[num_col]] + [pos[c] for c in kept]))
+            fills.append(fill)
+            means.append(float(scaler.mean_[0]) if scaler.with_mean else 0.0)
+            scales.append(float(scaler.scale_[0]) if scaler.with_std else 1.0)
+            boosters.append(clf.booster_)
+
+            iso = cc.calibrators[0]
+            iso_x.append(iso.X_thresholds_)
+            iso_y.append(iso.y_thresholds_)
+
+        return cls(feature_columns, np.vstack(fills), orders, pos[num_col], np.array(means),
+                   np.array(scales), boosters, iso_x, iso_y)
+
+    def vector(self, features: Dict[str, Any]) -> np.ndarray:
+        """Monta o vetor denso (NaN para ausentes) na ordem de feature_columns a partir de um dict."""
+        vals = (features.get(c) for c in self.feature_columns)
+        return np.array([np.nan if v is None else float(v) for v in vals], dtype=np.float64)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """X: (n, n_features) ou (n_features,). Retorna (n, 2) como o predict_proba do sklearn."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.feature_columns):
+            raise ValueError(f"Esperado {len(self.feature_columns)} features, recebido {X.shape[1]}.")
+
+        nan = np.isnan(X)
+        p1 = np.zeros(X.shape[0])
+        for f in range(self.n_folds):
+            Z = np.where(nan, self.fill_values[f], X)
+            s = self.sal_index
+            Z[:, s] = (np.log1p(Z[:, s]) - self.sal_mean[f]) / self.sal_scale[f]
+            p = self.boosters[f].predict(Z[:, self.col_order[f]])
+            xs, ys = self.iso_x[f], self.iso_y[f]
+            cal = np.interp(np.clip(p, xs[0], xs[-1]), xs, ys)
+            cal[(1.0 < cal) & (cal <= 1.0 + 1e-5)] = 1.0
+            p1 += cal
+        p1 /= self.n_folds
+        return np.column_stack([1.0 - p1, p1])
+
+    def score_one(self, x) -> float:
+        return float(self.predict_proba(x)[0, 1])
+
+
+def _json_safe(v):
+    if isinstance(v, dict):
+        return {k: _json_safe(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_json_safe(x) for x in v]
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+
+def export_artifact_dir(artifact: dict, path: str) -> str:
+    """
+    Exporta o artefato para o formato diretório da API: manifest.json (feature_columns, threshold,
+    operating_mode, metadata), arrays do FastScorer em .npy e boosters no formato texto do LightGBM.
+    Só o caminho rápido é exportado (sem o pipeline sklearn nem o holdout).
+    """
+    scorer = artifact.get("fast_scorer")
+    if scorer is None:
+        raise ValueError("Artefato sem fast_scorer: rode export_fast_scorer antes de exportar.")
+    tmp = path.rstrip("/\\") + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    arquivos = scorer.save_dir(tmp)
+    manifest = {
+        "format": ARTIFACT_DIR_FORMAT,
+        "feature_columns": list(artifact["feature_columns"]),
+        "threshold": float(artifact["threshold"]),
+        "operating_mode": artifact.get("operating_mode"),
+        "metadata": _json_safe(artifact.get("metadata", {})),
+        "scorer": {"n_folds": scorer.n_folds, "sal_index": scorer.sal_index},
+        "files": arquivos,
+    }
+    with open(os.path.join(tmp, MANIFEST), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False)
+    # export completo num diretório temporário e troca por rename: um worker lendo nunca vê arquivos pela metade
+    if os.path.isdir(path):
+        antigo = path.rstrip("/\\") + ".old"
+        shutil.rmtree(antigo, ignore_errors=True)
+        os.replace(path, antigo)
+        os.replace(tmp, path)
+        shutil.rmtree(antigo, ignore_errors=True)
+    else:
+        os.replace(tmp, path)
+    return path
+
+
+def load_artifact_dir(path: str, mmap: bool = True) -> dict:
+    """
+    Lê um artefato em formato diretório no mesmo formato de dict do joblib. O "model" é o próprio FastScorer
+    (predict_proba em matriz NumPy/DataFrame na ordem de feature_columns).
+    """
+    with open(os.path.join(path, MANIFEST), encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("format") != ARTIFACT_DIR_FORMAT:
+        raise ValueError(f"Formato de artefato não suportado: {manifest.get('format')}")
+    sc = manifest["scorer"]
+    scorer = FastScorer.load_dir(path, manifest["feature_columns"], sc["sal_index"], sc["n_folds"], mmap=mmap)
+    return {
+        "model": scorer,
+        "fast_scorer": scorer,
+        "feature_columns": manifest["feature_columns"],
+        "threshold": manifest["threshold"],
+        "operating_mode": manifest.get("operating_mode"),
+        "metadata": manifest.get("metadata", {}),
+        "format": "dir",
+    }
+
+
+if __name__ == "__main__":
+    # anexa o FastScorer a um artefato joblib já existente (e, opcionalmente, exporta o formato diretório)
+    import argparse, joblib
+    from .train import export_fast_scorer
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--artifact", default="artifacts/modelo_prec80.joblib")
+    ap.add_argument("--export-dir", default=None, help="Exporta também o formato diretório (ex.: artifacts/modelo_prec80)")
+    args = ap.parse_args()
+    art = export_fast_scorer(joblib.load(args.artifact))
+    joblib.dump(art, args.artifact)
+    print(f"✅ FastScorer anexado em: {args.artifact} ({art['fast_scorer'].n_folds} folds)")
+    if args.export_dir:
+        export_artifact_dir(art, args.export_dir)
+        print(f"✅ Artefato em formato diretório: {args.export_dir}")
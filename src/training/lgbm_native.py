@@ -0,0 +1,134 @@
+"""
+Booster LightGBM direto na lib nativa (lib_lightgbm via ctypes), sem importar o pacote `lightgbm`:
+o import do pacote puxa sklearn/scipy (~1,3 s e ~80 MiB por processo), o que domina o cold start da API.
+Mesma biblioteca C e mesma chamada de predição do Booster.predict padrão (LGBM_BoosterPredictForMat),
+então os scores são idênticos. Usado pelo artefato em formato diretório (fast_scorer.load_artifact_dir).
+"""
+import ctypes, glob, importlib.util, os, threading
+from typing import Optional
+import numpy as np
+
+_C_API_DTYPE_FLOAT64 = 1
+_C_API_IS_ROW_MAJOR = 1
+_C_API_PREDICT_NORMAL = 0
+_C_API_FEATURE_IMPORTANCE_SPLIT = 0
+
+_lib = None
+_lib_lock = threading.Lock()
+
+
+def _caminho_lib() -> Optional[str]:
+    """Localiza lib_lightgbm dentro do pacote instalado sem executá-lo (find_spec não importa o pacote)."""
+    spec = importlib.util.find_spec("lightgbm")
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    for pasta in spec.submodule_search_locations:
+        for padrao in ("lib/lib_lightgbm.*", "lib_lightgbm.*"):
+            achados = [f for f in glob.glob(os.path.join(pasta, padrao)) if f.endswith((".so", ".dll", ".dylib"))]
+            if achados:
+                return achados[0]
+    return None
+
+
+def carregar_lib():
+    """ctypes.CDLL da lib_lightgbm (uma vez por processo); None se não encontrada."""
+    global _lib
+    if _lib is None:
+        with _lib_lock:
+            if _lib is None:
+                path = _caminho_lib()
+                if path is None:
+                    return None
+                lib = ctypes.cdll.LoadLibrary(path)
+                lib.LGBM_GetLastError.restype = ctypes.c_char_p
+                _lib = lib
+    return _lib
+
+
+def _ok(lib, ret: int):
+    if ret != 0:
+        raise RuntimeError(lib.LGBM_GetLastError().decode("utf-8"))
+
+
+class NativeBooster:
+    """Subconjunto do lightgbm.Booster usado pelo FastScorer: predict (probabilidade), num_trees, save_model."""
+
+    def __init__(self, model_file: Optional[str] = None, model_str: Optional[str] = None):
+        lib = carregar_lib()
+        if lib is None:
+            raise RuntimeError("lib_lightgbm não encontrada.")
+        self._lib = lib
+        self._handle = ctypes.c_void_p()
+        n_iter = ctypes.c_int(0)
+        if model_str is not None:
+            _ok(lib, lib.LGBM_BoosterLoadModelFromString(
+                model_str.encode("utf-8"), ctypes.byref(n_iter), ctypes.byref(self._handle)))
+        else:
+            _ok(lib, lib.LGBM_BoosterCreateFromModelfile(
+                model_file.encode("utf-8"), ctypes.byref(n_iter), ctypes.byref(self._handle)))
+
+    def __del__(self):
+        handle = getattr(self, "_handle", None)
+        if handle is not None and handle.value:
+            self._lib.LGBM_BoosterFree(handle)
+            self._handle = None
+
+    def num_trees(self) -> int:
+        out = ctypes.c_int(0)
+        _ok(self._lib, self._lib.LGBM_BoosterNumberOfTotalModel(self._handle, ctypes.byref(out)))
+        return out.value
+
+    def predict(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        nrow, ncol = X.shape
+        out = np.empty(nrow, dtype=np.float64)
+        out_len = ctypes.c_int64(0)
+        _ok(self._lib, self._lib.LGBM_BoosterPredictForMat(
+            self._handle,
+            X.ctypes.data_as(ctypes.c_void_p),
+            ctypes.c_int(_C_API_DTYPE_FLOAT64),
+            ctypes.c_int32(nrow),
+            ctypes.c_int32(ncol),
+            ctypes.c_int(_C_API_IS_ROW_MAJOR),
+            ctypes.c_int(_C_API_PREDICT_NORMAL),
+            ctypes.c_int(0),
+            ctypes.c_int(-1),
+            b"",
+            ctypes.byref(out_len),
+            out.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+        ))
+        if out_len.value != nrow:
+            raise RuntimeError(f"LightGBM devolveu {out_len.value} predições para {nrow} linhas.")
+        return out
+
+    def model_to_string(self) -> str:
+        """Modelo no formato texto, a partir do handle (o arquivo de origem pode já ter sido trocado)."""
+        tamanho = ctypes.c_int64(0)
+        buf = ctypes.create_string_buffer(1 << 20)
+        for _ in range(2):   # 2ª chamada só se o buffer inicial não coube
+            _ok(self._lib, self._lib.LGBM_BoosterSaveModelToString(
+                self._handle, ctypes.c_int(0), ctypes.c_int(-1), ctypes.c_int(_C_API_FEATURE_IMPORTANCE_SPLIT),
+                ctypes.c_int64(len(buf)), ctypes.byref(tamanho), buf))
+            if tamanho.value <= len(buf):
+                break
+            buf = ctypes.create_string_buffer(tamanho.value)
+        return buf.value.decode("utf-8")
+
+    def save_model(self, filename: str):
+        with open(filename, "w", encoding="utf-8") as fh:
+            fh.write(self.model_to_string())
+
+    def to_lightgbm(self):
+        """Booster do pacote lightgbm equivalente (para serializar em joblib)."""
+        import lightgbm as lgb
+        return lgb.Booster(model_str=self.model_to_string())
+
+
+def carregar_booster(model_file: Optional[str] = None, model_str: Optional[str] = None):
+    """NativeBooster quando a lib nativa está acessível; senão o lightgbm.Booster do pacote."""
+    if carregar_lib() is not None:
+        return NativeBooster(model_file, model_str)
+    import lightgbm as lgb
+    return lgb.Booster(model_file=model_file, model_str=model_str)
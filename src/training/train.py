@@ -1,16 +1,18 @@
 import os, joblib, numpy as np, pandas as pd, sys, datetime as dt
-from dotenv import load_dotenv
-from sqlalchemy import text
-from sklearn.model_selection import train_test_split
+from typing import Optional
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import FunctionTransformer, StandardScaler
 from sklearn.calibration import CalibratedClassifierCV
+from sklearn.frozen import FrozenEstimator
+from sklearn.model_selection import train_test_split
 from lightgbm import LGBMClassifier
 import sklearn, lightgbm
 
-from ..utils import threshold_for_min_precision, make_engine_from_env
+from ..utils import threshold_for_min_precision, make_engine_from_env, load_env
+from .fast_scorer import FastScorer
+from .data import load_gold, split_treino_holdout
 
 FEATURES = [
  'tem_email','tem_telefone','tem_linkedin','tem_local','tem_objetivo','email_corporativo',
@@ -38,28 +40,59 @@ def build_preprocessor():
         remainder="drop",
     )
 
-def train_and_save(min_prec=0.80, artifact_path="artifacts/modelo_prec80.joblib"):
-    load_dotenv()
-    engine = make_engine_from_env()
-    with engine.begin() as conn:
-        df = pd.read_sql(text("SELECT * FROM gold_applicants"), conn)
+ID_COLUMN = "codigo_profissional"
+
+def holdout_payload(ids, y_true, scores) -> dict:
+    """Holdout do treino (ids, rótulos e scores do modelo calibrado), guardado no artefato para o evaluate."""
+    return {
+        "id_column": ID_COLUMN,
+        "ids": np.asarray(ids, dtype=np.int64),
+        "y_true": np.asarray(y_true, dtype=np.uint8),
+        "scores": np.asarray(scores, dtype=np.float64),
+    }
+
+def export_fast_scorer(artifact: dict) -> dict:
+    """Anexa ao artefato o FastScorer (caminho rápido da API) derivado do modelo calibrado."""
+    artifact["fast_scorer"] = FastScorer.from_calibrated(artifact["model"], artifact["feature_columns"])
+    return artifact
+
+# hiperparâmetros padrão do LGBM (a busca do src.training.tune sobrescreve parte deles)
+LGBM_DEFAULTS = dict(
+    n_estimators=3000, learning_rate=0.03, num_leaves=31,
+    min_child_samples=30, subsample=0.9, subsample_freq=1,
+    colsample_bytree=0.9, reg_lambda=3.0, class_weight="balanced",
+    random_state=42, n_jobs=-1
+)
 
-    df = df.dropna()
-    y = df["target"].astype(int)
-    X = df.reindex(columns=FEATURES)
+MODEL_MODES = ("ensemble", "single")
 
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.20, random_state=42, stratify=y)
+def fit_calibrated(X_tr, y_tr, params: dict, mode: str = "ensemble", calib_size: float = 0.25):
+    """
+    mode="ensemble": CalibratedClassifierCV(cv=3) -> 3 pipelines (3 boosters), cada um com sua isotônica.
+    mode="single": um único pipeline treinado em (1 - calib_size) do treino e a isotônica ajustada no restante
+    (FrozenEstimator, o substituto do cv="prefit"): 1/3 das árvores no artefato e na predição.
+    """
+    if mode not in MODEL_MODES:
+        raise ValueError(f"mode deve ser um de {MODEL_MODES}, recebido {mode!r}")
+    pipe = Pipeline([("pre", build_preprocessor()), ("clf", LGBMClassifier(**params))])
+    if mode == "ensemble":
+        return CalibratedClassifierCV(pipe, method="isotonic", cv=3).fit(X_tr, y_tr)
 
-    pre = build_preprocessor()
-    lgbm = LGBMClassifier(
-        n_estimators=3000, learning_rate=0.03, num_leaves=31,
-        min_child_samples=30, subsample=0.9, subsample_freq=1,
-        colsample_bytree=0.9, reg_lambda=3.0, class_weight="balanced",
-        random_state=42, n_jobs=-1
+    X_fit, X_cal, y_fit, y_cal = train_test_split(
+        X_tr, y_tr, test_size=calib_size, random_state=42, stratify=y_tr
     )
-    base_pipe = Pipeline([("pre", pre), ("clf", lgbm)])
-    cal = CalibratedClassifierCV(base_pipe, method="isotonic", cv=3)
-    cal.fit(X_tr, y_tr)
+    pipe.fit(X_fit, y_fit)
+    return CalibratedClassifierCV(FrozenEstimator(pipe), method="isotonic").fit(X_cal, y_cal)
+
+def train_and_save(min_prec=0.80, artifact_path="artifacts/modelo_prec80.joblib",
+                   lgbm_params: Optional[dict] = None, extra_metadata: Optional[dict] = None,
+                   mode: str = "ensemble"):
+    load_env()
+    df = load_gold(FEATURES, engine=make_engine_from_env(), id_columns=[ID_COLUMN])
+    X_tr, X_te, y_tr, y_te = split_treino_holdout(df, FEATURES)
+
+    params = {**LGBM_DEFAULTS, **(lgbm_params or {})}
+    cal = fit_calibrated(X_tr, y_tr, params, mode=mode)
 
     p_te = cal.predict_proba(X_te)[:, 1]
     thr = threshold_for_min_precision(y_te, p_te, min_prec)
@@ -75,12 +108,20 @@ def train_and_save(min_prec=0.80, artifact_path="artifacts/modelo_prec80.joblib"
             "sklearn": sklearn.__version__,
             "lightgbm": lightgbm.__version__,
             "created_at": dt.datetime.utcnow().isoformat() + "Z",
+            "lgbm_params": params,
+            "model_mode": mode,
+            **(extra_metadata or {}),
         },
     }
+    artifact["holdout"] = holdout_payload(df.loc[X_te.index, ID_COLUMN], y_te, p_te)
+    export_fast_scorer(artifact)
     joblib.dump(artifact, artifact_path)
     print(f"✅ Artefato salvo em: {artifact_path} | threshold={thr:.3f}")
+    return artifact
 
 if __name__ == "__main__":
+    load_env()
     min_prec = float(os.getenv("MIN_PRECISAO", "0.80"))
     path = os.getenv("MODEL_ARTIFACT", "artifacts/modelo_prec80.joblib")
-    train_and_save(min_prec=min_prec, artifact_path=path)
+    # MODEL_MODE=single: um booster + calibração em hold-out (ver benchmarks/bench_model_modes.py)
+    train_and_save(min_prec=min_prec, artifact_path=path, mode=os.getenv("MODEL_MODE", "ensemble"))
@@ -0,0 +1,212 @@
+"""
+Busca de hiperparâmetros do LGBM com early stopping, em paralelo:
+  - cada candidato é avaliado em K folds estratificados da parte de TREINO do split (o holdout fica intocado);
+  - em cada fold o LGBM treina até `max_rounds` árvores com early stopping no fold de validação (PR-AUC);
+  - os pares (candidato, fold) rodam num pool de processos, cada worker limitado a `threads` threads
+    (n_jobs do LGBM e BLAS/OpenMP via threadpoolctl), para não sobrecarregar a máquina;
+  - relatório por candidato (PR-AUC médio, árvores úteis, tempo) em CSV; o melhor vira o artefato padrão
+    (train_and_save com n_estimators = média das melhores iterações).
+
+    python -m src.training.tune --trials 24 --workers 4 --threads 2
+"""
+import argparse, itertools, json, math, multiprocessing, os, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+import numpy as np, pandas as pd
+from lightgbm import LGBMClassifier, early_stopping
+from sklearn.metrics import average_precision_score
+from sklearn.model_selection import StratifiedKFold
+from threadpoolctl import threadpool_limits
+
+from ..utils import load_env, make_engine_from_env
+from .data import load_gold, split_treino_holdout
+from .train import FEATURES, ID_COLUMN, LGBM_DEFAULTS, build_preprocessor, train_and_save
+
+ESPACO_PADRAO: Dict[str, list] = {
+    "learning_rate": [0.01, 0.03, 0.05, 0.1],
+    "num_leaves": [15, 31, 63, 127],
+    "min_child_samples": [10, 30, 60, 100],
+    "subsample": [0.7, 0.8, 0.9, 1.0],
+    "colsample_bytree": [0.6, 0.8, 0.9, 1.0],
+    "reg_lambda": [0.0, 1.0, 3.0, 10.0],
+}
+
+
+def amostrar_candidatos(espaco: Dict[str, list], n_trials: int, seed: int = 42) -> List[dict]:
+    """
+    Candidatos da busca: o primeiro é sempre a configuração atual (LGBM_DEFAULTS) para comparação;
+    depois o grid completo, se couber em `n_trials`, ou uma amostra aleatória sem repetição.
+    """
+    chaves = sorted(espaco)
+    base = {k: LGBM_DEFAULTS[k] for k in chaves if k in LGBM_DEFAULTS}
+    total = math.prod(len(espaco[k]) for k in chaves)
+    if total <= n_trials - 1:
+        grid = [dict(zip(chaves, v)) for v in itertools.product(*(espaco[k] for k in chaves))]
+        return [base] + [c for c in grid if c != base]
+
+    rng = np.random.default_rng(seed)
+    candidatos, vistos = [base], {tuple(sorted(base.items()))}
+    while len(candidatos) < n_trials:
+        cand = {k: espaco[k][int(rng.integers(len(espaco[k])))] for k in chaves}
+        chave = tuple(sorted(cand.items()))
+        if chave not in vistos:
+            vistos.add(chave)
+            candidatos.append(cand)
+    return candidatos
+
+
+# ---------- worker (processo do pool) ----------
+_DADOS: dict = {}
+
+
+def _init_worker(X: pd.DataFrame, y: np.ndarray, folds, threads: int):
+    # dados enviados uma vez por processo (initargs), não a cada tarefa
+    _DADOS.update(X=X, y=y, folds=folds, threads=threads)
+    _DADOS["limite"] = threadpool_limits(limits=threads)
+
+
+def _avaliar_fold(trial: int, fold: int, params: dict, max_rounds: int, patience: int) -> dict:
+    X, y, threads = _DADOS["X"], _DADOS["y"], _DADOS["threads"]
+    idx_tr, idx_va = _DADOS["folds"][fold]
+    t0 = time.perf_counter()
+
+    pre = build_preprocessor()
+    X_tr = pre.fit_transform(X.iloc[idx_tr])
+    X_va = pre.transform(X.iloc[idx_va])
+    clf = LGBMClassifier(**{
+        **LGBM_DEFAULTS, **params,
+        "n_estimators": max_rounds, "n_jobs": threads, "metric": "average_precision", "verbose": -1,
+    })
+    clf.fit(X_tr, y[idx_tr], eval_set=[(X_va, y[idx_va])],
+            callbacks=[early_stopping(patience, first_metric_only=True, verbose=False)])
+    melhor = int(clf.best_iteration_ or max_rounds)
+    p = clf.predict_proba(X_va, num_iteration=melhor)[:, 1]
+    return {
+        "trial": trial, "fold": fold, "best_iter": melhor,
+        "pr_auc": float(average_precision_score(y[idx_va], p)),
+        "segundos": time.perf_counter() - t0,
+    }
+
+
+# ---------- busca ----------
+def buscar(
+    X: pd.DataFrame,
+    y,
+    candidatos: List[dict],
+    folds: int = 3,
+    workers: Optional[int] = None,
+    threads: int = 1,
+    max_rounds: int = 3000,
+    patience: int = 100,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """Avalia os candidatos (K folds cada) no pool e devolve o relatório por candidato, do melhor para o pior."""
+    y = np.asarray(y).astype(int)
+    workers = workers or max(1, (os.cpu_count() or 1) // max(1, threads))
+    divisoes = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(X, y))
+    tarefas = [(t, f) for t in range(len(candidatos)) for f in range(folds)]
+
+    resultados = []
+    t0 = time.perf_counter()
+    # spawn pelo mesmo motivo do ETL paralelo: o pai pode ter threads (pool de conexões)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(X, y, divisoes, threads)) as pool:
+        futs = [pool.submit(_avaliar_fold, t, f, candidatos[t], max_rounds, patience) for t, f in tarefas]
+        for i, fut in enumerate(as_completed(futs), 1):
+            resultados.append(fut.result())
+            print(f"\rBusca: {i}/{len(tarefas)} fits", end="", flush=True)
+    wall = time.perf_counter() - t0
+    print(f"\n✅ Busca concluída: {len(candidatos)} candidatos x {folds} folds em {wall:.1f}s "
+          f"({workers} workers x {threads} threads)")
+
+    por_fold = pd.DataFrame(resultados)
+    rel = por_fold.groupby("trial").agg(
+        pr_auc=("pr_auc", "mean"), pr_auc_std=("pr_auc", "std"),
+        best_iter=("best_iter", "mean"), segundos=("segundos", "sum"),
+    ).reset_index()
+    rel["best_iter"] = rel["best_iter"].round().astype(int)
+    rel["params"] = [json.dumps(candidatos[t], sort_keys=True) for t in rel["trial"]]
+    rel.attrs["wall_segundos"] = wall
+    return rel.sort_values(["pr_auc", "segundos"], ascending=[False, True]).reset_index(drop=True)
+
+
+def melhores_params(relatorio: pd.DataFrame) -> dict:
+    """Parâmetros do melhor candidato, com n_estimators = média das melhores iterações nos folds."""
+    melhor = relatorio.iloc[0]
+    return {**json.loads(melhor["params"]), "n_estimators": max(1, int(melhor["best_iter"]))}
+
+
+def imprimir_relatorio(relatorio: pd.DataFrame, top: int = 20):
+    print(f"\n{'trial':>5} {'PR-AUC':>8} {'±':>6} {'árvores':>8} {'tempo(s)':>9}  params")
+    for _, r in relatorio.head(top).iterrows():
+        std = 0.0 if pd.isna(r["pr_auc_std"]) else r["pr_auc_std"]
+        print(f"{int(r['trial']):5d} {r['pr_auc']:8.4f} {std:6.4f} {int(r['best_iter']):8d} {r['segundos']:9.1f}  {r['params']}")
+
+
+def tune(
+    n_trials: int = 24,
+    folds: int = 3,
+    workers: Optional[int] = None,
+    threads: int = 1,
+    max_rounds: int = 3000,
+    patience: int = 100,
+    espaco: Optional[Dict[str, list]] = None,
+    seed: int = 42,
+    report_path: str = "artifacts/tuning_report.csv",
+    min_prec: float = 0.80,
+    artifact_path: Optional[str] = "artifacts/modelo_prec80.joblib",
+    mode: str = "ensemble",
+) -> pd.DataFrame:
+    """Roda a busca na parte de treino da gold, grava o relatório e (se artifact_path) treina o melhor."""
+    load_env()
+    df = load_gold(FEATURES, engine=make_engine_from_env(), id_columns=[ID_COLUMN])
+    X_tr, _, y_tr, _ = split_treino_holdout(df, FEATURES)
+
+    candidatos = amostrar_candidatos(espaco or ESPACO_PADRAO, n_trials, seed=seed)
+    rel = buscar(X_tr, y_tr, candidatos, folds=folds, workers=workers, threads=threads,
+                 max_rounds=max_rounds, patience=patience, seed=seed)
+    imprimir_relatorio(rel)
+
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    rel.to_csv(report_path, index=False)
+    print(f"✅ Relatório salvo em: {report_path}")
+
+    if artifact_path:
+        best = melhores_params(rel)
+        train_and_save(min_prec=min_prec, artifact_path=artifact_path, lgbm_params=best, mode=mode, extra_metadata={
+            "tuning": {
+                "trials": len(candidatos), "folds": folds, "best_trial": int(rel.iloc[0]["trial"]),
+                "cv_pr_auc": float(rel.iloc[0]["pr_auc"]), "report": report_path,
+                "wall_segundos": float(rel.attrs.get("wall_segundos", 0.0)),
+            },
+        })
+    return rel
+
+
+if __name__ == "__main__":
+    load_env()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--trials", type=int, default=24)
+    ap.add_argument("--folds", type=int, default=3)
+    ap.add_argument("--workers", type=int, default=None, help="Processos (padrão: núcleos / threads)")
+    ap.add_argument("--threads", type=int, default=1, help="Threads por worker (n_jobs do LGBM)")
+    ap.add_argument("--max-rounds", type=int, default=3000)
+    ap.add_argument("--patience", type=int, default=100, help="Rodadas sem melhora no PR-AUC antes de parar")
+    ap.add_argument("--space", default=None, help="JSON {parametro: [valores]} (padrão: ESPACO_PADRAO)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--report", default="artifacts/tuning_report.csv")
+    ap.add_argument("--no-train", action="store_true", help="Só a busca e o relatório, sem gerar artefato")
+    args = ap.parse_args()
+
+    espaco = None
+    if args.space:
+        with open(args.space, encoding="utf-8") as fh:
+            espaco = json.load(fh)
+    tune(
+        n_trials=args.trials, folds=args.folds, workers=args.workers, threads=args.threads,
+        max_rounds=args.max_rounds, patience=args.patience, espaco=espaco, seed=args.seed,
+        report_path=args.report,
+        min_prec=float(os.getenv("MIN_PRECISAO", "0.80")),
+        artifact_path=None if args.no_train else os.getenv("MODEL_ARTIFACT", "artifacts/modelo_prec80.joblib"),
+        mode=os.getenv("MODEL_MODE", "ensemble"),
+    )
@@ -1,23 +1,106 @@
 import numpy as np
-from sklearn.metrics import precision_recall_curve
 
-import os
+import hashlib, os, threading
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 
+_env_loaded = False
+_engines: Dict[Tuple, Engine] = {}
+_engines_lock = threading.Lock()
 
-def make_engine_from_env():
 
-    load_dotenv()
+def load_env():
+    """Lê o .env uma única vez por processo."""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
 
-    return create_engine(
+
+def dsn_from_env() -> str:
+    load_env()
+    return (
         f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
-        f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}",
-        pool_pre_ping=True
+        f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
+    )
+
+
+def get_engine(
+    dsn: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None,
+    statement_timeout_ms: Optional[int] = None,
+    application_name: Optional[str] = None,
+) -> Engine:
+    """
+    Registro de engines do processo: um engine (e um pool de conexões) por DSN + opções.
+    Padrões vêm do ambiente: DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_STATEMENT_TIMEOUT_MS (0 = sem limite)
+    e DB_APPLICATION_NAME.
+    """
+    load_env()
+    dsn = dsn or dsn_from_env()
+    pool_size = int(pool_size if pool_size is not None else os.getenv("DB_POOL_SIZE", "5"))
+    max_overflow = int(max_overflow if max_overflow is not None else os.getenv("DB_MAX_OVERFLOW", "10"))
+    statement_timeout_ms = int(
+        statement_timeout_ms if statement_timeout_ms is not None else os.getenv("DB_STATEMENT_TIMEOUT_MS", "0")
     )
+    application_name = application_name or os.getenv("DB_APPLICATION_NAME", "datathon_fiap")
+
+    # pid na chave: processos filhos (fork) não reaproveitam o pool do pai
+    key = (dsn, pool_size, max_overflow, statement_timeout_ms, application_name, os.getpid())
+    eng = _engines.get(key)
+    if eng is not None:
+        return eng
+
+    with _engines_lock:
+        eng = _engines.get(key)
+        if eng is None:
+            connect_args = {}
+            if dsn.startswith("postgresql"):
+                connect_args["application_name"] = application_name
+                if statement_timeout_ms > 0:
+                    connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+            eng = create_engine(
+                dsn,
+                pool_pre_ping=True,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                connect_args=connect_args,
+            )
+            _engines[key] = eng
+    return eng
+
+
+def make_engine_from_env() -> Engine:
+    return get_engine()
+
+
+def dispose_engines():
+    """Fecha os pools de todos os engines registrados (ex.: fim de processo ou testes)."""
+    with _engines_lock:
+        for eng in _engines.values():
+            eng.dispose()
+        _engines.clear()
+
+
+def table_fingerprint(conn, table: str) -> str:
+    """
+    Impressão digital barata do conteúdo de uma tabela: arquivo físico (muda em replace/TRUNCATE),
+    contagem de linhas e hash das versões das tuplas (xmin, ctid), que muda em qualquer INSERT/UPDATE/DELETE.
+    Não lê o conteúdo das colunas (ordem de grandeza de um COUNT(*)).
+    """
+    row = conn.execute(text(
+        f"SELECT pg_relation_filenode(CAST(:t AS regclass)), count(*), "
+        f"coalesce(sum(hashtextextended(xmin::text || ctid::text, 0)), 0) FROM {table}"
+    ), {"t": table}).fetchone()
+    return hashlib.sha1("|".join(str(v) for v in row).encode()).hexdigest()[:16]
 
 
 def threshold_for_min_precision(y_true, scores, min_prec=0.80):
+    # import local: a API importa este módulo e não precisa carregar sklearn/scipy no startup
+    from sklearn.metrics import precision_recall_curve
     prec, rec, thr = precision_recall_curve(y_true, scores)
     idx = np.where(prec[:-1] >= min_prec)[0]
     if len(idx):
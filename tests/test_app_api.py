@@ -63,3 +63,66 @@ def test_predict_ok(monkeypatch):
     j = r.json()
     assert j["aprovado_pelo_modelo"] is True
     assert "probabilidade_contratacao" in j
+
+def test_predict_batch_ok(monkeypatch):
+    import app.main as m
+    m.artifact = {
+        "model": None,
+        "feature_columns": ["tem_email","salario_valor"],
+        "threshold": 0.6,
+        "operating_mode": "prec80",
+        "metadata": {}
+    }
+    chamadas = []
+    class FakeModel:
+        def predict_proba(self, X):
+            chamadas.append(len(X))
+            return [[0.3, 0.7], [0.9, 0.1]]
+    m.model = FakeModel()
+    m.feature_columns = ["tem_email","salario_valor"]
+    m.threshold = 0.6
+
+    client = TestClient(app)
+    payload = {"items": [
+        {"features": {"tem_email": 1, "salario_valor": 3000}, "codigo_profissional": 1},
+        {"features": {"tem_email": 0}, "codigo_profissional": 2},
+    ]}
+    r = client.post("/predict/batch", json=payload)
+    assert r.status_code == 200
+    j = r.json()
+    assert chamadas == [2]  # uma única chamada vetorizada
+    assert j["n"] == 2
+    assert [x["aprovado_pelo_modelo"] for x in j["resultados"]] == [True, False]
+    assert [x["codigo_profissional"] for x in j["resultados"]] == [1, 2]
+
+def test_predict_raw_calcula_features_no_processo():
+    import app.main as m
+    m.artifact = {
+        "model": None,
+        "feature_columns": ["tem_email","salario_valor","ingl_avancado"],
+        "threshold": 0.6,
+        "operating_mode": "prec80",
+        "metadata": {}
+    }
+    recebido = []
+    class FakeModel:
+        def predict_proba(self, X):
+            recebido.append(X.iloc[0].to_dict())
+            return [[0.3, 0.7]]
+    m.model = FakeModel()
+    m.feature_columns = m.artifact["feature_columns"]
+    m.threshold = 0.6
+
+    client = TestClient(app)
+    registro = {
+        "infos_basicas": {"codigo_profissional": "31001", "email": "a@empresa.com.br"},
+        "informacoes_profissionais": {"remuneracao": "R$ 3.500,00"},
+        "formacao_e_idiomas": {"nivel_ingles": "Avançado"},
+        "cv_pt": "Experiência com SAP e Excel avançado",
+    }
+    r = client.post("/predict/raw", json=registro)
+    assert r.status_code == 200
+    j = r.json()
+    assert j["codigo_profissional"] == 31001 and j["aprovado_pelo_modelo"] is True
+    assert recebido == [{"tem_email": 1, "salario_valor": 3500.0, "ingl_avancado": 1}]
+    assert j["features"]["cv_sap"] == 1 and j["features"]["email_corporativo"] == 1
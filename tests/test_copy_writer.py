@@ -0,0 +1,77 @@
+import pandas as pd
+from src.copy_writer import CopyWriter
+
+class _Cursor:
+    def __init__(self, log):
+        self.log = log
+    def execute(self, sql):
+        self.log.append(("sql", sql))
+    def copy_expert(self, sql, buf):
+        self.log.append(("copy", sql, buf.read()))
+    def close(self):
+        pass
+
+class _Raw:
+    def __init__(self, log):
+        self.log = log
+    def cursor(self):
+        return _Cursor(self.log)
+    def commit(self):
+        self.log.append(("commit",))
+    def rollback(self):
+        self.log.append(("rollback",))
+    def close(self):
+        pass
+
+class _Engine:
+    def __init__(self):
+        self.log = []
+    def raw_connection(self):
+        return _Raw(self.log)
+
+def test_copy_writer_chunks_colunas_novas_e_contagem():
+    eng = _Engine()
+    with CopyWriter("t", create=False, empty_as_null=False, engine=eng) as w:
+        w.write(pd.DataFrame({"a": ["x", ""]}))
+        w.write(pd.DataFrame({"a": [None], "b": ["y"]}))
+    assert w.rows == 3
+    copies = [e for e in eng.log if e[0] == "copy"]
+    assert len(copies) == 2
+    assert copies[0][2] == 'a\nx\n""\n'
+    assert "NULL '\\N'" in copies[1][1] and copies[1][2] == "a,b\n\\N,y\n"
+    assert ("sql", 'ALTER TABLE t ADD COLUMN "b" TEXT') in eng.log
+    assert eng.log[-1] == ("commit",)
+
+def test_copy_writer_rollback_em_erro():
+    eng = _Engine()
+    try:
+        with CopyWriter("t", create=False, engine=eng) as w:
+            w.write(pd.DataFrame({"a": [1]}))
+            raise RuntimeError("falha")
+    except RuntimeError:
+        pass
+    assert eng.log[-1] == ("rollback",)
+
+def test_copy_writer_erro_no_worker_nao_trava_produtor():
+    class _CursorQuebrado(_Cursor):
+        def copy_expert(self, sql, buf):
+            raise RuntimeError("copy falhou")
+    eng = _Engine()
+    eng.raw_connection = lambda: type("R", (_Raw,), {"cursor": lambda self: _CursorQuebrado(self.log)})(eng.log)
+    erro = None
+    try:
+        with CopyWriter("t", create=False, queue_chunks=1, engine=eng) as w:
+            for _ in range(20):
+                w.write(pd.DataFrame({"a": [1]}))
+    except RuntimeError as e:
+        erro = e
+    assert erro is not None and "copy falhou" in str(erro)
+    assert eng.log[-1] == ("rollback",) and w.rows == 0
+
+def test_copy_writer_synchronous_commit_so_na_transacao():
+    # a conexão volta ao pool compartilhado (API/ETL): SET LOCAL, nada de SET de sessão
+    eng = _Engine()
+    with CopyWriter("t", create=False, engine=eng) as w:
+        w.write(pd.DataFrame({"a": [1]}))
+    sets = [e[1] for e in eng.log if e[0] == "sql" and "synchronous_commit" in e[1]]
+    assert sets == ["SET LOCAL synchronous_commit = OFF"]
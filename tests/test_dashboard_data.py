@@ -0,0 +1,61 @@
+import json
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from monitoring.dashboard_data import BaselineCache, SketchCache, recortar
+from src.feature_sketches import COLUMNS, ROWS
+
+AGORA = datetime(2025, 1, 10, 12, 20, tzinfo=timezone.utc)
+H = AGORA.replace(minute=0)
+
+class Tabela:
+    """feature_sketch_hourly falsa: uma linha __rows__ por hora com n = índice da hora."""
+    def __init__(self, horas=100):
+        self.n = {H - timedelta(hours=i): 100 - i for i in range(horas)}
+        self.chamadas = []
+
+    def loader(self, conn, ini, fim=None):
+        self.chamadas.append((ini, fim))
+        rows = [(h, ROWS, n, 0, 0, 0.0, 0.0, None, None, None) for h, n in self.n.items()
+                if h >= ini and (fim is None or h < fim)]
+        return pd.DataFrame(rows, columns=list(COLUMNS))
+
+def test_sketch_cache_busca_so_o_que_falta():
+    t = Tabela()
+    c = SketchCache(max_hours=72, loader=t.loader)
+    df = c.refresh(None, 24, agora=AGORA)
+    assert len(df) == 25 and t.chamadas == [(H - timedelta(hours=24), None)]
+
+    # janela menor: recorta a memória e relê só a última hora (pode ter recebido inferências)
+    t.n[H] = 500
+    df = c.refresh(None, 6, agora=AGORA)
+    assert t.chamadas[-1] == (H, None) and len(df) == 7
+    assert df.loc[df["hora"] == H, "n"].tolist() == [500]
+
+    # janela maior: busca só as horas mais antigas que faltam
+    df = c.refresh(None, 48, agora=AGORA)
+    assert (H - timedelta(hours=48), H - timedelta(hours=24)) in t.chamadas
+    assert len(df) == 49 and df["hora"].is_unique
+
+    # hora nova + limite de memória (max_hours)
+    t.n[H + timedelta(hours=1)] = 1
+    df = c.refresh(None, 200, agora=AGORA + timedelta(hours=1))
+    assert df["hora"].max() == H + timedelta(hours=1) and len(df) == 73
+
+def test_recortar():
+    t = Tabela()
+    df = t.loader(None, H - timedelta(hours=48))
+    assert len(recortar(df, 6, agora=AGORA)) == 7
+
+def test_baseline_cache_so_rele_quando_muda():
+    eng = create_engine("sqlite://")
+    with eng.begin() as c:
+        c.execute(text("CREATE TABLE model_baseline (id INTEGER PRIMARY KEY, created_at TEXT, stats TEXT)"))
+        c.execute(text("INSERT INTO model_baseline VALUES (1, '2025-01-01', :s)"), {"s": json.dumps({"a": 1})})
+    b = BaselineCache()
+    with eng.connect() as c:
+        assert b.refresh(c) == ({"a": 1}, "2025-01-01")
+        assert b.refresh(c)[0] == {"a": 1} and b.fetches == 1
+        c.execute(text("INSERT INTO model_baseline VALUES (2, '2025-01-02', :s)"), {"s": json.dumps({"a": 2})})
+        assert b.refresh(c) == ({"a": 2}, "2025-01-02") and b.fetches == 2
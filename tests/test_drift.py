@@ -0,0 +1,83 @@
+import numpy as np, pandas as pd
+
+from monitoring.drift import (
+    K, MISSING_BIN, DriftConfig, alerts, baseline_stats, compute_drift, counts_from_matrix, drift_report,
+    window_from_matrix,
+)
+from src.feature_sketches import COLUMNS, HIST_EDGES, merge_sketches, sketch_rows
+
+FEATS = ["tem_email", "tem_linkedin", "salario_valor"]
+
+def _matriz(n, seed, rate=0.6, mu=8.0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        (rng.random(n) < rate).astype(float),
+        (rng.random(n) < 0.3).astype(float),
+        np.round(rng.lognormal(mu, 0.5, n), 2),
+    ])
+    X[::7, 2] = np.nan
+    X[::11, 0] = np.nan
+    return X
+
+def _payloads(X):
+    out = []
+    for row in X:
+        p = {f: (None if np.isnan(v) else v) for f, v in zip(FEATS, row)}
+        if p["tem_email"] is None:
+            p.pop("tem_email")       # chave ausente no payload
+        out.append(p)
+    return out
+
+def test_contagens_vetorizadas_iguais_ao_loop():
+    X = _matriz(1000, 0)
+    C = counts_from_matrix(X, FEATS, chunk_rows=300)
+    for j, f in enumerate(FEATS):
+        col = X[:, j]
+        ok = ~np.isnan(col)
+        if f == "salario_valor":
+            esperado = np.bincount(np.searchsorted(HIST_EDGES, col[ok], side="right"), minlength=K - 1)
+        else:
+            esperado = np.array([(col[ok] != 1).sum(), (col[ok] == 1).sum()] + [0] * (K - 3))
+        assert (C[j, :MISSING_BIN] == esperado).all() and C[j, MISSING_BIN] == (~ok).sum()
+
+def test_janela_das_sketches_igual_a_da_matriz():
+    X = _matriz(500, 1)
+    stats = baseline_stats(_matriz(2000, 2), FEATS)
+    sk = pd.DataFrame(sketch_rows(_payloads(X[:200])) + sketch_rows(_payloads(X[200:])), columns=list(COLUMNS))
+    r_sk = drift_report(merge_sketches(sk), stats)
+    r_mx = compute_drift(window_from_matrix(X, FEATS), FEATS, stats)
+    cols = ["n_now", "psi", "ks", "chi2", "p_value", "now"]
+    assert np.allclose(r_sk[cols].to_numpy(float), r_mx[cols].to_numpy(float), equal_nan=True)
+
+def test_sem_drift_com_mesma_distribuicao():
+    stats = baseline_stats(_matriz(20000, 3), FEATS)
+    rep = compute_drift(window_from_matrix(_matriz(5000, 4), FEATS), FEATS, stats)
+    assert (rep["psi"] < 0.01).all() and (rep["ks"] < 0.05).all()
+    assert alerts(rep) == []
+
+def test_drift_dispara_psi_ks_chi2_e_regras_antigas():
+    stats = baseline_stats(_matriz(20000, 5), FEATS)
+    rep = compute_drift(window_from_matrix(_matriz(5000, 6, rate=0.9, mu=9.0), FEATS), FEATS, stats).set_index("feature")
+    sal, email = rep.loc["salario_valor"], rep.loc["tem_email"]
+    assert sal["alert"] and "psi=" in sal["reasons"] and "ks=" in sal["reasons"] and "chi2" in sal["reasons"]
+    assert "taxa 0.55→0.82" in email["reasons"]     # 0.6 e 0.9 entre presentes; ausentes contam como ≠1
+    assert not rep.loc["tem_linkedin", "alert"]
+
+def test_baseline_antigo_e_feature_sumida():
+    # baseline só com rate1/mean/std (sem faixas): PSI/KS/χ² ficam NaN, regras antigas continuam
+    velho = {"tem_email": {"type": "binary", "rate1": 0.1}, "tem_linkedin": {"type": "binary", "rate1": 0.3},
+             "salario_valor": {"type": "numeric", "mean": 50000.0, "std": 1000.0}}
+    X = _matriz(1000, 7)
+    X[:, 1] = np.nan
+    rep = compute_drift(window_from_matrix(X, FEATS), FEATS, velho)
+    assert rep["psi"].isna().all()
+    assert alerts(rep)[0].startswith("[DRIFT] tem_email: taxa 0.10→")
+    assert "[MISSING] tem_linkedin sumiu do serving" in alerts(rep)
+    assert "z=" in rep.set_index("feature").loc["salario_valor", "reasons"]
+
+def test_limiares_configuraveis():
+    stats = baseline_stats(_matriz(20000, 8), FEATS)
+    w = window_from_matrix(_matriz(5000, 9, mu=8.1), FEATS)   # χ² já significativo, PSI baixo
+    padrao = compute_drift(w, FEATS, stats).set_index("feature")
+    rigido = compute_drift(w, FEATS, stats, DriftConfig(psi_max=0.01, ks_max=0.01)).set_index("feature")
+    assert not padrao.loc["salario_valor", "alert"] and rigido.loc["salario_valor", "alert"]
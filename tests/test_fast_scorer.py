@@ -0,0 +1,133 @@
+import numpy as np, pandas as pd
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.pipeline import Pipeline
+from lightgbm import LGBMClassifier
+from fastapi.testclient import TestClient
+
+from src.training.train import FEATURES, build_preprocessor, export_fast_scorer
+
+def _dados(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.integers(0, 2, size=(n, len(FEATURES))), columns=FEATURES).astype(float)
+    X["salario_valor"] = np.round(rng.lognormal(8, 0.6, n), 2)
+    X.loc[rng.random(n) < 0.2, "salario_valor"] = np.nan
+    X.loc[rng.random(n) < 0.05, "tem_email"] = np.nan
+    logit = 1.5 * X["cv_excel_avancado"].fillna(0) - 1.0 * X["ingl_nenhum"] + 0.0004 * X["salario_valor"].fillna(3000) - 1.5
+    y = (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(int)
+    return X, y
+
+def _modelo(X, y):
+    lgbm = LGBMClassifier(n_estimators=40, learning_rate=0.1, num_leaves=15, min_child_samples=10,
+                          class_weight="balanced", random_state=42, n_jobs=1, verbose=-1)
+    cal = CalibratedClassifierCV(Pipeline([("pre", build_preprocessor()), ("clf", lgbm)]), method="isotonic", cv=3)
+    return cal.fit(X, y)
+
+def test_fast_scorer_paridade_com_predict_proba():
+    X, y = _dados()
+    cal = _modelo(X, y)
+    art = export_fast_scorer({"model": cal, "feature_columns": FEATURES})
+    scorer = art["fast_scorer"]
+    assert scorer.n_folds == 3
+
+    Xt, _ = _dados(200, seed=1)
+    esperado = cal.predict_proba(Xt)
+    obtido = scorer.predict_proba(Xt.to_numpy())
+    np.testing.assert_allclose(obtido, esperado, rtol=0, atol=1e-9)
+
+    # linha única a partir de dict (com ausentes), como no /predict
+    row = Xt.iloc[3].to_dict()
+    row["salario_valor"] = None
+    v = scorer.vector(row)
+    assert np.isnan(v[FEATURES.index("salario_valor")])
+    esperado_1 = cal.predict_proba(pd.DataFrame([row]).reindex(columns=FEATURES).astype(float))[0, 1]
+    assert abs(scorer.score_one(v) - esperado_1) < 1e-9
+
+def test_api_usa_fast_scorer():
+    import app.main as m
+    X, y = _dados()
+    cal = _modelo(X, y)
+    art = export_fast_scorer({"model": cal, "feature_columns": FEATURES, "threshold": 0.5,
+                              "operating_mode": "prec80", "metadata": {}})
+
+    class SemPandas:
+        def predict_proba(self, X):
+            raise AssertionError("não deveria usar o pipeline sklearn")
+
+    m.artifact = art
+    m.model = SemPandas()
+    m.feature_columns = FEATURES
+    m.threshold = 0.5
+    feats = {k: float(v) for k, v in X.iloc[0].items() if not pd.isna(v)}
+    r = TestClient(m.app).post("/predict", json={"features": feats})
+    assert r.status_code == 200
+    esperado = cal.predict_proba(pd.DataFrame([feats]).reindex(columns=FEATURES).astype(float))[0, 1]
+    assert abs(r.json()["probabilidade_contratacao"] - esperado) < 1e-9
+
+def test_modo_single_um_booster_com_paridade():
+    from src.training.train import fit_calibrated
+    X, y = _dados()
+    params = dict(n_estimators=40, learning_rate=0.1, num_leaves=15, min_child_samples=10,
+                  class_weight="balanced", random_state=42, n_jobs=1, verbose=-1)
+    cal = fit_calibrated(X, y, params, mode="single")
+    scorer = export_fast_scorer({"model": cal, "feature_columns": FEATURES})["fast_scorer"]
+    assert scorer.n_folds == 1
+
+    Xt, _ = _dados(200, seed=1)
+    np.testing.assert_allclose(scorer.predict_proba(Xt.to_numpy()), cal.predict_proba(Xt), rtol=0, atol=1e-9)
+
+def test_artefato_diretorio_roundtrip_e_booster_nativo(tmp_path):
+    import joblib
+    from src.training.fast_scorer import export_artifact_dir, load_artifact_dir
+    from src.training.lgbm_native import NativeBooster
+    X, y = _dados()
+    cal = _modelo(X, y)
+    art = export_fast_scorer({"model": cal, "feature_columns": FEATURES, "threshold": 0.4,
+                              "operating_mode": "prec80", "metadata": {"n": np.int64(3)}})
+    pasta = export_artifact_dir(art, str(tmp_path / "modelo"))
+    lido = load_artifact_dir(pasta)
+    assert lido["threshold"] == 0.4 and lido["metadata"] == {"n": 3}
+    scorer = lido["fast_scorer"]
+    assert isinstance(scorer.fill_values, np.memmap)
+
+    Xt, _ = _dados(200, seed=1)
+    np.testing.assert_allclose(scorer.predict_proba(Xt.to_numpy()), cal.predict_proba(Xt), rtol=0, atol=1e-12)
+    assert all(isinstance(b, NativeBooster) for b in scorer.boosters)
+    assert [b.num_trees() for b in scorer.boosters] == [b.num_trees() for b in art["fast_scorer"].boosters]
+
+    # ainda serializável em joblib (boosters viram lightgbm.Booster, arrays saem do mmap)
+    joblib.dump(scorer, tmp_path / "s.joblib")
+    s2 = joblib.load(tmp_path / "s.joblib")
+    np.testing.assert_allclose(s2.predict_proba(Xt.to_numpy()), cal.predict_proba(Xt), rtol=0, atol=1e-12)
+
+def test_boosters_preguicosos_nao_misturam_export_novo(tmp_path):
+    from src.training.fast_scorer import export_artifact_dir, load_artifact_dir
+    X, y = _dados()
+    v1, v2 = _modelo(X, y), _modelo(*_dados(seed=7))
+    pasta = str(tmp_path / "modelo")
+    export_artifact_dir(export_fast_scorer({"model": v1, "feature_columns": FEATURES, "threshold": 0.5}), pasta)
+    scorer = load_artifact_dir(pasta)["fast_scorer"]     # MODEL_LAZY_LOAD: boosters ainda não lidos
+
+    # novo export troca o diretório antes da primeira predição: o scorer continua inteiro na versão 1
+    export_artifact_dir(export_fast_scorer({"model": v2, "feature_columns": FEATURES, "threshold": 0.5}), pasta)
+    Xt, _ = _dados(200, seed=1)
+    np.testing.assert_allclose(scorer.predict_proba(Xt.to_numpy()), v1.predict_proba(Xt), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(load_artifact_dir(pasta)["fast_scorer"].predict_proba(Xt.to_numpy()),
+                               v2.predict_proba(Xt), rtol=0, atol=1e-12)
+
+def test_api_carrega_artefato_diretorio(tmp_path, monkeypatch):
+    import app.main as m
+    from src.training.fast_scorer import export_artifact_dir
+    X, y = _dados()
+    cal = _modelo(X, y)
+    art = export_fast_scorer({"model": cal, "feature_columns": FEATURES, "threshold": 0.5,
+                              "operating_mode": "prec80", "metadata": {}})
+    pasta = export_artifact_dir(art, str(tmp_path / "modelo"))
+    from app.model_registry import ModelRegistry
+    monkeypatch.setattr(m, "registry", ModelRegistry({"default": pasta}, on_swap=m._publicar))
+    m._load_artifact()
+    assert m.artifact["format"] == "dir"
+    feats = {k: float(v) for k, v in X.iloc[0].items() if not pd.isna(v)}
+    r = TestClient(m.app).post("/predict", json={"features": feats})
+    assert r.status_code == 200
+    esperado = cal.predict_proba(pd.DataFrame([feats]).reindex(columns=FEATURES).astype(float))[0, 1]
+    assert abs(r.json()["probabilidade_contratacao"] - esperado) < 1e-9
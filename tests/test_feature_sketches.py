@@ -0,0 +1,178 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+import numpy as np, pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.feature_sketches import (
+    COLUMNS, ROWS, SCORE, hist_quantile, hourly_volume, incomplete_hours, merge_sketches, sketch_rows,
+)
+from src.utils import dsn_from_env
+
+H1 = datetime(2025, 1, 1, 10, 0, tzinfo=timezone.utc)
+H2 = datetime(2025, 1, 1, 11, 0, tzinfo=timezone.utc)
+
+def _payloads(n, seed):
+    rng = np.random.default_rng(seed)
+    out = []
+    for i in range(n):
+        p = {"tem_email": int(rng.random() < 0.6), "salario_valor": float(round(rng.lognormal(8, 0.5), 2))}
+        if i % 7 == 0:
+            p["salario_valor"] = None
+        if i % 11 == 0:
+            p.pop("tem_email")
+        out.append(p)
+    return out
+
+def test_sketches_somadas_equivalem_aos_payloads():
+    p1, p2 = _payloads(300, 0), _payloads(200, 1)
+    # dois lotes na mesma hora + um em outra: soma das linhas = estatística do conjunto
+    rows = sketch_rows(p1[:150], hora=H1) + sketch_rows(p1[150:], hora=H1) + sketch_rows(p2, hora=H2)
+    df = pd.DataFrame(rows, columns=list(COLUMNS))
+    agg = merge_sketches(df)
+    todos = p1 + p2
+    sal = np.array([p["salario_valor"] for p in todos if p["salario_valor"] is not None])
+    assert agg[ROWS]["n"] == 500
+    assert agg["salario_valor"]["n"] == len(sal)
+    assert np.isclose(agg["salario_valor"]["mean"], sal.mean()) and np.isclose(agg["salario_valor"]["std"], sal.std())
+    assert agg["salario_valor"]["hist"].sum() == len(sal)
+    assert abs(hist_quantile(agg["salario_valor"]["hist"], 0.5) / np.median(sal) - 1) < 0.15
+
+def test_volume_por_hora():
+    rows = (sketch_rows(_payloads(10, 0), scores=[0.2] * 10, decisions=[0] * 10, hora=H1)
+            + sketch_rows(_payloads(4, 1), scores=[0.8] * 4, decisions=[1] * 4, hora=H2))
+    vol = hourly_volume(pd.DataFrame(rows, columns=list(COLUMNS)))
+    assert vol["n_preds"].tolist() == [10, 4]
+    assert np.allclose(vol["avg_score"], [0.2, 0.8])
+
+def test_writer_grava_sketches_em_savepoint(monkeypatch):
+    import app.inference_logger as il
+
+    class Cur:
+        def __init__(self):
+            self.sql = []
+        def execute(self, sql, *args):
+            self.sql.append(" ".join(sql.split()[:2]))
+
+    gravadas = []
+    monkeypatch.setattr(il, "upsert_sketches", lambda cur, rows: gravadas.append(rows))
+    w = il.InferenceLogWriter(queue_size=10)
+    w._sketch_table_ok = True
+    batch = [("prec80", 0.5, None, "x", 0.7, 1, 1, {"tem_email": 1, "salario_valor": 3000.0})]
+
+    cur = Cur()
+    w._gravar_sketches(cur, batch)
+    assert cur.sql == ["SAVEPOINT sketches", "RELEASE SAVEPOINT"]
+    assert {r[1] for r in gravadas[0]} >= {"tem_email", "salario_valor", ROWS, SCORE}
+
+    # falha no upsert: desfaz só as sketches (o INSERT do inference_log segue na transação)
+    def falha(cur, rows):
+        raise RuntimeError("lock timeout")
+    monkeypatch.setattr(il, "upsert_sketches", falha)
+    cur = Cur()
+    w._gravar_sketches(cur, batch)
+    assert cur.sql == ["SAVEPOINT sketches", "ROLLBACK TO"]
+    assert w.stats()["sketch_failed"] == 1
+
+def test_writer_refaz_ddl_das_sketches_apos_falha(monkeypatch):
+    import app.inference_logger as il
+
+    class Cur:
+        def __init__(self):
+            self.sql = []
+        def execute(self, sql, *args):
+            self.sql.append(" ".join(sql.split()[:2]))
+
+    def falha(cur, rows):
+        raise RuntimeError("lock timeout")
+    monkeypatch.setattr(il, "upsert_sketches", falha)
+    w = il.InferenceLogWriter(queue_size=10)
+    batch = [("prec80", 0.5, None, "x", 0.7, 1, 1, {"tem_email": 1})]
+
+    # o primeiro upsert falha: o ROLLBACK TO SAVEPOINT leva junto o CREATE TABLE
+    cur = Cur()
+    w._gravar_sketches(cur, batch)
+    assert cur.sql == ["SAVEPOINT sketches", "CREATE TABLE", "ROLLBACK TO"]
+    assert w._sketch_table_ok is False
+
+    monkeypatch.setattr(il, "upsert_sketches", lambda cur, rows: None)
+    cur = Cur()
+    w._gravar_sketches(cur, batch)
+    assert cur.sql == ["SAVEPOINT sketches", "CREATE TABLE", "RELEASE SAVEPOINT"]
+    assert w._sketch_table_ok is True
+
+    # falha da transação externa (depois do DDL) também invalida a tabela garantida
+    w._engine = type("E", (), {"raw_connection": lambda self: (_ for _ in ()).throw(RuntimeError("conexão"))})()
+    w._flush([(H1, batch[0])])
+    assert w._sketch_table_ok is False
+
+def test_horas_incompletas_sao_completadas_pelo_log(monkeypatch):
+    import src.feature_sketches as fs
+    h = [datetime(2025, 1, 1, i, tzinfo=timezone.utc) for i in range(4)]
+    p = [{"tem_email": 1}]
+    # sketches: hora 0 completa, hora 1 com um lote perdido, horas 2 e 3 sem sketch (só no log)
+    sk = pd.DataFrame(sketch_rows(p * 5, hora=h[0]) + sketch_rows(p * 2, hora=h[1]), columns=list(COLUMNS))
+    log = {h[0]: 5, h[1]: 3, h[2]: 4, h[3]: 1}
+    assert incomplete_hours(sk, log) == h[1:]
+
+    consultas = []
+    def do_log(conn, ini, fim=None):
+        consultas.append((ini, fim))
+        linhas = [r for x in h if ini <= x < fim for r in sketch_rows(p * log[x], hora=x)]
+        return pd.DataFrame(linhas, columns=list(COLUMNS)), "inference_log"
+    monkeypatch.setattr(fs, "log_hourly_counts", lambda conn, since: log)
+    monkeypatch.setattr(fs, "_sketches_do_log", do_log)
+
+    df, origem = fs.fill_gaps(None, sk, h[0])
+    assert origem == "sketches+inference_log"
+    assert consultas == [(h[1], h[3] + timedelta(hours=1))]   # horas consecutivas: uma consulta só
+    assert hourly_volume(df)["n_preds"].tolist() == [5, 3, 4, 1]
+
+    monkeypatch.setattr(fs, "log_hourly_counts", lambda conn, since: {h[0]: 5})
+    assert fs.fill_gaps(None, sk, h[0])[1] == "sketches"
+
+# precisa de Postgres (POSTGRES_* do ambiente); sem banco acessível, o teste é pulado
+@pytest.fixture
+def pg(monkeypatch):
+    monkeypatch.delenv("INFERENCE_LOG_MODE", raising=False)
+    schema = f"test_sk_{uuid.uuid4().hex[:8]}"
+    try:
+        eng = create_engine(dsn_from_env(), connect_args={"options": f"-csearch_path={schema}"})
+        with eng.begin() as c:
+            c.execute(text(f"CREATE SCHEMA {schema}"))
+    except Exception as e:
+        pytest.skip(f"Postgres indisponível: {e}")
+    yield eng
+    with eng.begin() as c:
+        c.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+    eng.dispose()
+
+def test_flush_entre_sketches_e_contagens_nao_marca_hora_incompleta(pg):
+    import src.feature_sketches as fs
+    agora = datetime.now(timezone.utc)
+    since = agora - timedelta(hours=1)
+    with pg.begin() as c:
+        c.execute(text("CREATE TABLE inference_log (ts timestamptz, payload jsonb, score float8, decision int)"))
+        fs.ensure_table(c)
+
+    def flush(n):
+        # como o writer: linhas do log e sketches no mesmo commit
+        with pg.begin() as c:
+            c.execute(text("""INSERT INTO inference_log SELECT :t, '{"tem_email": 1}', 0.5, 1
+                              FROM generate_series(1, :n)"""), {"t": agora, "n": n})
+            with c.connection.driver_connection.cursor() as cur:
+                fs.upsert(cur, sketch_rows([{"tem_email": 1}] * n, scores=[0.5] * n, decisions=[1] * n,
+                                           hora=fs.hora_utc(agora)))
+
+    flush(3)
+    with fs.snapshot_engine(pg).connect() as c:
+        sk = fs.load_sketches(c, since)
+        flush(2)                            # outro writer commita entre as duas leituras
+        df, origem = fs.fill_gaps(c, sk, since)
+    assert origem == "sketches" and hourly_volume(df)["n_preds"].tolist() == [3]
+
+    # em READ COMMITTED a contagem do log vê o commit novo e a hora corrente seria relida do log
+    with pg.connect() as c:
+        sk = fs.load_sketches(c, since)
+        flush(1)
+        assert fs.fill_gaps(c, sk, since)[1] == "sketches+inference_log"
@@ -1,5 +1,7 @@
+import os
 import pandas as pd
 from src.feature_engineering.applicants_features import construir_features_candidatos_from_raw
+from benchmarks.dados import gerar_applicants_raw
 
 def test_build_minimal_row():
     raw = pd.DataFrame([{
@@ -13,3 +15,104 @@ def test_build_minimal_row():
     assert "tem_email" in df.columns
     assert "salario_valor" in df.columns
     assert len(df) == 1
+
+def test_vetorizada_identica_a_linha_a_linha():
+    import random
+    import numpy as np
+    from src.feature_engineering.applicants_features import construir_features_candidatos_from_raw_linha_a_linha
+
+    valores = [None, np.nan, "", " ", "-", "nan", "Nenhum", "Básico", "Intermediário", "AVANÇADO", "Fluente",
+               "intermediario/basico", "a@gmail.com", " X@Empresa.COM.br ", "a@b@c", "R$ 3.500,00", "3000", "1_000",
+               "inf", "-5", "2.000.000", "1e3", "٣٠٠٠", "Ensino Superior Completo", "Ensino Superior Incompleto",
+               "Pós-Graduação", "Tecnólogo", "Ensino Médio", "Administrativa", "Financeira", "TI", "Analista de BI",
+               "77-418 77-420", "SAP FI", "ſap fi", "Kpi", "admınistração", "Excel   Avançado, KPI, controladoria",
+               "contábil SAP protheus navision", "x" * 1600, "(11) 99999-0000", "https://linkedin.com/in/x", 31001]
+    colunas = [
+        "infos_basicas.email", "informacoes_pessoais.email", "infos_basicas.telefone", "informacoes_pessoais.url_linkedin",
+        "infos_basicas.local", "infos_basicas.objetivo_profissional", "informacoes_profissionais.titulo_profissional",
+        "informacoes_profissionais.area_atuacao", "informacoes_profissionais.remuneracao",
+        "formacao_e_idiomas.nivel_academico", "formacao_e_idiomas.nivel_ingles", "formacao_e_idiomas.nivel_espanhol",
+        "formacao_e_idiomas.outro_idioma", "informacoes_profissionais.certificacoes",
+        "informacoes_profissionais.outras_certificacoes", "informacoes_profissionais.conhecimentos_tecnicos", "cv_pt",
+    ]
+    rng = random.Random(7)
+    for _ in range(60):
+        n = rng.randint(1, 30)
+        d = {"infos_basicas.codigo_profissional": [rng.choice([str(rng.randint(1, 9999)), None, "x"]) for _ in range(n)]}
+        for c in colunas:
+            if rng.random() < 0.85:
+                d[c] = [rng.choice(valores) for _ in range(n)]
+        raw = pd.DataFrame(d)
+        esperado = construir_features_candidatos_from_raw_linha_a_linha(raw)
+        obtido = construir_features_candidatos_from_raw(raw)
+        pd.testing.assert_frame_equal(obtido, esperado)
+        assert obtido.to_csv(index=False) == esperado.to_csv(index=False)
+
+def test_features_em_paralelo_na_ordem_e_igual_ao_sequencial():
+    from src.feature_engineering.applicants_features import _features_em_paralelo
+    raw = gerar_applicants_raw(300, seed=3)
+    chunks = [raw.iloc[i:i + 40] for i in range(0, len(raw), 40)]
+    seq = [construir_features_candidatos_from_raw(c) for c in chunks]
+    par = list(_features_em_paralelo(iter(chunks), workers=2))
+    assert [n for n, _ in par] == [len(c) for c in chunks]
+    for (_, a), b in zip(par, seq):
+        pd.testing.assert_frame_equal(a, b)
+
+def test_ids_features_segue_conversao_do_construir_features():
+    from src.feature_engineering.incremental import _ids_features
+    assert _ids_features(["31001", " 7 ", "abc", None, "31001"]) == [7, 31001]
+
+def _registros_brutos(n, seed):
+    """Registros aninhados (formato de applicants.json) com chaves ausentes, None e tipos misturados."""
+    import random
+    rng = random.Random(seed)
+    out = []
+    for row in gerar_applicants_raw(n, seed=seed).to_dict("records"):
+        reg = {}
+        for k, v in row.items():
+            if rng.random() < 0.1:
+                continue
+            if rng.random() < 0.05:
+                v = rng.choice([None, float("nan"), 3000, True, " 7 ", "İSTANBUL", "-"])
+            if "." in k:
+                grupo, campo = k.split(".", 1)
+                reg.setdefault(grupo, {})[campo] = v
+            else:
+                reg[k] = v
+        out.append(reg)
+    return out
+
+def test_features_candidato_igual_a_versao_em_lote():
+    import math
+    from src.feature_engineering.applicants_features import construir_features_candidato
+    for reg in _registros_brutos(300, seed=11):
+        um = construir_features_candidato(reg)
+        lote = construir_features_candidatos_from_raw(pd.json_normalize([reg]))
+        if lote.empty:
+            assert um["codigo_profissional"] is None
+            continue
+        esperado = lote.iloc[0].to_dict()
+        assert list(um) == list(esperado)
+        for k, v in esperado.items():
+            if v is pd.NA or (isinstance(v, float) and math.isnan(v)):
+                assert um[k] is None, k
+            else:
+                assert um[k] == v, k
+
+# orçamento folgado por padrão (5 ms no p95; a medida típica fica bem abaixo de 1 ms) para tolerar runners
+# compartilhados; FEATURE_LATENCY_BUDGET_MS=1 aperta para a meta de produção
+def test_features_candidato_orcamento_de_latencia():
+    import time
+    import numpy as np
+    from src.feature_engineering.applicants_features import construir_features_candidato
+    budget_ms = float(os.getenv("FEATURE_LATENCY_BUDGET_MS", "5"))
+    regs = _registros_brutos(500, seed=5)
+    for reg in regs[:20]:
+        construir_features_candidato(reg)  # aquecimento
+    tempos = []
+    for reg in regs:
+        t0 = time.perf_counter()
+        construir_features_candidato(reg)
+        tempos.append((time.perf_counter() - t0) * 1000)
+    p95 = float(np.percentile(tempos, 95))
+    assert p95 < budget_ms, f"p95 {p95:.3f} ms acima do orçamento de {budget_ms} ms"
@@ -0,0 +1,99 @@
+import uuid
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.feature_engineering import incremental
+from src.feature_engineering.applicants_features import construir_features_candidatos_from_raw
+from src.utils import dsn_from_env
+from benchmarks.dados import gerar_applicants_raw
+
+COD = incremental.COD_RAW
+
+# precisa de Postgres (POSTGRES_* do ambiente); sem banco acessível, os testes são pulados
+@pytest.fixture
+def pg(monkeypatch):
+    schema = f"test_incr_{uuid.uuid4().hex[:8]}"
+    try:
+        eng = create_engine(dsn_from_env(), connect_args={"options": f"-csearch_path={schema}"})
+        with eng.begin() as c:
+            c.execute(text(f"CREATE SCHEMA {schema}"))
+    except Exception as e:
+        pytest.skip(f"Postgres indisponível: {e}")
+    monkeypatch.setattr(incremental, "make_engine_from_env", lambda: eng)
+    yield eng
+    with eng.begin() as c:
+        c.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+    eng.dispose()
+
+
+def _bruto(ordem_dup=(0, 1)):
+    raw = gerar_applicants_raw(30, seed=1)
+    raw.loc[raw[COD] == "7", "infos_basicas.email"] = "a@empresa.com"
+    raw.loc[raw[COD] == "5", "infos_basicas.email"] = "a@gmail.com"
+    dup = raw[raw[COD] == "5"].assign(**{"infos_basicas.email": "outro@empresa.com"})
+    partes = [raw[raw[COD] == "5"], dup]
+    return pd.concat([raw[raw[COD] != "5"]] + [partes[i] for i in ordem_dup], ignore_index=True)
+
+
+def _rebuild_completo(eng, raw):
+    # mesmo resultado dos builders completos: sem deduplicação (código 5 fica repetido)
+    with eng.begin() as c:
+        raw.to_sql("applicants_raw", c, index=False)
+        construir_features_candidatos_from_raw(raw).to_sql("applicants_feat", c, index=False)
+        pd.DataFrame({"prospect_codigo": [5, 7, 7, 9, 12], "prospect_situacao_candidado": ["x"] * 5,
+                      "target": [1.0, 0.0, 1.0, 1.0, 0.0]}).to_sql("prospects_labels", c, index=False)
+        c.execute(text("""CREATE TABLE gold_applicants AS SELECT a.*, l.prospect_situacao_candidado AS status_label,
+                          l.target FROM applicants_feat a JOIN prospects_labels l ON l.prospect_codigo = a.codigo_profissional"""))
+
+
+def _ler(eng, sql):
+    with eng.connect() as c:
+        return pd.read_sql(text(sql), c)
+
+
+@pytest.mark.parametrize("ordem_dup", [(0, 1), (1, 0)])
+def test_repara_duplicados_do_rebuild_completo(pg, ordem_dup):
+    _rebuild_completo(pg, _bruto(ordem_dup))
+    res = incremental.refresh_applicants_feat_incremental()
+    assert res["alterados"] == 30 and res["removidos"] == 0
+
+    feat = _ler(pg, "SELECT * FROM applicants_feat ORDER BY codigo_profissional")
+    assert feat["codigo_profissional"].tolist() == list(range(1, 31))
+    # entre as duas linhas brutas do código 5 fica a de maior md5, qualquer que seja a ordem de leitura
+    vencedora = _ler(pg, f'SELECT "infos_basicas.email" AS email FROM applicants_raw r WHERE "{COD}" = \'5\' '
+                         f'ORDER BY md5(r::text) DESC LIMIT 1')["email"].item()
+    assert feat.loc[feat["codigo_profissional"] == 5, "email_corporativo"].item() == int(vencedora == "outro@empresa.com")
+    gold = _ler(pg, "SELECT codigo_profissional, count(*) AS n FROM gold_applicants GROUP BY 1 ORDER BY 1")
+    assert dict(zip(gold["codigo_profissional"], gold["n"])) == {5: 1, 7: 2, 9: 1, 12: 1}
+    assert _ler(pg, "SELECT count(*) AS n FROM applicants_feat_state")["n"].item() == 30
+
+    # nada mudou: nenhum trabalho
+    assert incremental.refresh_applicants_feat_incremental()["alterados"] == 0
+
+
+def test_delta_upsert_remocao_estado_e_gold(pg):
+    _rebuild_completo(pg, _bruto())
+    incremental.refresh_applicants_feat_incremental()
+    antes = _ler(pg, "SELECT updated_at FROM applicants_feat_state WHERE codigo_profissional = '3'")
+
+    with pg.begin() as c:
+        c.execute(text(f'UPDATE applicants_raw SET "infos_basicas.email" = \'\' WHERE "{COD}" = \'7\''))
+        c.execute(text(f'DELETE FROM applicants_raw WHERE "{COD}" = \'9\''))
+
+    res = incremental.refresh_applicants_feat_incremental()
+    assert (res["alterados"], res["removidos"], res["feat_upserts"]) == (1, 1, 1)
+    assert res["gold_linhas"] == 2   # código 7 tem dois prospects; o 9 só sai
+
+    feat = _ler(pg, "SELECT codigo_profissional, tem_email FROM applicants_feat")
+    assert 9 not in set(feat["codigo_profissional"]) and len(feat) == 29
+    assert feat.loc[feat["codigo_profissional"] == 7, "tem_email"].item() == 0
+
+    gold = _ler(pg, "SELECT codigo_profissional, tem_email FROM gold_applicants ORDER BY 1")
+    assert gold["codigo_profissional"].tolist() == [5, 7, 7, 12]
+    assert gold.loc[gold["codigo_profissional"] == 7, "tem_email"].tolist() == [0, 0]
+
+    estado = _ler(pg, "SELECT codigo_profissional, updated_at FROM applicants_feat_state")
+    assert "9" not in set(estado["codigo_profissional"]) and len(estado) == 29
+    # códigos não alterados não são reescritos no estado
+    assert estado.loc[estado["codigo_profissional"] == "3", "updated_at"].item() == antes["updated_at"].item()
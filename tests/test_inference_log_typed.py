@@ -0,0 +1,94 @@
+from datetime import datetime, timezone
+import pytest
+
+from app.inference_logger import InferenceLogWriter
+from src import inference_log_typed as typed_log
+
+TS = datetime(2025, 1, 1, 10, 30, tzinfo=timezone.utc)
+
+def _row(payload, i=1):
+    return ("prec80", 0.5, None, "x.joblib", 0.7, 1, i, payload)
+
+def test_colunas_tipadas_e_extra():
+    cols = typed_log.valid_columns(["tem_email", "salario_valor", "Nome Estranho", "score"])
+    assert cols == ["salario_valor", "tem_email"]   # nomes fora do padrão e colunas fixas não viram coluna
+    tipos = [typed_log.column_type(c) for c in cols]
+    assert tipos == ["REAL", "SMALLINT"]
+
+    r = typed_log.typed_row(TS, _row({"tem_email": True, "salario_valor": "3500.5", "nova": 2}), cols, tipos)
+    assert r[:8] == (TS, "prec80", 0.5, None, "x.joblib", 0.7, 1, 1)
+    assert r[8] == '{"nova": 2}' and r[9:] == (3500.5, 1)
+
+    # valor que não cabe no tipo vai para extra (não é perdido)
+    r = typed_log.typed_row(TS, _row({"tem_email": "sim", "salario_valor": None}), cols, tipos)
+    assert r[8] == '{"tem_email": "sim"}' and r[9:] == (None, None)
+    r = typed_log.typed_row(TS, _row({"tem_email": 1}), cols, tipos)
+    assert r[8] is None
+
+def test_copy_text_escapa_e_marca_nulos():
+    txt = typed_log.copy_text([(TS, "a\tb\\c\nd", None, 1.5, 2)])
+    assert txt == "2025-01-01T10:30:00+00:00\ta\\tb\\\\c\\nd\t\\N\t1.5\t2\n"
+
+def test_writer_typed_garante_schema_e_particao_uma_vez():
+    class Cur:
+        def __init__(self):
+            self.sql, self.copias = [], []
+        def execute(self, sql, *args):
+            self.sql.append(sql)
+        def copy_expert(self, sql, buf):
+            self.copias.append((sql, buf.read()))
+
+    w = InferenceLogWriter(mode="typed")
+    w.register_columns(["tem_email", "salario_valor"])
+    cur = Cur()
+    w._inserir_typed(cur, [_row({"tem_email": 1, "salario_valor": 1000.0})])
+    w._inserir_typed(cur, [_row({"tem_email": 0})])
+    ddl = [s for s in cur.sql if "CREATE TABLE IF NOT EXISTS inference_log_typed " in s]
+    particoes = [s for s in cur.sql if "PARTITION OF" in s]
+    assert len(ddl) == 1 and len(particoes) == 2   # hoje + amanhã, só no primeiro lote
+    assert len(cur.copias) == 2 and cur.copias[0][0].endswith("salario_valor, tem_email) FROM STDIN")
+
+    # modelo novo com outra feature: ALTER TABLE ADD COLUMN antes do próximo lote
+    w.register_columns(["tem_linkedin"])
+    w._inserir_typed(cur, [_row({"tem_linkedin": 1})])
+    assert any("ADD COLUMN IF NOT EXISTS tem_linkedin SMALLINT" in s for s in cur.sql)
+
+def test_writer_rejeita_modo_desconhecido():
+    with pytest.raises(ValueError):
+        InferenceLogWriter(mode="parquet")
+
+def test_writer_usa_horario_da_requisicao_e_nao_do_flush(monkeypatch):
+    import app.inference_logger as il
+    from datetime import timedelta
+
+    class Cur:
+        def __init__(self):
+            self.sql, self.copias = [], []
+        def execute(self, sql, *args):
+            self.sql.append(sql)
+        def copy_expert(self, sql, buf):
+            self.copias.append(buf.read())
+
+    gravadas = []
+    monkeypatch.setattr(il, "upsert_sketches", lambda cur, rows: gravadas.extend(rows))
+    w = InferenceLogWriter(mode="typed")
+    w._sketch_table_ok = True
+    w.register_columns(["tem_email"])
+    # lote gravado depois da meia-noite com uma requisição de antes dela
+    antes, depois = datetime(2025, 1, 1, 23, 59, 59, tzinfo=timezone.utc), datetime(2025, 1, 2, 0, 0, 1, tzinfo=timezone.utc)
+    batch = [_row({"tem_email": 1}, 1), _row({"tem_email": 0}, 2)]
+    cur = Cur()
+    w._inserir_typed(cur, batch, [antes, depois])
+    w._gravar_sketches(cur, batch, [antes, depois])
+
+    particoes = " ".join(s for s in cur.sql if "PARTITION OF" in s)
+    assert all(p in particoes for p in ("_p20250101", "_p20250102", "_p20250103"))
+    linhas = cur.copias[0].splitlines()
+    assert linhas[0].startswith("2025-01-01T23:59:59") and linhas[1].startswith("2025-01-02T00:00:01")
+    horas = {r[0] for r in gravadas if r[1] == "__rows__"}
+    assert horas == {antes.replace(minute=0, second=0), depois.replace(second=0)}
+
+    # partições já garantidas não são recriadas; só o dia novo (e o seguinte)
+    cur = Cur()
+    w._inserir_typed(cur, [_row({"tem_email": 1})], [depois + timedelta(days=1)])
+    assert [s for s in cur.sql if "PARTITION OF" in s and "_p20250102" in s] == []
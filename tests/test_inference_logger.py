@@ -0,0 +1,48 @@
+from app.inference_logger import InferenceLogWriter
+
+def _row(i):
+    return ("prec80", 0.5, None, "x.joblib", 0.7, 1, i, {"tem_email": 1})
+
+def test_writer_drena_fila_em_micro_lotes():
+    lotes = []
+    class W(InferenceLogWriter):
+        def _flush(self, batch):
+            lotes.append(len(batch))
+            self._inc("written", len(batch)); self._inc("flushes")
+
+    w = W(queue_size=100, batch_size=4, flush_interval=60)
+    assert w.submit([_row(i) for i in range(10)]) == 10
+    w.stop(timeout=5)
+    st = w.stats()
+    assert sum(lotes) == 10 and max(lotes) <= 4
+    assert st["written"] == 10 and st["queue_depth"] == 0 and st["running"] is False
+
+def test_writer_conta_falhas_sem_propagar():
+    def engine_quebrado():
+        raise RuntimeError("sem banco")
+    w = InferenceLogWriter(queue_size=100, batch_size=500, flush_interval=60, engine_factory=engine_quebrado)
+    w.submit([_row(i) for i in range(3)])
+    w.stop(timeout=5)
+    st = w.stats()
+    assert st["failed"] == 3 and st["written"] == 0
+    assert "sem banco" in st["last_error"]
+
+class _SemConsumidor(InferenceLogWriter):
+    def start(self):
+        pass  # fila nunca é drenada: exercita o backpressure do submit
+
+def test_fila_cheia_sem_espera_descarta():
+    w = _SemConsumidor(queue_size=2, block_ms=0)
+    assert w.submit([_row(i) for i in range(5)]) == 2
+    st = w.stats()
+    assert (st["enqueued"], st["dropped"], st["blocked"]) == (2, 3, 0)
+    assert st["queue_depth"] == 2 and st["running"] is False
+
+def test_fila_cheia_espera_block_ms_e_depois_descarta():
+    import time
+    w = _SemConsumidor(queue_size=2, block_ms=20)
+    t0 = time.perf_counter()
+    assert w.submit([_row(i) for i in range(4)]) == 2
+    assert time.perf_counter() - t0 >= 2 * 0.02 * 0.9   # esperou block_ms por linha excedente
+    st = w.stats()
+    assert (st["enqueued"], st["blocked"], st["dropped"]) == (2, 2, 2)
@@ -0,0 +1,17 @@
+import json
+from src.preprocessing.json_stream import JsonObjectStream
+
+def test_stream_igual_ao_json_load(tmp_path):
+    obj = {
+        "1": {"infos_basicas": {"nome": "Conceição", "codigo_profissional": "1"}, "cv_pt": "x" * 50},
+        "2": {"n": -2.5e10, "lista": [1, 2.0, None, True, {"a": "\"aspas\" \\ barra"}]},
+        "3": 12345678901234,
+        "4": {},
+    }
+    p = tmp_path / "a.json"
+    p.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    # buffers minúsculos forçam cortes no meio de números, strings e caracteres multibyte
+    for buf_size in (1, 2, 3, 7, 1 << 20):
+        s = JsonObjectStream(str(p), buf_size=buf_size)
+        assert dict(s) == obj
+        assert s.bytes_read == s.total_bytes
@@ -0,0 +1,51 @@
+import threading
+from fastapi.testclient import TestClient
+
+from app.metrics import Counter, Histogram, Registry
+
+
+def test_histograma_cumulativo_e_shards_por_thread():
+    h = Histogram("lat", "latência", ("stage",), buckets=(0.01, 0.1))
+    c = Counter("req", "requisições", ("endpoint",))
+
+    def trabalho():
+        for v in (0.005, 0.05, 0.5):
+            h.observe(v, "predict_proba")
+        c.inc("/predict")
+
+    ths = [threading.Thread(target=trabalho) for _ in range(4)]
+    for t in ths:
+        t.start()
+    for t in ths:
+        t.join()
+
+    reg = Registry()
+    reg.add(h); reg.add(c)
+    txt = reg.render()
+    assert '# TYPE lat histogram' in txt
+    assert 'lat_bucket{stage="predict_proba",le="0.01"} 4' in txt
+    assert 'lat_bucket{stage="predict_proba",le="0.1"} 8' in txt
+    assert 'lat_bucket{stage="predict_proba",le="+Inf"} 12' in txt
+    assert 'lat_count{stage="predict_proba"} 12' in txt
+    assert 'req{endpoint="/predict"} 4.0' in txt
+
+
+def test_endpoint_metrics_com_etapas_e_decisoes(monkeypatch):
+    import app.main as m
+    class FakeModel:
+        def predict_proba(self, X):
+            return [[0.3, 0.7]] * len(X)
+    monkeypatch.setattr(m.log_writer, "submit", lambda rows: len(rows))
+    m.artifact = {"model": None, "feature_columns": ["tem_email"], "threshold": 0.6, "operating_mode": "prec80", "metadata": {}}
+    m.model, m.feature_columns, m.threshold = FakeModel(), ["tem_email"], 0.6
+
+    client = TestClient(m.app)
+    assert client.post("/predict", json={"features": {"tem_email": 1}}).status_code == 200
+    r = client.get("/metrics")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+    txt = r.text
+    assert 'api_requests_total{endpoint="/predict",method="POST",status="200"}' in txt
+    for stage in ("validation", "dataframe_build", "predict_proba", "logging"):
+        assert f'api_stage_duration_seconds_count{{endpoint="/predict",stage="{stage}"}}' in txt
+    assert 'api_decisions_total{model="default",version="0",decision="1"}' in txt
+    assert "inference_log_queue_depth" in txt
@@ -0,0 +1,105 @@
+import os, threading, time
+import joblib
+from fastapi.testclient import TestClient
+
+from app.model_registry import ModelRegistry, parse_artifacts
+
+
+class Fixo:
+    def __init__(self, p):
+        self.p = p
+    def predict_proba(self, X):
+        return [[1 - self.p, self.p]] * len(X)
+
+def _salvar(path, p, thr=0.5, mode="prec80"):
+    joblib.dump({"model": Fixo(p), "feature_columns": ["tem_email", "salario_valor"], "threshold": thr,
+                 "operating_mode": mode, "metadata": {"created_at": f"p={p}"}}, path)
+    # mtime distinto mesmo em sistemas de arquivos com resolução grossa
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + int(time.time_ns() % 10**9) + 1))
+
+def test_parse_artifacts():
+    assert parse_artifacts("prec80=a.joblib, prec90 = b") == {"prec80": "a.joblib", "prec90": "b"}
+    assert parse_artifacts("") == {}
+
+def test_reload_troca_referencia_e_mantem_antigo_em_falha(tmp_path):
+    path = str(tmp_path / "m.joblib")
+    _salvar(path, 0.7)
+    reg = ModelRegistry({"prec80": path})
+    assert reg.reload(force=True)["reloaded"] == ["prec80"]
+    antigo = reg.get()
+    assert reg.reload()["unchanged"] == ["prec80"]
+
+    _salvar(path, 0.2, thr=0.3)
+    assert reg.reload()["reloaded"] == ["prec80"]
+    novo = reg.get("prec80")
+    assert novo.version == 2 and novo.threshold == 0.3
+    # quem já tinha a referência antiga (requisição em andamento) segue com ela
+    assert antigo.threshold == 0.5 and antigo.model.p == 0.7
+
+    with open(path, "wb") as fh:
+        fh.write(b"corrompido")
+    res = reg.reload()
+    assert "prec80" in res["errors"] and reg.get() is novo
+    assert reg.stats()["failures"] == 1
+
+def test_reloads_concorrentes_publicam_em_ordem(tmp_path):
+    # watcher e /admin/reload ao mesmo tempo: a publicação da v2 não pode chegar depois da v3
+    publicados, trocou_v2 = [], threading.Event()
+
+    def on_swap(m):
+        if m.version == 2:
+            trocou_v2.set()
+            time.sleep(0.2)
+        publicados.append(m.version)
+
+    reg = ModelRegistry({"prec80": "x"}, on_swap=on_swap, loader=lambda path, lazy: {"model": None})
+    reg.load("prec80")
+    t = threading.Thread(target=reg.load, args=("prec80",))
+    t.start()
+    assert trocou_v2.wait(5)
+    reg.load("prec80")
+    t.join()
+    assert publicados == [1, 2, 3] and reg.get().version == publicados[-1]
+
+def test_watcher_recarrega_quando_arquivo_muda(tmp_path):
+    path = str(tmp_path / "m.joblib")
+    _salvar(path, 0.7)
+    trocas = []
+    reg = ModelRegistry({"prec80": path}, poll_interval=0.05, on_swap=trocas.append)
+    reg.reload(force=True)
+    reg.start()
+    try:
+        _salvar(path, 0.1)
+        limite = time.time() + 5
+        while reg.get().version < 2 and time.time() < limite:
+            time.sleep(0.02)
+    finally:
+        reg.stop()
+    assert reg.get().model.p == 0.1 and [t.version for t in trocas] == [1, 2]
+
+def test_api_varios_modelos_e_admin_reload(tmp_path, monkeypatch):
+    import app.main as m
+    p80, p90 = str(tmp_path / "p80.joblib"), str(tmp_path / "p90.joblib")
+    _salvar(p80, 0.7, thr=0.6, mode="prec80")
+    _salvar(p90, 0.7, thr=0.8, mode="prec90")
+    monkeypatch.setattr(m, "registry", ModelRegistry({"prec80": p80, "prec90": p90}, on_swap=m._publicar))
+    monkeypatch.setattr(m, "ADMIN_TOKEN", "segredo")
+    m._load_artifact()
+    client = TestClient(m.app)
+    payload = {"features": {"tem_email": 1, "salario_valor": 3000}}
+
+    r = client.post("/predict", json=payload).json()
+    assert r["model"] == "prec80" and r["aprovado_pelo_modelo"] is True
+    r = client.post("/predict?model=prec90", json=payload).json()
+    assert r["model"] == "prec90" and r["threshold"] == 0.8 and r["aprovado_pelo_modelo"] is False
+    assert client.post("/predict?model=xyz", json=payload).status_code == 404
+
+    v = client.get("/version").json()
+    assert v["default_model"] == "prec80" and set(v["models"]) == {"prec80", "prec90"}
+
+    _salvar(p80, 0.1, thr=0.6)
+    assert client.post("/admin/reload").status_code == 403
+    r = client.post("/admin/reload?model=prec80", headers={"X-Admin-Token": "segredo"}).json()
+    assert r["reloaded"] == ["prec80"] and r["models"]["prec80"]["version"] == 2
+    assert client.post("/predict", json=payload).json()["aprovado_pelo_modelo"] is False
@@ -0,0 +1,127 @@
+import threading
+import pytest
+from sqlalchemy import create_engine, text
+
+from src import pipeline as pl
+
+
+@pytest.fixture
+def eng(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'hist.db'}")
+
+
+def _dag(tmp_path, chamadas, barreira=None):
+    """a_in -> a_feat e b_in -> b_feat (ramos independentes) -> junta."""
+    src_a, src_b = tmp_path / "a.json", tmp_path / "b.json"
+    for p in (src_a, src_b):
+        if not p.exists():
+            p.write_text("{}")
+
+    def etapa(nome, entrada, saida, esperar=False):
+        def run():
+            chamadas.append(nome)
+            if esperar and barreira is not None:
+                barreira.wait()
+            (tmp_path / saida).write_text((tmp_path / entrada).read_text().upper())
+        return run
+
+    return [
+        pl.Stage("junta", etapa("junta", "a.feat", "gold"), deps=("a_feat", "b_feat"),
+                 files=(str(tmp_path / "a.feat"), str(tmp_path / "b.feat")), out_files=(str(tmp_path / "gold"),)),
+        pl.Stage("a_in", etapa("a_in", "a.json", "a.raw", esperar=True), files=(str(src_a),),
+                 out_files=(str(tmp_path / "a.raw"),)),
+        pl.Stage("b_in", etapa("b_in", "b.json", "b.raw", esperar=True), files=(str(src_b),),
+                 out_files=(str(tmp_path / "b.raw"),)),
+        pl.Stage("a_feat", etapa("a_feat", "a.raw", "a.feat"), deps=("a_in",), files=(str(tmp_path / "a.raw"),)),
+        pl.Stage("b_feat", etapa("b_feat", "b.raw", "b.feat"), deps=("b_in",), files=(str(tmp_path / "b.raw"),)),
+    ]
+
+
+def test_pula_etapas_inalteradas_e_refaz_as_seguintes(tmp_path, eng):
+    chamadas = []
+    stages = _dag(tmp_path, chamadas)
+    res = pl.run_pipeline(eng, stages, run_id="r1")
+    assert [r.stage for r in res] == ["a_in", "a_feat", "b_in", "b_feat", "junta"]
+    assert {r.status for r in res} == {"ok"}
+
+    chamadas.clear()
+    assert {r.status for r in pl.run_pipeline(eng, stages, run_id="r2")} == {"skipped"} and chamadas == []
+
+    # JSON do ramo a mudou: a_in e a_feat rodam; a saída de a_feat mudou, então junta também
+    (tmp_path / "a.json").write_text('{"x": 1}')
+    assert dict(pl.plan(eng, stages))["a_feat"] == "dependência vai rodar"
+    pl.run_pipeline(eng, stages, run_id="r3")
+    assert sorted(chamadas) == ["a_feat", "a_in", "junta"]
+
+    # saída apagada: roda de novo mesmo com as entradas iguais
+    chamadas.clear()
+    (tmp_path / "gold").unlink()
+    pl.run_pipeline(eng, stages, run_id="r4")
+    assert chamadas == ["junta"]
+
+    with eng.connect() as c:
+        rows = c.execute(text("SELECT run_id, stage, status FROM pipeline_runs WHERE stage = 'a_in' "
+                              "ORDER BY run_id")).fetchall()
+    assert [tuple(r) for r in rows] == [("r1", "a_in", "ok"), ("r2", "a_in", "skipped"),
+                                        ("r3", "a_in", "ok"), ("r4", "a_in", "skipped")]
+
+
+def test_ramos_independentes_rodam_em_paralelo(tmp_path, eng):
+    # as duas ingestões só passam da barreira se estiverem rodando ao mesmo tempo
+    stages = _dag(tmp_path, [], barreira=threading.Barrier(2, timeout=5))
+    res = pl.run_pipeline(eng, stages, workers=2)
+    assert {r.status for r in res} == {"ok"}
+
+
+def test_falha_bloqueia_so_os_dependentes(tmp_path, eng):
+    chamadas = []
+    stages = _dag(tmp_path, chamadas)
+
+    b_pronto = threading.Event()
+
+    # a_in só falha depois que o ramo b terminou: no mesmo passo, a_feat é bloqueada e junta não pode
+    # ser vista como pronta (todas as dependências com resultado)
+    def quebra():
+        assert b_pronto.wait(5)
+        raise RuntimeError("json inválido")
+
+    def b_feat(run):
+        def f():
+            run()
+            b_pronto.set()
+        return f
+    por_nome = {s.name: s for s in stages}
+    stages = [s for s in stages if s.name not in ("a_in", "b_feat")] + [
+        pl.Stage("a_in", quebra, files=por_nome["a_in"].files),
+        pl.Stage("b_feat", b_feat(por_nome["b_feat"].run), deps=("b_in",), files=por_nome["b_feat"].files),
+    ]
+    res = {r.stage: r for r in pl.run_pipeline(eng, stages, workers=2)}
+    assert res["a_in"].status == "failed" and "json inválido" in res["a_in"].error
+    assert res["a_feat"].status == res["junta"].status == "blocked"
+    assert res["b_in"].status == res["b_feat"].status == "ok"
+
+
+def test_force_e_only(tmp_path, eng):
+    chamadas = []
+    stages = _dag(tmp_path, chamadas)
+    pl.run_pipeline(eng, stages)
+    chamadas.clear()
+    pl.run_pipeline(eng, stages, force=["b_feat"])
+    assert chamadas == ["b_feat"]      # saída idêntica: junta continua atualizada
+    chamadas.clear()
+    pl.run_pipeline(eng, stages, only=["a_feat", "junta"], force=True)
+    assert chamadas == ["a_feat", "junta"]
+
+
+def test_dependencia_desconhecida_ou_ciclo():
+    nada = lambda: None
+    with pytest.raises(ValueError, match="desconhecida"):
+        pl.topological_order([pl.Stage("a", nada, deps=("x",))])
+    with pytest.raises(ValueError, match="Ciclo"):
+        pl.topological_order([pl.Stage("a", nada, deps=("b",)), pl.Stage("b", nada, deps=("a",))])
+
+
+def test_default_stages_formam_o_dag_do_projeto():
+    ordem = pl.topological_order(pl.default_stages())
+    assert ordem.index("applicants_ingest") < ordem.index("applicants_features") < ordem.index("gold")
+    assert ordem.index("prospects_labels") < ordem.index("gold") < ordem.index("train") < ordem.index("baseline")
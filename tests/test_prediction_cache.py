@@ -0,0 +1,60 @@
+import time
+from fastapi.testclient import TestClient
+
+from app.prediction_cache import PredictionCache, feature_key
+
+COLS = ["tem_email", "salario_valor"]
+
+def test_chave_canonica():
+    k = feature_key("prec80", 1, COLS, {"tem_email": 1, "salario_valor": 3000})
+    assert k == feature_key("prec80", 1, COLS, {"salario_valor": 3000.0, "tem_email": True, "extra": 5})
+    assert feature_key("prec80", 1, COLS, {"tem_email": 1}) == feature_key("prec80", 1, COLS, {"tem_email": 1, "salario_valor": float("nan")})
+    assert k != feature_key("prec80", 2, COLS, {"tem_email": 1, "salario_valor": 3000})
+    assert k != feature_key("prec90", 1, COLS, {"tem_email": 1, "salario_valor": 3000})
+    assert k != feature_key("prec80", 1, COLS, {"tem_email": 0, "salario_valor": 3000})
+
+def test_lru_ttl_e_contadores():
+    c = PredictionCache(max_items=2, ttl=0.05)
+    c.put(b"a", 0.1); c.put(b"b", 0.2)
+    assert c.get(b"a") == 0.1          # "a" passa a ser o mais recente
+    c.put(b"c", 0.3)                   # despeja "b"
+    assert c.get(b"b") is None and c.get(b"c") == 0.3
+    time.sleep(0.06)
+    assert c.get(b"a") is None
+    s = c.stats()
+    assert (s["hits"], s["misses"], s["evictions"], s["expired"]) == (2, 2, 1, 1)
+
+    c.check_owner("prec80", object())
+    c.put(b"x", 0.5)
+    c.check_owner("prec80", object())  # outro objeto de modelo com o mesmo nome: invalida
+    assert c.get(b"x") is None and c.stats()["invalidations"] == 1
+
+def test_api_usa_cache_e_log_em_contagem(monkeypatch):
+    import app.main as m
+    chamadas, logados = [], []
+    class FakeModel:
+        def predict_proba(self, X):
+            chamadas.append(len(X))
+            return [[0.3, 0.7]] * len(X)
+    monkeypatch.setattr(m, "prediction_cache", PredictionCache(max_items=100, ttl=60, log_hits="count"))
+    monkeypatch.setattr(m.log_writer, "submit", lambda rows: logados.extend(rows))
+    m.artifact = {"model": None, "feature_columns": COLS, "threshold": 0.6, "operating_mode": "prec80", "metadata": {}}
+    m.model, m.feature_columns, m.threshold = FakeModel(), COLS, 0.6
+
+    client = TestClient(m.app)
+    payload = {"features": {"tem_email": 1, "salario_valor": 3000}, "codigo_profissional": 1}
+    r1 = client.post("/predict", json=payload).json()
+    r2 = client.post("/predict", json=payload).json()
+    assert r1["probabilidade_contratacao"] == r2["probabilidade_contratacao"] == 0.7
+    assert chamadas == [1] and len(logados) == 1
+
+    # lote: só o item novo vai ao modelo; o hit não gera linha de log
+    r = client.post("/predict/batch", json={"items": [payload, {"features": {"tem_email": 0}}]}).json()
+    assert r["n"] == 2 and chamadas == [1, 1] and len(logados) == 2
+    st = client.get("/stats").json()["prediction_cache"]
+    assert (st["hits"], st["misses"], st["hits_not_logged"]) == (2, 2, 2)
+
+    # troca de modelo invalida
+    m.model = FakeModel()
+    client.post("/predict", json=payload)
+    assert chamadas == [1, 1, 1]
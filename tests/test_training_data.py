@@ -0,0 +1,90 @@
+import contextlib, os
+import numpy as np
+import src.training.data as data
+from src.training.data import load_gold
+
+class _Engine:
+    """Engine falso: o COPY ... TO STDOUT escreve `csv` no arquivo recebido."""
+    def __init__(self, csv):
+        self.csv, self.sqls = csv, []
+    def raw_connection(self):
+        eng = self
+        class _Cur:
+            def copy_expert(self, sql, fh):
+                eng.sqls.append(sql)
+                fh.write(eng.csv)
+            def close(self):
+                pass
+        class _Raw:
+            def cursor(self):
+                return _Cur()
+            def commit(self):
+                pass
+            def close(self):
+                pass
+        return _Raw()
+    def connect(self):
+        return contextlib.nullcontext(None)
+
+def test_load_gold_so_colunas_do_modelo_e_dtypes_compactos():
+    eng = _Engine("tem_email,salario_valor,ingl_basico,target\n1,5000.0,0,1.0\n0,,1,0\n1,3500.0,,\n")
+    df = load_gold(["tem_email", "salario_valor", "ingl_basico"], table="g", engine=eng, cache_dir="")
+    assert eng.sqls == ['COPY (SELECT "tem_email", "salario_valor", "ingl_basico", "target" FROM g) '
+                        'TO STDOUT WITH (FORMAT CSV, HEADER TRUE)']
+    assert len(df) == 2  # linha sem target descartada
+    assert df["tem_email"].dtype == np.uint8 and df["ingl_basico"].dtype == np.uint8
+    assert df["salario_valor"].dtype == np.float32 and np.isnan(df["salario_valor"].iloc[1])
+    assert df["target"].dtype == np.uint8 and df["target"].tolist() == [1, 0]
+
+def test_load_gold_texto_nao_numerico_vira_nan():
+    eng = _Engine("tem_email,salario_valor\nsim,100\n1,abc\n")
+    df = load_gold(["tem_email", "salario_valor"], target=None, engine=eng, cache_dir="")
+    assert df["tem_email"].dtype == np.float32 and np.isnan(df["tem_email"].iloc[0])
+    assert np.isnan(df["salario_valor"].iloc[1])
+
+def test_load_gold_cache_por_fingerprint_e_snapshot_sem_banco(tmp_path, monkeypatch):
+    fp = {"v": "a"}
+    monkeypatch.setattr(data, "table_fingerprint", lambda conn, table: fp["v"])
+    monkeypatch.setattr(data, "_identidade_banco", lambda engine, conn: "dev")
+    monkeypatch.delenv("GOLD_SNAPSHOT", raising=False)
+    eng = _Engine("tem_email,target\n1,1\n0,0\n")
+    cache = str(tmp_path / "cache")
+
+    df1 = load_gold(["tem_email"], engine=eng, cache_dir=cache)
+    df2 = load_gold(["tem_email"], engine=eng, cache_dir=cache)
+    assert len(eng.sqls) == 1  # segunda leitura veio do Parquet
+    assert df2.equals(df1) and df2["tem_email"].dtype == np.uint8
+
+    fp["v"] = "b"
+    eng.csv = "tem_email,target\n1,1\n"
+    assert len(load_gold(["tem_email"], engine=eng, cache_dir=cache)) == 1
+    assert len(eng.sqls) == 2 and len(os.listdir(cache)) == 1  # snapshot antigo descartado
+
+    # outro banco com a mesma impressão digital não reaproveita nem apaga o cache do primeiro
+    monkeypatch.setattr(data, "_identidade_banco", lambda engine, conn: "prod")
+    eng.csv = "tem_email,target\n0,0\n0,1\n"
+    assert load_gold(["tem_email"], engine=eng, cache_dir=cache)["target"].tolist() == [0, 1]
+    assert len(eng.sqls) == 3 and len(os.listdir(cache)) == 2
+
+    snap = str(tmp_path / "gold.parquet")
+    data.export_snapshot(snap, ["tem_email"], engine=eng, id_columns=())
+    df = load_gold(["tem_email"], engine=None, snapshot=snap)  # nenhum acesso ao banco
+    assert df["tem_email"].tolist() == [0, 0] and df["target"].dtype == np.uint8
+
+def test_split_unico_e_evaluate_usa_holdout_do_artefato(monkeypatch):
+    from src.training import evaluate
+    from src.training.data import split_treino_holdout
+    from src.training.train import holdout_payload
+    rng = np.random.default_rng(0)
+    df = data.pd.DataFrame({"codigo_profissional": np.arange(200), "f": rng.random(200),
+                            "target": np.tile([0, 1], 100).astype(np.uint8)})
+    df.loc[3, "f"] = np.nan
+    X_tr, X_te, y_tr, y_te = split_treino_holdout(df, ["f"])
+    assert len(X_tr) + len(X_te) == 199 and 3 not in X_tr.index.union(X_te.index)
+    assert split_treino_holdout(df, ["f"])[1].index.equals(X_te.index)  # determinístico
+
+    art = {"holdout": holdout_payload(df.loc[X_te.index, "codigo_profissional"], y_te, X_te["f"].to_numpy())}
+    monkeypatch.setattr(evaluate, "load_gold", lambda *a, **k: (_ for _ in ()).throw(AssertionError("leu a gold")))
+    y, p = evaluate.holdout_scores(art)
+    assert y.tolist() == y_te.tolist() and np.allclose(p, X_te["f"].to_numpy())
+    assert art["holdout"]["ids"].dtype == np.int64
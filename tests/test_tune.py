@@ -0,0 +1,26 @@
+import numpy as np, pandas as pd
+from src.training.train import FEATURES, LGBM_DEFAULTS
+from src.training.tune import amostrar_candidatos, buscar, melhores_params
+
+def test_amostrar_candidatos_base_primeiro_e_sem_repeticao():
+    espaco = {"num_leaves": [15, 31, 63], "learning_rate": [0.03, 0.1]}
+    grid = amostrar_candidatos(espaco, 50)
+    assert grid[0] == {"num_leaves": LGBM_DEFAULTS["num_leaves"], "learning_rate": LGBM_DEFAULTS["learning_rate"]}
+    assert len(grid) == 6 and len({tuple(sorted(c.items())) for c in grid}) == 6
+    amostra = amostrar_candidatos(espaco, 4, seed=1)
+    assert len(amostra) == 4 and amostra[0] == grid[0]
+
+def test_buscar_early_stopping_em_pool_e_melhor_config():
+    rng = np.random.default_rng(0)
+    n = 400
+    X = pd.DataFrame(rng.integers(0, 2, size=(n, len(FEATURES))), columns=FEATURES).astype(float)
+    X["salario_valor"] = rng.lognormal(8, 0.5, n)
+    y = ((X["tem_email"] + X["cv_sap"] + rng.random(n)) > 1.5).astype(int)
+    cands = [{"num_leaves": 7, "learning_rate": 0.1}, {"num_leaves": 15, "learning_rate": 0.3}]
+
+    rel = buscar(X, y, cands, folds=2, workers=2, threads=1, max_rounds=60, patience=5)
+    assert sorted(rel["trial"]) == [0, 1]
+    assert rel["pr_auc"].is_monotonic_decreasing
+    assert (rel["best_iter"] >= 1).all() and (rel["best_iter"] <= 60).all()
+    best = melhores_params(rel)
+    assert best["n_estimators"] == int(rel.iloc[0]["best_iter"]) and "num_leaves" in best
@@ -9,3 +9,16 @@ def test_threshold_for_min_precision_basic():
     thr = threshold_for_min_precision(y, s, min_prec=0.8)
     # qualquer thr entre ~0.8-0.9 vai manter precisão alta
     assert 0.5 <= thr <= 0.95
+
+def test_get_engine_reutiliza_pool_por_dsn():
+    from src.utils import get_engine, dispose_engines
+    dsn = "postgresql+psycopg2://u:p@localhost:5432/db"
+    e1 = get_engine(dsn, pool_size=2, statement_timeout_ms=5000, application_name="teste")
+    e2 = get_engine(dsn, pool_size=2, statement_timeout_ms=5000, application_name="teste")
+    e3 = get_engine(dsn.replace("/db", "/outro"), pool_size=2)
+    assert e1 is e2
+    assert e1 is not e3
+    assert e1.pool.size() == 2
+    dispose_engines()
+    assert get_engine(dsn, pool_size=2, statement_timeout_ms=5000, application_name="teste") is not e1
+    dispose_engines()